@@ -0,0 +1,138 @@
+import os
+
+from game.save_format import read_save_file, SAVE_EXTENSION
+from game.save_service import write_save_file, snapshot_player_data
+
+# Seconds between autosave checks
+AUTOSAVE_SECONDS = 5
+
+# Save sections and the top-level player data keys each one holds.
+# "player" holds every key no other section claims (credits, location, limbs...).
+SAVE_SECTIONS = {
+    "stock_market": ("stock_market", "stock_holdings", "portfolio"),
+    "notes": ("notes",),
+    "inventory": ("inventory",),
+    "station_power": ("station_power",),
+    "botany": ("botany",),
+    "crew": ("station_crew",),
+    "player": None
+}
+
+# Keys claimed by a named section
+_SECTION_KEYS = {key for keys in SAVE_SECTIONS.values() if keys for key in keys}
+
+
+def section_keys(player_data, section):
+    """Top-level keys of player data that belong to a section"""
+    keys = SAVE_SECTIONS[section]
+    if keys is None:
+        return [key for key in player_data if key not in _SECTION_KEYS]
+    return [key for key in keys if key in player_data]
+
+
+def autosave_folder(saves_path, name):
+    """Folder holding a character's autosave passes"""
+    return os.path.join(saves_path, name + ".autosave")
+
+
+def pass_filename(pass_number, sections):
+    """File name of an autosave pass - the sections it holds are part of the name"""
+    return f"{pass_number:08d}-{'+'.join(sorted(sections))}{SAVE_EXTENSION}"
+
+
+def list_passes(folder):
+    """(pass number, sections, path) of every autosave pass in a folder, oldest first"""
+    if not os.path.isdir(folder):
+        return []
+    passes = []
+    for filename in os.listdir(folder):
+        if not filename.endswith(SAVE_EXTENSION):
+            continue
+        number, _, sections = filename[:-len(SAVE_EXTENSION)].partition("-")
+        if number.isdigit() and sections:
+            passes.append((int(number), sections.split("+"), os.path.join(folder, filename)))
+    passes.sort()
+    return passes
+
+
+def write_pass(folder, pass_number, sections, data):
+    """Write one autosave pass, then remove the passes it made obsolete.
+
+    A pass is kept while it holds the newest copy of at least one section,
+    so the folder never has more than one file per section.
+    """
+    write_save_file(os.path.join(folder, pass_filename(pass_number, sections)), data)
+
+    passes = list_passes(folder)
+    newest = {}
+    for number, names, path in passes:
+        for name in names:
+            newest[name] = number
+    keep = set(newest.values())
+    for number, names, path in passes:
+        if number not in keep:
+            os.remove(path)
+
+
+def clear_passes(folder, up_to):
+    """Remove the autosave passes a full save already covers"""
+    for number, names, path in list_passes(folder):
+        if number <= up_to:
+            os.remove(path)
+
+
+def apply_passes(player_data, folder):
+    """Bring loaded player data up to date with the autosave passes newer than the save; returns the last pass"""
+    saved_pass = player_data.get("autosave_pass", 0)
+    last_pass = saved_pass
+    for number, names, path in list_passes(folder):
+        if number <= saved_pass:
+            continue
+        try:
+            data = read_save_file(path)
+        except (OSError, ValueError):
+            break  # Unreadable pass - keep what the earlier passes restored
+        player_data.update(data)
+        last_pass = number
+    return last_pass
+
+
+class SaveTracker:
+    """Which save sections changed since they were last written.
+
+    Game code marks a section dirty whenever it changes that part of the
+    player data, and the autosave only writes the dirty sections. A check
+    with nothing dirty is a single truth test on an empty set.
+    """
+
+    def __init__(self, last_pass=0):
+        self.dirty = set()
+
+        # Number of the last autosave pass taken
+        self.last_pass = last_pass
+
+    def mark_dirty(self, *sections):
+        """Note that sections of the player data changed"""
+        for section in sections:
+            if section not in SAVE_SECTIONS:
+                raise ValueError(f"Unknown save section: {section}")
+            self.dirty.add(section)
+
+    def mark_all(self):
+        """Note that anything may have changed (e.g. after a room edited the player data)"""
+        self.dirty.update(SAVE_SECTIONS)
+
+    def clear(self):
+        """Everything was just handed to a full save"""
+        self.dirty.clear()
+
+    def take_pass(self, player_data):
+        """(pass number, sections, data) for the dirty sections, or None if nothing changed"""
+        if not self.dirty:
+            return None
+        sections = sorted(self.dirty)
+        keys = [key for section in sections for key in section_keys(player_data, section)]
+        data = snapshot_player_data({key: player_data[key] for key in keys})
+        self.dirty.clear()
+        self.last_pass += 1
+        return self.last_pass, sections, data
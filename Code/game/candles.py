@@ -0,0 +1,286 @@
+import numpy as np
+
+from game.market_engine import CYCLES_PER_DAY
+
+# Candle levels, finest first: (name, market cycles per candle)
+CANDLE_LEVELS = (
+    ("Day", CYCLES_PER_DAY),
+    ("Week", CYCLES_PER_DAY * 7),
+    ("Month", CYCLES_PER_DAY * 30),
+    ("Quarter", CYCLES_PER_DAY * 90)
+)
+
+# Completed candles kept per level and company
+CANDLE_DEPTH = 500
+
+# Candles are only drawn, so single precision is plenty and halves their memory
+CANDLE_DTYPE = np.float32
+
+
+def cycle_index(cycle_number, day_number):
+    """Market cycles from cycle 1 of day 1 to the given cycle - candles are counted from there"""
+    return (day_number - 1) * CYCLES_PER_DAY + (cycle_number - 1)
+
+
+class CandleLevel:
+    """Open/high/low/close candles of one size for every company, plus the candle in progress.
+
+    A candle covers the cycles whose cycle_index falls in the same multiple
+    of the candle size, so day candles run from cycle 1 to cycle 5 of a
+    game day and weeks, months and quarters start on whole days.
+    """
+
+    def __init__(self, name, cycles, rows, depth):
+        self.name = name
+        self.cycles = cycles
+        self.depth = depth
+
+        # Completed candles - one ring of `depth` candles per field (open, high, low, close) and company.
+        # Every company closes its candles together, so the rings share their write position.
+        self.values = np.zeros((4, rows, depth), dtype=CANDLE_DTYPE)
+        self.end = 0
+        self.lengths = np.zeros(rows, dtype=np.int64)
+
+        # Candle in progress and how many cycles it holds (every company ticks together)
+        self.current = np.zeros((4, rows))
+        self.filled = 0
+
+        # Candles completed so far
+        self.completed = 0
+
+    def grow(self, rows):
+        """Make room for more companies"""
+        values = np.zeros((4, rows, self.depth), dtype=CANDLE_DTYPE)
+        values[:, :self.values.shape[1]] = self.values
+        lengths = np.zeros(rows, dtype=np.int64)
+        lengths[:len(self.lengths)] = self.lengths
+        current = np.zeros((4, rows))
+        current[:, :self.current.shape[1]] = self.current
+
+        self.values = values
+        self.lengths = lengths
+        self.current = current
+
+    def _close_candles(self, candles):
+        """Store completed candles - shaped (field, candle, company)"""
+        _, count, n = candles.shape
+        self.completed += count
+
+        # Only the newest `depth` candles fit in the rings
+        depth = self.depth
+        if count > depth:
+            candles = candles[:, -depth:]
+            count = depth
+
+        slots = (self.end + np.arange(count)) % depth
+        self.values[:, :n, slots] = candles.transpose(0, 2, 1)
+        self.end = (self.end + count) % depth
+        np.minimum(self.lengths[:n] + count, depth, out=self.lengths[:n])
+
+    def _close_current(self, n):
+        """Complete the candle in progress"""
+        self._close_candles(self.current[:, None, :n])
+        self.filled = 0
+
+    def extend(self, prices, position):
+        """Add several cycles of prices - one row per cycle, one column per company - starting at cycle `position`"""
+        steps, n = prices.shape
+        current = self.current[:, :n]
+        used = 0
+
+        # A candle left open across a candle boundary (the clock was moved) is complete
+        offset = position % self.cycles
+        if self.filled and offset == 0:
+            self._close_current(n)
+
+        # Finish the candle in progress, or start one partway through its candle
+        if offset:
+            take = min(self.cycles - offset, steps)
+            part = prices[:take]
+            if self.filled:
+                np.maximum(current[1], part.max(axis=0), out=current[1])
+                np.minimum(current[2], part.min(axis=0), out=current[2])
+            else:
+                current[0] = part[0]
+                current[1] = part.max(axis=0)
+                current[2] = part.min(axis=0)
+            current[3] = part[-1]
+            self.filled += take
+            used = take
+            if offset + take == self.cycles:
+                self._close_current(n)
+
+        # Whole candles in one reshape
+        whole = (steps - used) // self.cycles
+        if whole:
+            block = prices[used:used + whole * self.cycles].reshape(whole, self.cycles, n)
+            self._close_candles(np.stack((block[:, 0], block.max(axis=1), block.min(axis=1), block[:, -1])))
+            used += whole * self.cycles
+
+        # Start a new candle with what's left
+        if used < steps:
+            part = prices[used:]
+            current[0] = part[0]
+            current[1] = part.max(axis=0)
+            current[2] = part.min(axis=0)
+            current[3] = part[-1]
+            self.filled = steps - used
+
+    def append(self, prices, position):
+        """Add one cycle of prices for every company at cycle `position`"""
+        n = len(prices)
+        current = self.current[:, :n]
+        if self.filled and position % self.cycles == 0:
+            self._close_current(n)
+
+        if self.filled == 0:
+            current[:] = prices
+        else:
+            np.maximum(current[1], prices, out=current[1])
+            np.minimum(current[2], prices, out=current[2])
+            current[3] = prices
+        self.filled += 1
+
+        if (position + 1) % self.cycles == 0:
+            self._close_current(n)
+
+    def completed_candles(self, row, count=None):
+        """Completed candles of one company, oldest first, as a (field, candle) array"""
+        length = int(self.lengths[row])
+        if count is not None:
+            length = min(length, count)
+        slots = (self.end - length + np.arange(length)) % self.depth
+        return self.values[:, row, slots].astype(np.float64)
+
+    def candles(self, row, count=None):
+        """(opens, highs, lows, closes) for one company, oldest first, including the candle in progress"""
+        values = self.completed_candles(row)
+        if self.filled:
+            values = np.concatenate((values, self.current[:, row, None]), axis=1)
+        if count is not None:
+            values = values[:, -count:]
+        return tuple(values)
+
+
+class CandlePyramid:
+    """Price history aggregated into day, week, month and quarter candles, updated every tick.
+
+    Each tick adds the new prices to the candle in progress at every level
+    in a few vectorized operations, so drawing a long history only needs
+    the candles of the coarsest level that covers it, not every cycle.
+    `position` is the cycle_index of the next price added, which places
+    every candle on the game's days. The candles are saved with the game
+    (to_dict/from_dict), since the price history only holds the most
+    recent cycles.
+    """
+
+    def __init__(self, rows=16, depth=CANDLE_DEPTH, levels=CANDLE_LEVELS, position=0):
+        self.depth = depth
+        self.levels = [CandleLevel(name, cycles, rows, depth) for name, cycles in levels]
+
+        # Market cycles aggregated so far and the cycle the next price belongs to
+        self.cycles = 0
+        self.position = position
+
+    def grow(self, rows):
+        """Make room for more companies"""
+        for level in self.levels:
+            level.grow(rows)
+
+    def set_cycle(self, cycle_number, day_number):
+        """Place the next price added on the given game cycle"""
+        self.position = cycle_index(cycle_number, day_number)
+
+    def append(self, prices):
+        """Add one cycle of prices for every company"""
+        for level in self.levels:
+            level.append(prices, self.position)
+        self.cycles += 1
+        self.position += 1
+
+    def extend(self, prices):
+        """Add many cycles at once - one row per cycle, one column per company"""
+        if len(prices) == 0:
+            return
+        for level in self.levels:
+            level.extend(prices, self.position)
+        self.cycles += len(prices)
+        self.position += len(prices)
+
+    def level_for(self, cycles, max_points):
+        """Finest level that shows the given number of cycles in at most max_points candles"""
+        for level in self.levels:
+            candles = -(-cycles // level.cycles)
+            if candles <= max_points and candles <= self.depth:
+                return level
+        return self.levels[-1]
+
+    @classmethod
+    def from_history(cls, history, n, cycle_number=1, day_number=1, depth=CANDLE_DEPTH, levels=CANDLE_LEVELS):
+        """Build candles from the prices held in a HistoryBlock's first n rows, the last one on the given cycle"""
+        pyramid = cls(max(1, len(history.lengths)), depth, levels)
+        lengths = history.lengths[:n]
+        longest = int(lengths.max()) if n else 0
+
+        # Prices from before cycle 1 of day 1 have no candle to go in
+        last = cycle_index(cycle_number, day_number)
+        longest = min(longest, last + 1)
+        pyramid.position = last + 1
+        if longest <= 0:
+            return pyramid
+
+        # Line the histories up on the latest cycle, holding shorter ones at their first price
+        prices = np.empty((longest, n))
+        for company in range(n):
+            window = history.window(company)[-longest:]
+            if len(window):
+                prices[longest - len(window):, company] = window
+                prices[:longest - len(window), company] = window[0]
+            else:
+                prices[:, company] = 0.0
+        pyramid.position = last + 1 - longest
+        pyramid.extend(prices)
+        return pyramid
+
+    def to_dict(self, n):
+        """Saveable form of the first n companies' candles: (settings and candles in progress, candle rows).
+
+        The candle rows are one array per level, field and company, oldest
+        candle first, for the save file's packed market columns.
+        """
+        rows = []
+        levels = []
+        for level in self.levels:
+            windows = [level.completed_candles(company) for company in range(n)]
+            for field in range(4):
+                rows.extend(window[field] for window in windows)
+            levels.append({
+                "name": level.name,
+                "cycles": level.cycles,
+                "filled": level.filled,
+                "completed": level.completed,
+                "current": level.current[:, :n].tolist()
+            })
+        return {"depth": self.depth, "cycles": self.cycles, "position": self.position, "levels": levels}, rows
+
+    @classmethod
+    def from_dict(cls, data, rows, n, capacity):
+        """Restore candles saved by to_dict for n companies, with room for `capacity` companies"""
+        levels = [(level["name"], level["cycles"]) for level in data["levels"]]
+        pyramid = cls(max(capacity, n, 1), data.get("depth", CANDLE_DEPTH), levels, data.get("position", 0))
+        pyramid.cycles = data.get("cycles", 0)
+
+        rows = iter(rows)
+        for level, saved in zip(pyramid.levels, data["levels"]):
+            for field in range(4):
+                for company in range(n):
+                    values = np.asarray(next(rows), dtype=CANDLE_DTYPE)[-level.depth:]
+                    level.values[field, company, level.depth - len(values):] = values
+                    level.lengths[company] = len(values)
+            level.end = 0
+            level.filled = saved.get("filled", 0)
+            level.completed = saved.get("completed", 0)
+            current = np.asarray(saved.get("current", []), dtype=np.float64)
+            if current.size:
+                level.current[:, :current.shape[1]] = current
+        return pyramid
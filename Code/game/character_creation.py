@@ -4,7 +4,7 @@ import json
 import os
 
 class CharacterCreation:
-    def __init__(self, parent_window, game_ready_callback):
+    def __init__(self, parent_window, game_ready_callback, save_callback):
         # Create a new toplevel window
         self.creation_window = tk.Toplevel(parent_window)
         self.creation_window.title("Create Your Character")
@@ -14,6 +14,9 @@ class CharacterCreation:
         self.parent_window = parent_window
         self.game_ready_callback = game_ready_callback
         
+        # Saves player data through the game's save writer (SpaceStationGame.save_player_data)
+        self.save_callback = save_callback
+        
         # Initialize player data
         self.player_data = {}
         
@@ -192,8 +195,7 @@ class CharacterCreation:
             }
         
         # Save the game right after character creation
-        from game.game import Game
-        Game.save_game(self.player_data)
+        self.save_callback(self.player_data)
         
         # Destroy the character creation window
         self.creation_window.destroy()
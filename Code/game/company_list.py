@@ -0,0 +1,65 @@
+class CompanyListModel:
+    """Keeps a Listbox showing an ordered list of company names, editing only the rows that changed.
+
+    Rows shared at the start and end of the old and new lists are left
+    alone, and a name -> row index is kept so the selected company can be
+    found again in O(1) after a refresh.
+    """
+
+    def __init__(self, listbox):
+        self.listbox = listbox
+        self.rows = []
+        self.row_of = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def index_of(self, name):
+        """Row currently showing a company, or None if it's filtered out"""
+        return self.row_of.get(name)
+
+    def name_at(self, row):
+        """Company name shown in a row"""
+        return self.rows[row]
+
+    def update(self, names):
+        """Show names in order, touching only rows whose order or visibility changed"""
+        old = self.rows
+        new = list(names)
+        if old == new:
+            return
+
+        # Skip the rows that are unchanged at the start and at the end
+        shortest = min(len(old), len(new))
+        start = 0
+        while start < shortest and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < shortest - start and old[-1 - end] == new[-1 - end]:
+            end += 1
+
+        old_middle = old[start:len(old) - end]
+        new_middle = new[start:len(new) - end]
+
+        # Rewrite rows that now show a different company
+        overlap = min(len(old_middle), len(new_middle))
+        for offset in range(overlap):
+            if old_middle[offset] != new_middle[offset]:
+                row = start + offset
+                self.listbox.delete(row)
+                self.listbox.insert(row, new_middle[offset])
+
+        # Remove rows that disappeared or add rows that appeared
+        if len(old_middle) > overlap:
+            self.listbox.delete(start + overlap, start + len(old_middle) - 1)
+        for offset in range(overlap, len(new_middle)):
+            self.listbox.insert(start + offset, new_middle[offset])
+
+        # Update the name index for the changed range (and the tail if it shifted)
+        for name in old_middle:
+            self.row_of.pop(name, None)
+        reindex_end = len(new) if len(old_middle) != len(new_middle) else start + len(new_middle)
+        for row in range(start, reindex_end):
+            self.row_of[new[row]] = row
+
+        self.rows = new
@@ -0,0 +1,96 @@
+import bisect
+import numpy as np
+
+# Affordability filters and ownership filters, as used by the stock market window
+AFFORDABILITY_FILTERS = ("All", "Affordable", "Expensive")
+OWNERSHIP_FILTERS = ("all", "owned", "not_owned")
+
+
+class CompanyQuery:
+    """Indexes over the listed companies for the stock market window's filters, sort and search.
+
+    Three indexes answer every query without scanning the company objects:
+        price order - rows sorted by price, so the affordable companies are
+                      one bisect away (a whole share costs at most the credits)
+        name order  - lowercased names sorted once, so a prefix search is
+                      two bisects
+        ownership   - a boolean mask from the engine's owned share column
+    The price order is only rebuilt when it's given a different price
+    array, which with published market states means once per tick.
+    """
+
+    def __init__(self):
+        self.names = ()
+        self.prices = None
+
+        # Rows in price order and the sorted prices
+        self.price_order = np.zeros(0, dtype=np.int64)
+        self.sorted_prices = np.zeros(0)
+
+        # Lowercased names in order and the row of each
+        self.sorted_names = []
+        self.name_rows = np.zeros(0, dtype=np.int64)
+
+    def index(self, names, prices):
+        """Bring the indexes up to date with the companies' names and prices"""
+        names = tuple(names)
+        if names != self.names:
+            self.names = names
+            order = sorted(range(len(self.names)), key=lambda row: self.names[row].lower())
+            self.sorted_names = [self.names[row].lower() for row in order]
+            self.name_rows = np.array(order, dtype=np.int64)
+            self.prices = None
+
+        if prices is not self.prices:
+            self.prices = prices
+            self.price_order = np.argsort(prices[:len(self.names)], kind="stable")
+            self.sorted_prices = np.asarray(prices)[self.price_order]
+
+    def affordable_count(self, credits):
+        """How many companies cost at most the given credits per share"""
+        return int(np.searchsorted(self.sorted_prices, credits, side="right"))
+
+    def prefix_rows(self, prefix):
+        """Rows of the companies whose name starts with prefix (case-insensitive)"""
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.sorted_names, prefix)
+        end = bisect.bisect_left(self.sorted_names, prefix + "\uffff", start)
+        return self.name_rows[start:end]
+
+    def select(self, credits, affordability="All", ownership="all", owned_shares=None, prefix="",
+               sort_values=None, descending=False):
+        """Names of the companies passing every filter, sorted by price or the given values"""
+        n = len(self.names)
+        if affordability not in AFFORDABILITY_FILTERS:
+            raise ValueError(f"Unknown affordability filter: {affordability}")
+        if ownership not in OWNERSHIP_FILTERS:
+            raise ValueError(f"Unknown ownership filter: {ownership}")
+
+        # Start from every row and narrow it down
+        keep = np.ones(n, dtype=bool)
+
+        # Affordable companies are a prefix of the price order
+        if affordability != "All":
+            cutoff = self.affordable_count(credits)
+            affordable = np.zeros(n, dtype=bool)
+            affordable[self.price_order[:cutoff]] = True
+            keep &= affordable if affordability == "Affordable" else ~affordable
+
+        if ownership != "all" and owned_shares is not None:
+            owned = np.asarray(owned_shares[:n]) > 0
+            keep &= owned if ownership == "owned" else ~owned
+
+        if prefix:
+            matches = np.zeros(n, dtype=bool)
+            matches[self.prefix_rows(prefix)] = True
+            keep &= matches
+
+        # Sort by price with the index we already have, or by other values on the rows that are left
+        if sort_values is None:
+            rows = self.price_order[keep[self.price_order]]
+        else:
+            rows = np.flatnonzero(keep)
+            rows = rows[np.argsort(np.asarray(sort_values)[rows], kind="stable")]
+        if descending:
+            rows = rows[::-1]
+        return [self.names[row] for row in rows]
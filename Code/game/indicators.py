@@ -0,0 +1,218 @@
+import numpy as np
+
+# Cycles in the simple moving average window
+SMA_WINDOW = 20
+
+# Span of the exponential moving average (smoothing = 2 / (span + 1))
+EMA_SPAN = 20
+
+# Decay of the EWMA variance of returns (RiskMetrics uses 0.94)
+VOLATILITY_DECAY = 0.94
+
+# Cycles in the RSI's Wilder smoothing
+RSI_PERIOD = 14
+
+# Cycles replayed when fast-forwarding - older cycles no longer affect the exponential indicators
+REPLAY_CYCLES = 1000
+
+# Indicator names, as used for sorting and display
+INDICATORS = ("sma", "ema", "volatility", "rsi", "drawdown")
+
+
+class IndicatorEngine:
+    """Technical indicators for every company, updated from running sums each tick.
+
+    Every indicator is kept as one array with a value per engine row, so a
+    tick is a handful of vectorized operations no matter how many companies
+    are listed:
+        sma        - mean of the last SMA_WINDOW prices (running sum plus a ring of the window)
+        ema        - exponential moving average of the price
+        volatility - EWMA standard deviation of the per-cycle log return
+        rsi        - Wilder relative strength index, 0-100
+        drawdown   - fraction the price is below its highest price so far
+    """
+
+    def __init__(self, rows=16, sma_window=SMA_WINDOW, ema_span=EMA_SPAN, volatility_decay=VOLATILITY_DECAY,
+                 rsi_period=RSI_PERIOD):
+        self.sma_window = sma_window
+        self.ema_alpha = 2.0 / (ema_span + 1)
+        self.volatility_decay = volatility_decay
+        self.rsi_alpha = 1.0 / rsi_period
+
+        rows = max(1, rows)
+
+        # Cycles seen by each row - rows start fresh when their company is added
+        self.counts = np.zeros(rows, dtype=np.int64)
+
+        # Last price of each row, for returns and gains/losses
+        self.last_prices = np.zeros(rows)
+
+        # Moving average window (one column per company) and its running sum
+        self.window = np.zeros((sma_window, rows))
+        self.window_sums = np.zeros(rows)
+        self.window_pos = 0
+
+        # Exponential state
+        self.ema = np.zeros(rows)
+        self.variance = np.zeros(rows)
+        self.average_gain = np.zeros(rows)
+        self.average_loss = np.zeros(rows)
+
+        # Highest price so far
+        self.peaks = np.zeros(rows)
+
+        # Ticks since the running sums were last recomputed from the window
+        self._since_resum = 0
+
+    def grow(self, rows):
+        """Make room for more companies"""
+        def grow(array):
+            grown = np.zeros(array.shape[:-1] + (rows,), dtype=array.dtype)
+            grown[..., :array.shape[-1]] = array
+            return grown
+
+        self.counts = grow(self.counts)
+        self.last_prices = grow(self.last_prices)
+        self.window = grow(self.window)
+        self.window_sums = grow(self.window_sums)
+        self.ema = grow(self.ema)
+        self.variance = grow(self.variance)
+        self.average_gain = grow(self.average_gain)
+        self.average_loss = grow(self.average_loss)
+        self.peaks = grow(self.peaks)
+
+    def append(self, prices):
+        """Add one cycle of prices for the first len(prices) rows"""
+        n = len(prices)
+        if n == 0:
+            return
+        counts = self.counts[:n]
+        last = self.last_prices[:n]
+
+        # Rows seeing their first price start every indicator at that price
+        new = counts == 0
+        if new.any():
+            last[new] = prices[new]
+            self.ema[:n][new] = prices[new]
+            self.peaks[:n][new] = prices[new]
+            self.window[:, :n][:, new] = 0.0
+            self.window_sums[:n][new] = 0.0
+            self.variance[:n][new] = 0.0
+            self.average_gain[:n][new] = 0.0
+            self.average_loss[:n][new] = 0.0
+
+        # Moving average - swap the oldest price in the window for the new one
+        slot = self.window[self.window_pos, :n]
+        self.window_sums[:n] += prices - slot
+        slot[:] = prices
+        self.window_pos = (self.window_pos + 1) % self.sma_window
+
+        # Running sums drift with rounding, so recompute them once per window
+        self._since_resum += 1
+        if self._since_resum >= self.sma_window:
+            self.window_sums[:n] = self.window[:, :n].sum(axis=0)
+            self._since_resum = 0
+
+        # Exponential moving average
+        self.ema[:n] += self.ema_alpha * (prices - self.ema[:n])
+
+        # EWMA variance of log returns
+        returns = np.log(prices / last)
+        self.variance[:n] *= self.volatility_decay
+        self.variance[:n] += (1.0 - self.volatility_decay) * returns * returns
+
+        # Wilder-smoothed gains and losses
+        moves = prices - last
+        self.average_gain[:n] += self.rsi_alpha * (np.maximum(moves, 0.0) - self.average_gain[:n])
+        self.average_loss[:n] += self.rsi_alpha * (np.maximum(-moves, 0.0) - self.average_loss[:n])
+
+        # Highest price so far
+        np.maximum(self.peaks[:n], prices, out=self.peaks[:n])
+
+        last[:] = prices
+        counts += 1
+
+    def extend(self, prices, replay=REPLAY_CYCLES):
+        """Add many cycles at once - one row per cycle, one column per company.
+
+        Only the last `replay` cycles are replayed tick by tick; anything
+        older has decayed out of the exponential indicators and the moving
+        average window, so it only needs to update the peaks and counts.
+        """
+        if len(prices) == 0:
+            return
+        n = prices.shape[1]
+        replay = max(0, min(replay, len(prices)))
+        if replay < len(prices):
+            older = prices[:len(prices) - replay]
+            highest = older.max(axis=0)
+            started = self.counts[:n] > 0
+            self.peaks[:n] = np.where(started, np.maximum(self.peaks[:n], highest), highest)
+            self.ema[:n] = np.where(started, self.ema[:n], older[-1])
+            self.last_prices[:n] = older[-1]
+            self.counts[:n] += len(older)
+            prices = prices[len(older):]
+        for row in prices:
+            self.append(row)
+
+    @classmethod
+    def from_history(cls, history, n, **settings):
+        """Indicators for the prices held in a HistoryBlock's first n rows"""
+        indicators = cls(max(1, len(history.lengths)), **settings)
+        lengths = history.lengths[:n]
+        longest = int(lengths.max()) if n else 0
+        if longest == 0:
+            return indicators
+
+        # Line the histories up on the latest cycle, holding shorter ones at their first price
+        prices = np.empty((longest, n))
+        for company in range(n):
+            window = history.window(company)
+            if len(window):
+                prices[longest - len(window):, company] = window
+                prices[:longest - len(window), company] = window[0]
+            else:
+                prices[:, company] = 1.0
+        indicators.extend(prices)
+        return indicators
+
+    @property
+    def sma(self):
+        """Simple moving average of every row (shorter histories average what they have)"""
+        return self.window_sums / np.clip(self.counts, 1, self.sma_window)
+
+    @property
+    def volatility(self):
+        """EWMA volatility of every row's per-cycle return"""
+        return np.sqrt(self.variance)
+
+    @property
+    def rsi(self):
+        """Relative strength index of every row - 50 when the price hasn't moved"""
+        total = self.average_gain + self.average_loss
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total > 0, 100.0 * self.average_gain / total, 50.0)
+
+    @property
+    def drawdown(self):
+        """Fraction every row's price is below its peak"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.peaks > 0, 1.0 - self.last_prices / self.peaks, 0.0)
+
+    def column(self, name):
+        """One indicator for every row, by name"""
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        return getattr(self, name)
+
+    def values(self, row):
+        """Every indicator for one company as a dict"""
+        total = self.average_gain[row] + self.average_loss[row]
+        peak = self.peaks[row]
+        return {
+            "sma": float(self.window_sums[row] / min(max(int(self.counts[row]), 1), self.sma_window)),
+            "ema": float(self.ema[row]),
+            "volatility": float(np.sqrt(self.variance[row])),
+            "rsi": float(100.0 * self.average_gain[row] / total) if total > 0 else 50.0,
+            "drawdown": float(1.0 - self.last_prices[row] / peak) if peak > 0 else 0.0
+        }
@@ -1,10 +1,7 @@
 import tkinter as tk
-import json
 import os
 import time
-import threading
 import datetime
-import random
 from tkinter import messagebox
 from tkinter import simpledialog
 from tkinter import ttk, PhotoImage
@@ -17,9 +14,17 @@ from matplotlib.figure import Figure
 # Import the StockMarket class
 from game.stock_market import StockMarket
 from game.stock_market import Company
-
-# Import the Game class correctly
-from game.game import Game
+from game.price_history import DEFAULT_HISTORY_DEPTH
+from game.market_scheduler import MarketScheduler
+from game.market_session import MarketSession
+from game.market_feed import MarketFeed
+from game.trade_ledger import TradeLedger
+from game.portfolio import Portfolio
+from game.order_book import OrderBook
+from game.save_service import SaveService
+from game.autosave import SaveTracker, AUTOSAVE_SECONDS, autosave_folder, write_pass, clear_passes, apply_passes, list_passes
+from game.save_format import read_save_file, save_file_path, SAVE_EXTENSION, LEGACY_SAVE_EXTENSION
+from game.save_index import SORT_ORDERS, summarize
 
 # Import special room classes
 from game.special_rooms import MedBay, Bridge, Security, Engineering, Bar, Botany
@@ -41,8 +46,8 @@ NPC_NAMES = [
     "Helen Sharman", "Tim Peake", "Andreas Mogensen", "Thomas Pesquet", "Samantha Cristoforetti"
 ]
 
-class SpaceStationGame:
-    def __init__(self, root, base_path):
+class SpaceStationGame(MarketSession):
+    def __init__(self, root, base_path, seed=None, history_depth=DEFAULT_HISTORY_DEPTH):
         self.root = root
         self.base_path = base_path
         self.root.title("Space Station 13 Text Clone")
@@ -53,7 +58,16 @@ class SpaceStationGame:
         self.previous_position = None
         self.market_running = False
         self.market_thread = None
-        self.last_update_time = datetime.datetime.now()
+        
+        # Stock market, trades, standing orders and random streams - shared with the market benchmarks
+        MarketSession.__init__(self, os.path.join(base_path, "game", "saves"), seed, history_depth)
+        
+        # Delivers market ticks from the market thread to open windows
+        self.market_feed = MarketFeed(self.root)
+        self.market_feed.start()
+        
+        # Player data is only changed on the Tk thread, so the game applies each tick there first
+        self.market_feed.subscribe(self.on_market_tick)
         self.station_crew = [] # Initialize crew list here
         
         # Initialize battery timer
@@ -63,32 +77,15 @@ class SpaceStationGame:
         # Store base path for file operations
         self.base_path = base_path
         
-        # Stock market background tracking
-        self.companies = [
-            Company("TechCorp", random.uniform(10, 1000)),
-            Company("GlobalBank", random.uniform(10, 1000)),
-            Company("HealthCare Plus", random.uniform(10, 1000)),
-            Company("EnergyCo", random.uniform(10, 1000)),
-            Company("FoodChain", random.uniform(10, 1000)),
-            Company("AutoMakers", random.uniform(10, 1000)),
-            Company("RetailGiant", random.uniform(10, 1000)),
-            Company("PharmaTech", random.uniform(10, 1000)),
-            Company("RealEstate Co", random.uniform(10, 1000)),
-            Company("MediaGroup", random.uniform(10, 1000)),
-            Company("Aerospace Inc", random.uniform(10, 1000)),
-            Company("TechStart", random.uniform(10, 1000)),
-            Company("GreenEnergy", random.uniform(10, 1000)),
-            Company("DigitalBank", random.uniform(10, 1000)),
-            Company("SmartHome", random.uniform(10, 1000))
-        ]
-
-        # Generate 5 cycles of history for each company
-        for _ in range(5):
-            for company in self.companies:
-                company.update_value()
-
-        self.stock_cycle_number = 1
-        self.stock_day_number = 1
+        # Every save goes through one writer thread that replaces save files atomically
+        self.save_service = SaveService(self.saves_path)
+        
+        # Sections of player data changed since the last save, written by the autosave timer
+        self.save_tracker = SaveTracker()
+        self.autosave_timer_id = None
+        
+        # Order of the saves on the Load Game screen (one of SORT_ORDERS)
+        self.load_sort_order = "Last Played"
         
         self.player_data = {
             "name": "",
@@ -100,9 +97,7 @@ class SpaceStationGame:
             "stock_market": {
                 "cycle_number": 1,
                 "day_number": 1,
-                "companies": [],
-                "last_update_time": datetime.datetime.now().isoformat(),
-                "trade_log": []  # Add trade log to persist between sessions
+                "last_update_time": datetime.datetime.now().isoformat()
             },
             "limbs": {
                 "left_arm": 100,
@@ -178,17 +173,18 @@ class SpaceStationGame:
         """Handle application closing"""
         # Stop the market thread
         self.stop_market_thread()
+        self.market_feed.stop()
         
         # Stop the battery timer
         self.stop_battery_timer()
+        self.stop_autosave_timer()
         
         # Save the game before closing if a game is in progress
         if self.player_data and self.player_data.get("name"):
-            # Update market data one last time
-            self.update_market_data()
-            
-            # Save the game
-            Game.save_game(self.player_data)
+            self.save_game()
+        
+        # Let the writer thread finish before the process exits
+        self.save_service.stop()
         
         # Destroy the window
         self.root.destroy()
@@ -196,13 +192,16 @@ class SpaceStationGame:
     def start_market_thread(self):
         if not self.market_running:
             self.market_running = True
-            self.market_thread = threading.Thread(target=self.run_stock_market, daemon=True)
-            self.market_thread.start()
+            self.market_scheduler = MarketScheduler(self.run_scheduled_tick, self.market_tick_seconds,
+                                                    self.last_update_time)
+            self.market_thread = self.market_scheduler.start()
     
     def stop_market_thread(self):
         self.market_running = False
-        if self.market_thread and self.market_thread.is_alive():
-            self.market_thread.join(1)  # Give it 1 second to finish
+        if self.market_scheduler:
+            # Wakes the scheduler immediately instead of waiting out its sleep
+            self.market_scheduler.stop(1)
+            self.market_scheduler = None
             
     def stop_battery_timer(self):
         """Stop the battery timer if it's running"""
@@ -219,6 +218,52 @@ class SpaceStationGame:
             self.update_battery()
         else:
             print("Battery timer already running")
+        
+        # Autosave runs whenever the game clock does
+        self.start_autosave_timer()
+    
+    def start_autosave_timer(self):
+        """Start the timer that writes changed save sections in the background"""
+        if self.autosave_timer_id is None:
+            self.autosave_timer_id = self.root.after(AUTOSAVE_SECONDS * 1000, self.autosave)
+    
+    def stop_autosave_timer(self):
+        """Stop the autosave timer if it's running"""
+        if self.autosave_timer_id is not None:
+            self.root.after_cancel(self.autosave_timer_id)
+            self.autosave_timer_id = None
+    
+    def autosave(self):
+        """Queue the save sections that changed since they were last written (nothing to do costs one check)"""
+        self.autosave_timer_id = self.root.after(AUTOSAVE_SECONDS * 1000, self.autosave)
+        if not self.save_tracker.dirty or not self.player_data.get("name"):
+            return
+        
+        # Bring the dirty sections' derived data up to date, like prepare_save does for a full save
+        if "stock_market" in self.save_tracker.dirty:
+            self.process_pending_trades()
+            self.apply_order_fills()
+            self.save_market_columns()
+            self.save_trade_ledger()
+            self.save_portfolio()
+            self.save_order_book()
+        if "crew" in self.save_tracker.dirty:
+            self.player_data["station_crew"] = self.station_crew
+        if "player" in self.save_tracker.dirty:
+            self.player_data["rng"] = self.rng_streams.to_dict()
+        
+        # Written on the save thread into the character's autosave folder
+        pass_number, sections, data = self.save_tracker.take_pass(self.player_data)
+        folder = autosave_folder(self.save_service.saves_path, self.player_data["name"])
+        summary = summarize(data) if "player" in sections else None
+        
+        def write():
+            write_pass(folder, pass_number, sections, data)
+            # Keep the Load Game screen's credits, location and last played time current
+            if summary:
+                self.save_service.index.touch(summary)
+        
+        self.save_service.submit(("autosave", folder, pass_number), write)
     
     def update_battery(self):
         """Update the battery level - discharge based on system power levels, charge based on solar panel status"""
@@ -310,6 +355,7 @@ class SpaceStationGame:
             # Update player data with new battery level
             self.player_data["station_power"]["battery_level"] = new_level
             self.player_data["station_power"]["last_update_time"] = now.isoformat()
+            self.save_tracker.mark_dirty("station_power")
             
             # Check oxygen levels based on life support setting
             self.check_life_support_status(elapsed_seconds)
@@ -317,7 +363,7 @@ class SpaceStationGame:
             # If battery level reaches critical point, trigger effects
             if 0 < new_level <= 10:
                 # Flash warning messages occasionally when battery is low
-                if random.random() < 0.2:  # 20% chance on each check
+                if self.rng_streams.stream("power").random() < 0.2:  # 20% chance on each check
                     self.show_low_power_warning()
             elif new_level <= 0:
                 # Battery completely drained - trigger power outage
@@ -370,6 +416,10 @@ class SpaceStationGame:
                 recovery_rate_per_second = 1 / 30.0
                 apply_recovery = True
                 
+            # Oxygen damage of the player and crew changes
+            if apply_damage or apply_recovery:
+                self.save_tracker.mark_dirty("player", "crew")
+            
             # Apply damage or recovery to all crew members
             for crew_member in all_crew:
                 is_player = (crew_member == self.player_data)
@@ -442,6 +492,7 @@ class SpaceStationGame:
             # Set all limbs to critical levels
             for limb in self.player_data["limbs"]:
                 self.player_data["limbs"][limb] = 20
+            self.save_tracker.mark_dirty("player")
                 
             # Add note about near-death
             self.add_note("CRITICAL EVENT: Nearly died from oxygen deprivation. Emergency medical systems intervened.")
@@ -471,6 +522,7 @@ class SpaceStationGame:
         try:
             # Set battery to minimum level to prevent multiple outage triggers
             self.player_data["station_power"]["battery_level"] = 0.1
+            self.save_tracker.mark_dirty("station_power")
             
             window = self.root.focus_get()
             if window:
@@ -506,175 +558,63 @@ class SpaceStationGame:
             print("Station lighting restored to normal levels")
             # In a real implementation, you would restore normal hallway appearance
     
-    def run_stock_market(self):
-        """Run the stock market in the background"""
-        while self.market_running:
-            # Calculate time until next update
-            now = datetime.datetime.now()
-            elapsed = (now - self.last_update_time).total_seconds()
-            
-            # If 60 seconds have passed since last update
-            if elapsed >= 60:
-                # Update all companies
-                for company in self.companies:
-                    company.update_value()
-                
-                # Update cycle and day numbers
-                self.stock_cycle_number += 1
-                
-                # Check if we completed a full cycle (1-5)
-                if self.stock_cycle_number > 5:
-                    # Reset cycle to 1 and increment day
-                    self.stock_cycle_number = 1
-                    self.stock_day_number += 1
-                
-                # Update last update time
-                self.last_update_time = now
-                
-                # Immediately update player data with new market state
-                # This ensures all UI windows have access to the latest data
-                self.update_market_data()
-                
-                # Process any pending trades if any
-                self.process_pending_trades()
-                
-                # Log market update
-                # print(f"Market updated: Cycle {self.stock_cycle_number}, Day {self.stock_day_number}")
-            
-            # Sleep for 1 second before checking again
-            time.sleep(1)
-    
-    def process_pending_trades(self):
-        """Process any pending trades in the player data"""
-        if "pending_trades" in self.player_data["stock_market"]:
-            pending = self.player_data["stock_market"]["pending_trades"]
-            if pending and (pending.get('bought') or pending.get('sold')):
-                # Check if we already have a trade log for this cycle
-                if "trade_log" not in self.player_data["stock_market"]:
-                    self.player_data["stock_market"]["trade_log"] = []
-                
-                # Check if there's already an entry for the current cycle
-                current_cycle_log = None
-                for entry in self.player_data["stock_market"]["trade_log"]:
-                    if entry.get("cycle") == self.stock_cycle_number and entry.get("day") == self.stock_day_number:
-                        current_cycle_log = entry
-                        break
-                
-                # Only create an entry if there are actual trades
-                has_trades = False
-                if pending.get('bought'):
-                    has_trades = any(trade.get('amount', 0) > 0 for trade in pending['bought'].values())
-                if not has_trades and pending.get('sold'):
-                    has_trades = any(trade.get('amount', 0) > 0 for trade in pending['sold'].values())
-                
-                if current_cycle_log and has_trades:
-                    # Update existing entry for this cycle
-                    trades = current_cycle_log.get("trades", {})
-                    
-                    # Update bought trades
-                    if 'bought' in pending:
-                        if 'bought' not in trades:
-                            trades['bought'] = {}
-                        for company, trade_data in pending['bought'].items():
-                            amount = trade_data.get('amount', 0)
-                            if amount > 0:  # Only process trades with non-zero amounts
-                                if company in trades['bought']:
-                                    # Merge the trades
-                                    trades['bought'][company]['amount'] += amount
-                                    trades['bought'][company]['total'] += trade_data.get('total', 0)
-                                else:
-                                    # Add new company trades
-                                    trades['bought'][company] = trade_data
-                    
-                    # Update sold trades
-                    if 'sold' in pending:
-                        if 'sold' not in trades:
-                            trades['sold'] = {}
-                        for company, trade_data in pending['sold'].items():
-                            amount = trade_data.get('amount', 0)
-                            if amount > 0:  # Only process trades with non-zero amounts
-                                if company in trades['sold']:
-                                    # Merge the trades
-                                    trades['sold'][company]['amount'] += amount
-                                    trades['sold'][company]['total'] += trade_data.get('total', 0)
-                                else:
-                                    # Add new company trades
-                                    trades['sold'][company] = trade_data
-                    
-                    # Update the trades in the current cycle log
-                    current_cycle_log["trades"] = trades
-                    
-                elif has_trades:
-                    # Add new trade entry for this cycle
-                    trade_entry = {
-                        "cycle": self.stock_cycle_number,
-                        "day": self.stock_day_number,
-                        "trades": pending
-                    }
-                    self.player_data["stock_market"]["trade_log"].append(trade_entry)
-                
-                # Clear pending trades
-                self.player_data["stock_market"]["pending_trades"] = {}
+    def publish_market_tick(self):
+        """Push the current cycle, day and update time to market window subscribers"""
+        state = self.market_snapshot.state
+        self.market_feed.publish({
+            "cycle_number": state.cycle_number,
+            "day_number": state.day_number,
+            "last_update_time": state.last_update_time,
+            "state": state
+        })
     
-    def update_market_data(self):
-        """Update player data with current market state"""
-        # Store company data
-        company_data = []
-        for company in self.companies:
-            company_data.append({
-                "name": company.name,
-                "current_value": company.current_value,
-                "previous_value": company.previous_value,
-                "price_history": company.price_history,
-                "owned_shares": company.owned_shares if hasattr(company, "owned_shares") else 0
-            })
-        
-        # Update player data
-        self.player_data["stock_market"].update({
-            "cycle_number": self.stock_cycle_number,
-            "day_number": self.stock_day_number,
-            "companies": company_data,
-            "last_update_time": self.last_update_time.isoformat()
+    def on_market_tick(self, event):
+        """Bring player data up to date after a market tick (runs on the Tk thread)"""
+        self.player_data.setdefault("stock_market", {}).update({
+            "cycle_number": event["cycle_number"],
+            "day_number": event["day_number"],
+            "last_update_time": event["last_update_time"].isoformat()
         })
+        self.save_tracker.mark_dirty("stock_market")
+        
+        # Process any pending trades if any
+        self.process_pending_trades()
         
-        # Ensure trade log exists
-        if "trade_log" not in self.player_data["stock_market"]:
-            self.player_data["stock_market"]["trade_log"] = []
+        # Fill the standing orders the tick triggered
+        self.apply_order_fills()
     
-    def load_market_data(self):
-        """Load market data from player data"""
-        if "stock_market" in self.player_data:
-            market_data = self.player_data["stock_market"]
-            
-            # Load cycle and day numbers
-            self.stock_cycle_number = market_data.get("cycle_number", 0)
-            self.stock_day_number = market_data.get("day_number", 1)
-            
-            # Load last update time
-            if "last_update_time" in market_data:
-                try:
-                    self.last_update_time = datetime.datetime.fromisoformat(market_data["last_update_time"])
-                except (ValueError, TypeError):
-                    # If there's an error parsing the time, use current time
-                    self.last_update_time = datetime.datetime.now()
-            else:
-                self.last_update_time = datetime.datetime.now()
-            
-            # Load company data
-            if "companies" in market_data and len(market_data["companies"]) == len(self.companies):
-                for i, company_data in enumerate(market_data["companies"]):
-                    self.companies[i].name = company_data["name"]
-                    self.companies[i].current_value = company_data["current_value"]
-                    self.companies[i].previous_value = company_data["previous_value"]
-                    self.companies[i].price_history = company_data["price_history"]
-                    self.companies[i].owned_shares = company_data.get("owned_shares", 0)
+    def prepare_save(self):
+        """Bring player data up to date with the market, trades, orders, random seed and crew before writing a save"""
+        MarketSession.prepare_save(self)
+        self.player_data["station_crew"] = self.station_crew
+    
+    def mark_dirty(self, *sections):
+        """Note changed sections of player data for the next autosave pass"""
+        self.save_tracker.mark_dirty(*sections)
+    
+    def save_game(self):
+        """Bring player data up to date and queue it for the background save writer"""
+        # Update market data and append new trades to the journal before saving
+        self.prepare_save()
+        
+        # A full save holds everything the autosave passes so far did - remove them once it's written
+        last_pass = self.save_tracker.last_pass
+        self.player_data["autosave_pass"] = last_pass
+        self.save_tracker.clear()
+        folder = autosave_folder(self.save_service.saves_path, self.player_data["name"])
+        return self.save_service.save(self.player_data, after=lambda: clear_passes(folder, last_pass))
     
-    def get_time_until_next_update(self):
-        """Calculate the time in seconds until the next market update"""
-        now = datetime.datetime.now()
-        elapsed = (now - self.last_update_time).total_seconds()
-        remaining = max(0, 60 - elapsed)
-        return int(remaining)
+    def save_player_data(self, player_data):
+        """Save player data handed back by a room or screen window (their save callback)"""
+        # Screens may hold only part of the player data (a new character has no market yet)
+        if player_data is not self.player_data:
+            self.player_data.update(player_data)
+        return self.save_game()
+    
+    def last_autosave_pass(self, name):
+        """Number of the newest autosave pass on disk for a character (0 if there are none)"""
+        passes = list_passes(autosave_folder(self.save_service.saves_path, name))
+        return passes[-1][0] if passes else 0
     
     def show_main_menu(self):
         # Unbind mousewheel if it was bound
@@ -729,7 +669,7 @@ class SpaceStationGame:
         # Random Name button
         def set_random_name():
             self.name_entry.delete(0, tk.END)
-            self.name_entry.insert(0, random.choice(NPC_NAMES))
+            self.name_entry.insert(0, self.rng_streams.stream("crew").choice(NPC_NAMES))
             
         random_name_btn = tk.Button(form_frame, text="Random", font=("Arial", 12), command=set_random_name)
         random_name_btn.grid(row=0, column=2, padx=(5, 0), pady=10)
@@ -908,6 +848,9 @@ class SpaceStationGame:
         
         # --- NPC Generation --- 
         self.station_crew = [] # Reset crew list for new game
+        
+        # Number autosaves after any left by an old character of the same name, so the first save removes them
+        self.save_tracker = SaveTracker(self.last_autosave_pass(player_name))
         available_names = NPC_NAMES.copy()
         if player_name in available_names:
              available_names.remove(player_name) # Avoid duplicate names
@@ -927,7 +870,7 @@ class SpaceStationGame:
                 if not available_names:
                     npc_name = f"NPC_{npc_job.replace(' ', '')}" # Fallback name
                 else:
-                    npc_name = random.choice(available_names)
+                    npc_name = self.rng_streams.stream("crew").choice(available_names)
                     available_names.remove(npc_name)
 
                 npc_data = {
@@ -954,25 +897,21 @@ class SpaceStationGame:
                 print(f"Generated NPC: {npc_name} ({npc_job})") # Debug print
         # --- End NPC Generation ---
 
-        # Initialize stock market with starting values
+        # Initialize stock market with starting values (company columns are written from the snapshot on save)
         if "stock_market" not in self.player_data:
             self.player_data["stock_market"] = {
                 "cycle_number": 1,
                 "day_number": 1,
-                "last_update_time": datetime.datetime.now().isoformat(),
-                "companies": [],
-                "trade_log": []
+                "last_update_time": datetime.datetime.now().isoformat()
             }
-            
-            # Initialize company data in player data
-            for company in self.companies:
-                self.player_data["stock_market"]["companies"].append({
-                    "name": company.name,
-                    "current_value": company.current_value,
-                    "previous_value": company.previous_value,
-                    "price_history": company.price_history,
-                    "owned_shares": 0
-                })
+        
+        # Start a fresh trade journal for this character
+        self.trade_ledger = TradeLedger(journal_path=self.get_trade_journal_path())
+        self.trade_ledger.reset_journal()
+        
+        # No shares held yet
+        self.portfolio = Portfolio()
+        self.order_book = OrderBook()
         
         # Initialize station power - Solar panels default ON unless player can control them
         can_control_power = job in ["Engineer", "Captain"]
@@ -994,20 +933,8 @@ class SpaceStationGame:
     
     def save_and_start(self):
         """Save the character and start the game"""
-        # Update market data before saving
-        self.update_market_data()
-        
-        # Create saves directory if it doesn't exist
-        saves_path = os.path.join(self.base_path, "game", "saves")
-        os.makedirs(saves_path, exist_ok=True)
-        
-        # Save game to JSON file
-        filename = os.path.join(saves_path, f"{self.player_data['name']}.json")
-        with open(filename, "w") as f:
-            json.dump(self.player_data, f, indent=4)
-        
-        # Initialize stock market data
-        self.update_market_data()
+        # Written in the background - the game carries on while the file is saved
+        self.save_game()
         
         # Start the market thread
         self.start_market_thread()
@@ -1019,6 +946,9 @@ class SpaceStationGame:
         self.show_room()
     
     def show_room(self):
+        # The location may have changed on the way here
+        self.save_tracker.mark_dirty("player")
+        
         # Clear the window
         for widget in self.root.winfo_children():
             widget.destroy()
@@ -1346,20 +1276,6 @@ class SpaceStationGame:
         close_btn = tk.Button(popup, text="Close", font=("Arial", 12), width=10, command=popup.destroy)
         close_btn.pack(pady=10)
     
-    def add_note(self, text):
-        """Add a note to the player's notes"""
-        if "notes" not in self.player_data:
-            self.player_data["notes"] = []
-        
-        # Create a new note with timestamp
-        note = {
-            "timestamp": datetime.datetime.now().isoformat(),
-            "text": text
-        }
-        
-        # Add the note to the player's notes
-        self.player_data["notes"].append(note)
-    
     def show_inventory_popup(self):
         """Show a popup window with the player's inventory, using item dictionaries"""
         popup = tk.Toplevel(self.root)
@@ -1538,7 +1454,7 @@ class SpaceStationGame:
         """Show a popup window with the player's stock holdings"""
         popup = tk.Toplevel(self.root)
         popup.title("Stock Holdings")
-        popup.geometry("400x400")
+        popup.geometry("450x420")
         popup.configure(bg="black")
         
         # Ensure this window stays on top
@@ -1547,8 +1463,8 @@ class SpaceStationGame:
         
         # Center the popup window
         popup.update_idletasks()
-        width = 400
-        height = 400
+        width = 450
+        height = 420
         x = (popup.winfo_screenwidth() // 2) - (width // 2)
         y = (popup.winfo_screenheight() // 2) - (height // 2)
         popup.geometry(f"{width}x{height}+{x}+{y}")
@@ -1571,12 +1487,24 @@ class SpaceStationGame:
         holdings_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.config(command=holdings_list.yview)
         
-        # Add holdings to the listbox
-        if not self.player_data.get('stock_holdings', {}):
+        # Add holdings to the listbox - values and P&L are kept current by the portfolio
+        portfolio = self.portfolio
+        holdings = portfolio.holdings()
+        if not holdings:
             holdings_list.insert(tk.END, "You don't own any company stocks.")
         else:
-            for company, shares in self.player_data['stock_holdings'].items():
+            for company, shares in holdings.items():
                 holdings_list.insert(tk.END, f"{company}: {shares} shares")
+                holdings_list.insert(tk.END, f"    {portfolio.market_values.get(company, 0):.2f} cr "
+                                             f"({portfolio.allocation(company) * 100:.1f}%), "
+                                             f"P&L {portfolio.unrealized_for(company):+.2f} cr")
+        
+        # Portfolio totals
+        totals_label = tk.Label(popup, text=f"Value: {portfolio.total_market_value:.2f} cr   "
+                                            f"Unrealized: {portfolio.unrealized_pnl:+.2f} cr   "
+                                            f"Realized: {portfolio.realized_pnl:+.2f} cr",
+                                font=("Arial", 10), bg="black", fg="white")
+        totals_label.pack()
         
         # Mouse wheel binding for scrolling
         def _on_holdings_mousewheel(event):
@@ -1650,17 +1578,8 @@ class SpaceStationGame:
     
     def save_game_and_close(self, save_window):
         """Save the game and close the save dialog"""
-        # Update market data before saving
-        self.update_market_data()
-        
-        # Create saves directory if it doesn't exist
-        saves_path = os.path.join(self.base_path, "game", "saves")
-        os.makedirs(saves_path, exist_ok=True)
-        
-        # Save game to JSON file
-        filename = os.path.join(saves_path, f"{self.player_data['name']}.json")
-        with open(filename, "w") as f:
-            json.dump(self.player_data, f, indent=4)
+        # Written in the background - the game carries on while the file is saved
+        self.save_game()
         
         # Close the save dialog without showing a confirmation
         save_window.destroy()
@@ -1849,6 +1768,7 @@ class SpaceStationGame:
         
         if not has_item:
             player_inventory.append(item_def) # Add the dictionary
+            self.save_tracker.mark_dirty("inventory")
             messagebox.showinfo("Item Taken", f"You took the {item_name}.")
             # Add note
             self.add_note(f"Took {item_name} ({item_id}) from locker.")
@@ -1876,6 +1796,7 @@ class SpaceStationGame:
 
         # Remove item from player data by index
         del player_inventory[item_index]
+        self.save_tracker.mark_dirty("inventory")
         messagebox.showinfo("Item Stored", f"You placed the {item_name} in the storage locker.")
         
         # Add note
@@ -1914,7 +1835,11 @@ class SpaceStationGame:
         
         # Pass the current market state to the stock market window
         market = StockMarket(self.root, self.player_data, self.companies, 
-                           self.stock_cycle_number, self.stock_day_number, self.update_player_data)
+                           self.stock_cycle_number, self.stock_day_number, self.update_player_data,
+                           tick_seconds=self.market_tick_seconds, market_feed=self.market_feed,
+                           last_update_time=self.last_update_time, trade_ledger=self.trade_ledger,
+                           portfolio=self.portfolio, order_book=self.order_book,
+                           market_snapshot=self.market_snapshot)
     
     def update_player_data(self, updated_data):
         # Update player data when returning from stock market
@@ -1937,6 +1862,7 @@ class SpaceStationGame:
                     self.add_note(f"Sold {transaction['shares']} shares of {transaction['company']} at {transaction['price']:.2f} cr/share (Total: {transaction['total']:.2f} cr){profit_text}")
         
         self.player_data = updated_data
+        self.save_tracker.mark_dirty("player", "stock_market")
         
         # Update owned shares in the companies list
         if "stock_holdings" in updated_data:
@@ -1964,6 +1890,9 @@ class SpaceStationGame:
         return f"{x},{y}"
     
     def show_hallway(self):
+        # The location may have changed on the way here
+        self.save_tracker.mark_dirty("player")
+        
         # Clear the window
         for widget in self.root.winfo_children():
             widget.destroy()
@@ -2296,7 +2225,7 @@ class SpaceStationGame:
                 self.player_data["location"]["y"] = y - (1 if direction == "east" else -1 if direction == "west" else 0)
         
         # Random event check (40% chance) when moving through hallways
-        if random.random() < 0.20:  # Changed from 0.40 to 0.20 (20% chance)
+        if self.rng_streams.stream("events").random() < 0.20:  # Changed from 0.40 to 0.20 (20% chance)
             self.trigger_random_event()
         
         # Refresh hallway view
@@ -2305,9 +2234,10 @@ class SpaceStationGame:
     def trigger_random_event(self):
         """Trigger a random event"""
         # List of possible events with good, bad, and neutral outcomes
+        rng = self.rng_streams.stream("events")
         events = [
             # Good events
-            {"type": "good", "title": "Found Credits", "desc": "You found some credits on the floor!", "effect": lambda: self.add_credits(random.randint(50, 200))},
+            {"type": "good", "title": "Found Credits", "desc": "You found some credits on the floor!", "effect": lambda: self.add_credits(rng.randint(50, 200))},
             {"type": "good", "title": "Supply Crate", "desc": "You found an unsealed supply crate with useful items.", "effect": lambda: self.add_random_item()},
             {"type": "good", "title": "Market Tip", "desc": "You overheard a reliable market tip.", "effect": lambda: self.add_market_knowledge()},
             
@@ -2319,7 +2249,7 @@ class SpaceStationGame:
             # Bad events - now all include blunt damage
             {"type": "bad", "title": "Lost Credits", "desc": "You dropped some credits and couldn't find them all. You bumped your head looking for them.", 
               "effect": lambda: self.combined_effect([
-                  lambda: self.lose_credits(random.randint(10, 50)),
+                  lambda: self.lose_credits(rng.randint(10, 50)),
                   lambda: self.damage_limb("head", 5, 10)
               ])},
             {"type": "bad", "title": "Small Explosion", "desc": "A nearby conduit explodes, showering you with hot sparks and debris!", 
@@ -2347,7 +2277,7 @@ class SpaceStationGame:
         ]
         
         # Pick a random event
-        event = random.choice(events)
+        event = rng.choice(events)
         
         # Show the event
         messagebox.showinfo(event["title"], event["desc"])
@@ -2363,18 +2293,19 @@ class SpaceStationGame:
     def damage_random_limb(self, min_damage, max_damage):
         """Damage a random limb by a random amount"""
         # Get a random limb
-        limb = random.choice(list(self.player_data["limbs"].keys()))
+        limb = self.rng_streams.stream("damage").choice(list(self.player_data["limbs"].keys()))
         self.damage_limb(limb, min_damage, max_damage)
     
     def damage_limb(self, limb, min_damage, max_damage):
         """Damage a specific limb by a random amount within range (blunt damage)"""
         if limb in self.player_data["limbs"]:
             # Calculate damage
-            damage = random.randint(min_damage, max_damage)
+            damage = self.rng_streams.stream("damage").randint(min_damage, max_damage)
             
             # Apply damage
             original_health = self.player_data["limbs"][limb]
             self.player_data["limbs"][limb] = max(0, original_health - damage)
+            self.save_tracker.mark_dirty("player")
             
             # Format the limb name for display
             limb_name = limb.replace('_', ' ').title()
@@ -2388,6 +2319,7 @@ class SpaceStationGame:
     def add_credits(self, amount):
         """Add credits to the player"""
         self.player_data["credits"] += amount
+        self.save_tracker.mark_dirty("player")
         messagebox.showinfo("Credits Added", f"You gained {amount} credits.")
         
         # Add note about credits gained
@@ -2397,6 +2329,7 @@ class SpaceStationGame:
         """Subtract credits from the player (min 0)"""
         old_credits = self.player_data["credits"]
         self.player_data["credits"] = max(0, old_credits - amount)
+        self.save_tracker.mark_dirty("player")
         messagebox.showinfo("Credits Lost", f"You lost {amount} credits.")
         
         # Add note about credits lost
@@ -2415,10 +2348,28 @@ class SpaceStationGame:
         saves_path = os.path.join(self.base_path, "game", "saves") # Updated path
         os.makedirs(saves_path, exist_ok=True)
         
-        # Get save files
-        save_files = [f for f in os.listdir(saves_path) if f.endswith(".json")]
+        # List the saves as they'll be once queued writes finish
+        self.save_service.flush()
+        
+        # Sort order of the list
+        sort_frame = tk.Frame(self.root, bg="black")
+        sort_frame.pack()
+        tk.Label(sort_frame, text="Sort By:", font=("Arial", 12), bg="black", fg="white").pack(side=tk.LEFT, padx=5)
+        sort_var = tk.StringVar(value=self.load_sort_order)
+        sort_dropdown = ttk.Combobox(sort_frame, textvariable=sort_var, values=list(SORT_ORDERS),
+                                     state="readonly", width=14)
+        sort_dropdown.pack(side=tk.LEFT, padx=5)
+        
+        def change_sort_order(event):
+            self.load_sort_order = sort_var.get()
+            self.show_load_game()
+        
+        sort_dropdown.bind("<<ComboboxSelected>>", change_sort_order)
         
-        if not save_files:
+        # Summaries of the saves from the save index - the save files themselves aren't opened
+        save_entries = self.save_service.index.entries(self.load_sort_order)
+        
+        if not save_entries:
             no_saves_label = tk.Label(self.root, text="No saved games found.", font=("Arial", 14), bg="black", fg="white")
             no_saves_label.pack(pady=20)
         else:
@@ -2445,11 +2396,13 @@ class SpaceStationGame:
             canvas_frame = canvas.create_window((0, 0), window=saves_frame, anchor="nw")
             
             # Add save buttons to the saves_frame
-            for save_file in save_files:
-                # Strip .json extension for display and passing to load function
-                player_name = save_file[:-5]
-                
-                save_btn = tk.Button(saves_frame, text=player_name, font=("Arial", 14), width=20,
+            for entry in save_entries:
+                player_name = entry["name"]
+                location = entry["location"]
+                details = (f"{entry['job'] or 'Unknown job'}  |  {entry['credits']:,.0f} credits  |  "
+                           f"Location ({location['x']}, {location['y']})\n"
+                           f"Last played {entry['last_played'].replace('T', ' ')}  |  {entry['size'] / 1024:,.0f} KiB")
+                save_btn = tk.Button(saves_frame, text=f"{player_name}\n{details}", font=("Arial", 12), width=50,
                                      command=lambda name=player_name: self.load_game_file(name)) # Use load_game_file with base name
                 save_btn.pack(pady=5)
             
@@ -2498,18 +2451,28 @@ class SpaceStationGame:
     
     def load_game_file(self, filename):
         """Load a saved game from file"""
-        # Remove .json extension if present (though it should be passed without it now)
-        if filename.endswith(".json"):
-            filename = filename[:-5]
+        # Remove the extension if present (though it should be passed without it now)
+        for extension in (SAVE_EXTENSION, LEGACY_SAVE_EXTENSION):
+            if filename.endswith(extension):
+                filename = filename[:-len(extension)]
             
-        # Load game data from the correct path
-        file_path = os.path.join(self.base_path, "game", "saves", filename + ".json") # Updated path
+        # Never read a save the writer thread is still replacing
+        self.save_service.flush()
+        
+        # Load game data from the compact save, or the JSON save of an older version
+        file_path = save_file_path(os.path.join(self.base_path, "game", "saves"), filename)
         try:
-            with open(file_path, "r") as f:
-                self.player_data = json.load(f)
-                
-            # Update company data from saved game
-            self.load_market_data()
+            # Cold sections like the notes stay compressed until they're first used
+            self.player_data = read_save_file(file_path, lazy=True)
+            
+            # Bring it up to date with the autosaves written since, and number new passes after them
+            folder = autosave_folder(self.save_service.saves_path, filename)
+            last_pass = apply_passes(self.player_data, folder)
+            self.save_tracker = SaveTracker(max(last_pass, self.last_autosave_pass(filename)))
+            self.station_crew = self.player_data.get("station_crew", self.station_crew)
+            
+            # Rebuild the trades, orders and random streams, then catch the market up
+            self.load_market_state()
             
             # Start the market thread
             self.start_market_thread()
@@ -2539,7 +2502,7 @@ class SpaceStationGame:
             
             return True
         except FileNotFoundError:
-            messagebox.showerror("Error", f"Save file not found: {filename}.json")
+            messagebox.showerror("Error", f"Save file not found: {os.path.basename(file_path)}")
             self.show_load_game() # Return to load screen
             return False
         except Exception as e:
@@ -2550,11 +2513,12 @@ class SpaceStationGame:
     def add_burn_damage(self, min_damage, max_damage):
         """Apply burn damage to the player"""
         # Calculate damage
-        damage = random.randint(min_damage, max_damage)
+        damage = self.rng_streams.stream("damage").randint(min_damage, max_damage)
         
         # Apply damage
         original_damage = self.player_data["damage"].get("burn", 0)
         self.player_data["damage"]["burn"] = min(100, original_damage + damage)
+        self.save_tracker.mark_dirty("player")
         
         # Show damage message
         messagebox.showinfo("Burn Damage", f"You suffered {damage}% burn damage! Total burn damage: {self.player_data['damage']['burn']}%.")
@@ -2565,11 +2529,12 @@ class SpaceStationGame:
     def add_poison_damage(self, min_damage, max_damage):
         """Apply poison damage to the player"""
         # Calculate damage
-        damage = random.randint(min_damage, max_damage)
+        damage = self.rng_streams.stream("damage").randint(min_damage, max_damage)
         
         # Apply damage
         original_damage = self.player_data["damage"].get("poison", 0)
         self.player_data["damage"]["poison"] = min(100, original_damage + damage)
+        self.save_tracker.mark_dirty("player")
         
         # Show damage message
         messagebox.showinfo("Poison Damage", f"You suffered {damage}% poison damage! Total poison damage: {self.player_data['damage']['poison']}%.")
@@ -2597,11 +2562,12 @@ class SpaceStationGame:
         elif room_name == "Engineering":
             room_instance = Engineering(self.root, self.player_data, self.station_crew, self.update_player_data_from_room)
         elif room_name == "Bar":
-            room_instance = Bar(self.root, self.player_data, self.station_crew, self.update_player_data_from_room)
+            room_instance = Bar(self.root, self.player_data, self.station_crew, self.update_player_data_from_room,
+                                self.rng_streams.stream("rooms"))
         elif room_name == "Botany":
             room_instance = Botany(self.root, self.player_data, self.station_crew, self.update_player_data_from_room)
         elif room_name == "Quarters": # Quarters might not need crew data, adjust if needed
-            room_instance = Quarters(self.root, self.player_data, self.update_player_data_from_room) # Assuming Quarters doesn't need crew
+            room_instance = Quarters(self.root, self.player_data, self.update_player_data_from_room, self.save_player_data) # Assuming Quarters doesn't need crew
 
         # Clean up temporary data added to player_data after room is created
         if "ship_map" in self.player_data:
@@ -2640,11 +2606,12 @@ class SpaceStationGame:
         elif room_name == "Engineering":
             room_instance = Engineering(self.root, self.player_data, self.station_crew, self.update_player_data_from_room)
         elif room_name == "Bar":
-             room_instance = Bar(self.root, self.player_data, self.station_crew, self.update_player_data_from_room)
+             room_instance = Bar(self.root, self.player_data, self.station_crew, self.update_player_data_from_room,
+                                 self.rng_streams.stream("rooms"))
         elif room_name == "Botany":
              room_instance = Botany(self.root, self.player_data, self.station_crew, self.update_player_data_from_room)
         elif room_name == "Quarters": # Quarters might not need crew data
-             room_instance = Quarters(self.root, self.player_data, self.update_player_data_from_room)
+             room_instance = Quarters(self.root, self.player_data, self.update_player_data_from_room, self.save_player_data)
 
         # Clean up temporary data
         if "ship_map" in self.player_data:
@@ -2655,8 +2622,9 @@ class SpaceStationGame:
         # Remove temporary keys from player data if they exist
         ship_map_from_room = updated_player_data.pop("ship_map", None)
 
-        # Update player data
+        # Update player data - rooms can change any part of it
         self.player_data = updated_player_data
+        self.save_tracker.mark_all()
 
         # Update station_crew ONLY if it was passed back
         if updated_station_crew is not None:
@@ -2802,20 +2770,12 @@ class SpaceStationGame:
 
     def save_and_exit(self):
         """Save the game and exit to main menu"""
-        # Update market data before saving
-        self.update_market_data()
-        
-        # Create saves directory if it doesn't exist
-        saves_path = os.path.join(self.base_path, "game", "saves")
-        os.makedirs(saves_path, exist_ok=True)
-        
-        # Save game to JSON file
-        filename = os.path.join(saves_path, f"{self.player_data['name']}.json")
-        with open(filename, "w") as f:
-            json.dump(self.player_data, f, indent=4)
+        # Written in the background - the game carries on while the file is saved
+        self.save_game()
         
         # Stop the battery timer before returning to menu
         self.stop_battery_timer()
+        self.stop_autosave_timer()
         
         # Return to main menu
         self.show_main_menu()
@@ -2830,7 +2790,7 @@ class SpaceStationGame:
             return
             
         # Choose a random item ID
-        item_id = random.choice(available_item_ids)
+        item_id = self.rng_streams.stream("items").choice(available_item_ids)
         
         # Get a copy of the item definition
         item_def = get_item_definition(item_id)
@@ -2844,6 +2804,7 @@ class SpaceStationGame:
             
         # Add the item dictionary to inventory
         self.player_data["inventory"].append(item_def)
+        self.save_tracker.mark_dirty("inventory")
         item_name = item_def.get("name", "an item")
         messagebox.showinfo("Item Found", f"You found {item_name} and added it to your inventory.")
         
@@ -2852,12 +2813,14 @@ class SpaceStationGame:
     
     def add_market_knowledge(self):
         """Add market knowledge to the player - reveals a tip about a stock"""
-        if not self.player_data["stock_market"]["companies"]:
+        state = self.market_snapshot.state
+        if not state.size:
             messagebox.showinfo("Market Tip", "You heard a stock tip, but don't understand the market yet.")
             return
             
-        company = random.choice(self.player_data["stock_market"]["companies"])
-        direction = random.choice(["rise", "fall"])
+        rng = self.rng_streams.stream("events")
+        company = state.company(rng.randrange(state.size))
+        direction = rng.choice(["rise", "fall"])
         
         message = ""
         if direction == "rise":
@@ -2881,7 +2844,7 @@ class SpaceStationGame:
             "Environmental controls are being recalibrated. Expect minor temperature fluctuations."
         ]
         
-        announcement = random.choice(announcements)
+        announcement = self.rng_streams.stream("events").choice(announcements)
         messagebox.showinfo("Station Announcement", f"The PA system crackles: '{announcement}'")
 
     def examine_item(self, inventory_list, parent_popup):
@@ -2938,6 +2901,7 @@ class SpaceStationGame:
         try:
             # Remove item from player data using the correct index
             del self.player_data['inventory'][item_inventory_index]
+            self.save_tracker.mark_dirty("inventory")
             
             # Refresh the popup to show changes correctly
             parent_popup.destroy()
@@ -3175,6 +3139,7 @@ class SpaceStationGame:
         try:
             # Remove item from player data using the correct index
             del self.player_data['inventory'][item_inventory_index]
+            self.save_tracker.mark_dirty("inventory")
             
             # Close the actions popup FIRST
             actions_popup.destroy()
@@ -0,0 +1,257 @@
+"""
+Headless benchmarks for the stock market subsystem.
+
+Builds the game's MarketSession (engine, sector model, candles, indicators,
+snapshot, portfolio, order book and trade ledger) without tkinter, and
+times the same methods SpaceStationGame calls:
+
+    run_stock_market    - one market tick as run by the market thread
+    update_market_data  - publishing the market state after a tick
+    process_pending_trades - logging a window's pending trades in the ledger
+    save_snapshot       - prepare_save and copying player data for the save writer (the part the UI waits for)
+    save / load         - writing a save through the save writer and loading it back (the trade journal is opened, not read)
+    trade_history       - reading the trade journal when the trade history is first needed
+
+Every benchmark runs for each combination of company count, history depth
+and trade-log length, and the results are written as JSON so runs from
+different versions can be compared. Run from the Code folder:
+
+    python -m game.market_bench --companies 15,1000 --history-depth 500,10000 --trades 0,100000 \\
+        --output bench.json
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+import numpy as np
+
+from game.price_history import DEFAULT_HISTORY_DEPTH, SHALLOW_HISTORY_DEPTH
+from game.market_sim import company_names
+from game.market_session import MarketSession
+from game.trade_ledger import TradeLedger, SIDES
+from game.save_service import SaveService, snapshot_player_data
+from game.save_format import read_save_file
+
+# Default parameter grid - small enough to finish in well under a minute
+DEFAULT_COMPANIES = [15, 500]
+DEFAULT_HISTORY_DEPTHS = [SHALLOW_HISTORY_DEPTH, DEFAULT_HISTORY_DEPTH]
+DEFAULT_TRADES = [0, 10000]
+
+# Times each benchmark is repeated; the median is reported
+DEFAULT_REPEAT = 5
+
+# Trades in the pending_trades dict of the process_pending_trades benchmark
+PENDING_TRADES = 10
+
+# Version of the results file layout
+RESULTS_VERSION = 1
+
+
+def parse_sizes(text):
+    """Comma-separated integers from the command line"""
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+class MarketBench(MarketSession):
+    """A game-sized market with filled price history and trade log, ready to be timed.
+
+    The benchmarks call the game's own MarketSession methods, so they time
+    exactly the code SpaceStationGame runs.
+    """
+
+    def __init__(self, company_count, history_depth, trades, seed=0, folder=None):
+        # Save files go in a scratch folder that's removed by close()
+        folder = folder or tempfile.mkdtemp(prefix="market_bench_")
+        MarketSession.__init__(self, folder, seed, history_depth, company_names(company_count))
+        self.folder = folder
+        self.company_count = company_count
+        self.trades = trades
+
+        # Saves are written by the game's save writer thread
+        self.save_service = SaveService(folder)
+        self.save_path = self.save_service.path_for("bench")
+
+        # Holdings in every tenth company and a standing order on each of them
+        self.player_data = {"name": "bench", "credits": 1000.0, "stock_holdings": {}, "stock_market": {}}
+        for company in self.companies[::10]:
+            self.portfolio.buy(company.name, 10, company.current_value)
+            self.player_data["stock_holdings"][company.name] = 10
+            company.owned_shares = 10
+            self.order_book.place(company.name, "sell", "limit", 5, company.current_value * 10)
+
+        # Fill the whole price history, as in a long-running save, by catching up the cycles it covers
+        tick = datetime.timedelta(seconds=self.market_tick_seconds)
+        self.last_update_time = datetime.datetime.now() - tick * history_depth
+        self.catch_up_market()
+
+        # Trade log of the requested length, already in the journal
+        self.trade_ledger = TradeLedger(journal_path=self.get_trade_journal_path())
+        self.trade_ledger.reset_journal()
+        names = list(self.companies_by_name)
+        for i in range(trades):
+            day, cycle = divmod(i, 5)
+            self.trade_ledger.record(day + 1, cycle + 1, SIDES[i % 2], names[i % len(names)], 1, 100.0, 100.0)
+        self.trade_ledger.flush()
+
+    def close(self):
+        """Stop the save writer and remove the scratch folder"""
+        self.save_service.stop()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    # The game calls being timed
+
+    def tick(self):
+        """One tick as the market thread runs it, on the next cycle boundary"""
+        self.run_stock_market(self.last_update_time + datetime.timedelta(seconds=self.market_tick_seconds))
+
+    def publish(self):
+        """Publish the market state as a tick does"""
+        with self.market_lock:
+            self.update_market_data()
+
+    def queue_pending_trades(self):
+        """Leave a pending_trades dict like a closed market window does"""
+        names = list(self.companies_by_name)[:PENDING_TRADES]
+        self.player_data["stock_market"]["pending_trades"] = {
+            "bought": {name: {"amount": 1, "price": 100.0, "total": 100.0} for name in names},
+            "sold": {}
+        }
+
+    def save_snapshot(self):
+        """Bring the save data up to date and snapshot it, as save_game does before handing it to the writer"""
+        self.prepare_save()
+        return snapshot_player_data(self.player_data)
+
+    def save(self):
+        """Save as the game does and wait for the writer thread to put it on disk"""
+        self.prepare_save()
+        self.save_service.save(self.player_data)
+        self.save_service.flush()
+
+    def load(self):
+        """Read the save file and rebuild the market and trade history, as load_game_file does"""
+        self.player_data = read_save_file(self.save_path, lazy=True)
+        self.load_market_state()
+
+    def trade_history(self):
+        """Open the trade journal as a load does, then index it like the first look at the trade history"""
+        self.load_trade_ledger()
+        return len(self.trade_ledger)
+
+    def save_size(self):
+        """Bytes on disk for the save file plus its trade journal"""
+        paths = (self.save_path, self.get_trade_journal_path())
+        return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+def time_calls(function, repeat, setup=None):
+    """Seconds taken by each of `repeat` calls (setup runs untimed before each call and feeds it)"""
+    durations = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        if setup:
+            function(argument)
+        else:
+            function()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run_case(companies, history_depth, trades, repeat, seed=0):
+    """Every benchmark for one combination of parameters, as a list of result rows"""
+    bench = MarketBench(companies, history_depth, trades, seed=seed)
+    try:
+        cases = [
+            ("run_stock_market", bench.tick, None),
+            # Step the engine untimed so each capture publishes a new cycle
+            ("update_market_data", lambda _: bench.publish(), bench.market_engine.step),
+            ("process_pending_trades", lambda _: bench.process_pending_trades(), bench.queue_pending_trades),
+            ("save_snapshot", bench.save_snapshot, None),
+            ("save", bench.save, None),
+            ("load", bench.load, None),
+            ("trade_history", bench.trade_history, None)
+        ]
+
+        results = []
+        for name, function, setup in cases:
+            durations = time_calls(function, repeat, setup)
+            median = statistics.median(durations)
+            result = {
+                "benchmark": name,
+                "companies": companies,
+                "history_depth": history_depth,
+                "trades": trades,
+                "repeat": repeat,
+                "median_seconds": median,
+                "min_seconds": min(durations),
+                "max_seconds": max(durations),
+                "calls_per_second": 1.0 / median if median > 0 else None
+            }
+            if name == "save":
+                result["save_bytes"] = bench.save_size()
+            results.append(result)
+        return results
+    finally:
+        bench.close()
+
+
+def run_suite(companies, history_depths, trades, repeat=DEFAULT_REPEAT, seed=0, progress=None):
+    """Run every benchmark over the whole parameter grid and return the results document"""
+    results = []
+    for count, depth, trade_count in itertools.product(companies, history_depths, trades):
+        if progress:
+            progress(count, depth, trade_count)
+        results.extend(run_case(count, depth, trade_count, repeat, seed))
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the stock market subsystem without a display")
+    parser.add_argument("--companies", type=parse_sizes, default=DEFAULT_COMPANIES,
+                        help="comma-separated numbers of listed companies")
+    parser.add_argument("--history-depth", type=parse_sizes, default=DEFAULT_HISTORY_DEPTHS,
+                        help="comma-separated price history depths (cycles kept per company)")
+    parser.add_argument("--trades", type=parse_sizes, default=DEFAULT_TRADES,
+                        help="comma-separated trade log lengths")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="calls timed per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the simulated market")
+    parser.add_argument("--output", default="market_bench.json", help="JSON file the results are written to")
+    args = parser.parse_args(argv)
+
+    def progress(companies, depth, trades):
+        print(f"Benchmarking {companies} companies, {depth} cycles of history, {trades} trades...")
+
+    report = run_suite(args.companies, args.history_depth, args.trades, args.repeat, args.seed, progress)
+
+    for result in report["results"]:
+        line = (f"{result['benchmark']:<24} {result['companies']:>7} {result['history_depth']:>7} "
+                f"{result['trades']:>8}  {result['median_seconds'] * 1000:10.3f} ms")
+        if "save_bytes" in result:
+            line += f"  {result['save_bytes'] / 1024:,.0f} KiB"
+        print(line)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+    return report
+
+
+if __name__ == "__main__":
+    main()
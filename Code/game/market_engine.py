@@ -0,0 +1,264 @@
+import numpy as np
+
+from game.price_history import HistoryBlock, PriceHistory, DEFAULT_HISTORY_DEPTH
+from game.indicators import REPLAY_CYCLES
+
+# Largest relative price move per cycle (+/- 10%)
+MAX_CHANGE = 0.10
+
+# Stock prices never drop below this floor
+MIN_PRICE = 1.0
+
+# Market cycles in one trading day
+CYCLES_PER_DAY = 5
+
+# Companies listed on the station stock market
+COMPANY_NAMES = [
+    "TechCorp", "GlobalBank", "HealthCare Plus", "EnergyCo", "FoodChain",
+    "AutoMakers", "RetailGiant", "PharmaTech", "RealEstate Co", "MediaGroup",
+    "Aerospace Inc", "TechStart", "GreenEnergy", "DigitalBank", "SmartHome"
+]
+
+
+def advance_cycle(cycle_number, day_number, cycles=1):
+    """Return the (cycle, day) reached after the given number of market cycles"""
+    # Work with a zero-based cycle index so several days can be skipped at once
+    index = (cycle_number - 1) + cycles
+    return index % CYCLES_PER_DAY + 1, day_number + index // CYCLES_PER_DAY
+
+
+class MarketEngine:
+    """Holds every company's prices in contiguous arrays and advances them in one vectorized step"""
+
+    def __init__(self, capacity=16, rng=None, history_depth=DEFAULT_HISTORY_DEPTH, history_dtype=np.float64,
+                 sector_model=None, candles=None, indicators=None):
+        # Random generator used for the vectorized price moves
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        # Optional SectorModel for correlated moves - without one, companies move independently
+        self.sector_model = sector_model
+
+        # Optional CandlePyramid kept up to date with every cycle
+        self.candles = candles
+
+        # Optional IndicatorEngine kept up to date with every cycle
+        self.indicators = indicators
+
+        # Number of rows in use and the companies viewing them
+        self.size = 0
+        self.companies = []
+
+        # Market cycles generated so far
+        self.ticks = 0
+
+        # Price columns - one row per company
+        capacity = max(1, capacity)
+        self.current_values = np.zeros(capacity, dtype=np.float64)
+        self.previous_values = np.zeros(capacity, dtype=np.float64)
+        self.owned_shares = np.zeros(capacity, dtype=np.int64)
+
+        # Price history - a fixed-depth ring buffer per company
+        self.history = HistoryBlock(capacity, history_depth, history_dtype)
+
+    @property
+    def prices(self):
+        """Current price of every company as a view (no copy)"""
+        return self.current_values[:self.size]
+
+    def add_company(self, name, starting_value, sector=None):
+        """Create a new company backed by a row of this engine"""
+        return Company(name, starting_value, engine=self, sector=sector)
+
+    def _register(self, company, starting_value, sector=None):
+        """Reserve a row for a company and return its index"""
+        # Grow the arrays if we're out of rows
+        if self.size == len(self.current_values):
+            self._grow(len(self.current_values) * 2)
+
+        index = self.size
+        self.size += 1
+        self.companies.append(company)
+
+        # Initialize the row
+        self.current_values[index] = starting_value
+        self.previous_values[index] = starting_value
+        self.owned_shares[index] = 0
+        self.history.set_row(index, [starting_value])
+
+        # Place the company in a sector
+        if self.sector_model is not None:
+            self.sector_model.assign(index, sector or self.sector_model.default_sector(company.name, index))
+        return index
+
+    def _grow(self, capacity):
+        """Reallocate every column with room for more companies"""
+        def grow(array):
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+
+        self.current_values = grow(self.current_values)
+        self.previous_values = grow(self.previous_values)
+        self.owned_shares = grow(self.owned_shares)
+        self.history.grow(capacity)
+        if self.candles is not None:
+            self.candles.grow(capacity)
+        if self.indicators is not None:
+            self.indicators.grow(capacity)
+
+    def step(self):
+        """Advance every company by one cycle"""
+        n = self.size
+        if n == 0:
+            return
+        self.ticks += 1
+
+        current = self.current_values[:n]
+
+        # Store the previous values for reference
+        self.previous_values[:n] = current
+
+        # Change of at most +/- 10% for every company at once
+        changes = self._draw_changes(n)
+
+        # Apply the changes in place, keeping prices above the floor
+        np.multiply(current, 1.0 + changes, out=current)
+        np.maximum(current, MIN_PRICE, out=current)
+
+        # Add to price history
+        self.history.append(current)
+
+        # Sector index levels from the same prices
+        if self.sector_model is not None:
+            self.sector_model.record_indexes(current)
+
+        # Day/week/month candles
+        if self.candles is not None:
+            self.candles.append(current)
+
+        # Moving averages, volatility, RSI and drawdown
+        if self.indicators is not None:
+            self.indicators.append(current)
+
+    def _draw_changes(self, n, steps=None):
+        """Relative price moves for the first n companies, shape (n,) or (steps, n)"""
+        if self.sector_model is not None:
+            # Correlated within and across sectors
+            return self.sector_model.draw(self.rng, n, steps)
+
+        # Independent uniform moves between -10% and +10%
+        return self.rng.uniform(-MAX_CHANGE, MAX_CHANGE, n if steps is None else (steps, n))
+
+    def fast_forward(self, cycles, chunk_size=4096, on_chunk=None):
+        """Advance every company by many cycles in one batched pass.
+
+        Works in log space, where the price floor turns each company's path
+        into a reflected random walk that can be solved with cumulative sums
+        (W_t = S_t + max(W_0, -min S_s)) instead of a Python loop per cycle.
+        on_chunk(first_cycle, prices), if given, sees every chunk's prices
+        (one row per cycle, first_cycle counted from 0) as they're generated.
+        """
+        n = self.size
+        if n == 0 or cycles <= 0:
+            return
+        self.ticks += cycles
+
+        depth = self.history.depth
+        log_floor = np.log(MIN_PRICE)
+
+        # Distance of every price above the floor in log space
+        walk = np.log(self.current_values[:n]) - log_floor
+        previous = self.current_values[:n].copy()
+
+        remaining = cycles
+        while remaining > 0:
+            steps = min(chunk_size, remaining)
+
+            # Change of at most +/- 10% for every company and cycle
+            changes = self._draw_changes(n, steps)
+            totals = np.cumsum(np.log1p(changes), axis=0)
+
+            # Reflect the walk off the floor and convert back to prices
+            lowest = np.minimum.accumulate(totals, axis=0)
+            path = totals + np.maximum(walk, -lowest)
+            prices = np.maximum(np.exp(path + log_floor), MIN_PRICE)
+            if on_chunk is not None:
+                on_chunk(cycles - remaining, prices)
+
+            # Only the cycles that still fit in the ring buffer need to be kept
+            if remaining - steps < depth:
+                keep = min(steps, depth - (remaining - steps))
+                self.history.extend(prices[-keep:])
+                if self.sector_model is not None:
+                    self.sector_model.record_indexes(prices[-keep:])
+
+            # Candles need every cycle, not just the ones kept in the history
+            if self.candles is not None:
+                self.candles.extend(prices)
+
+            # Indicators only replay the cycles that still affect them
+            if self.indicators is not None:
+                self.indicators.extend(prices, replay=REPLAY_CYCLES - (remaining - steps))
+
+            previous = prices[-2] if steps > 1 else self.current_values[:n].copy()
+            self.current_values[:n] = prices[-1]
+            walk = path[-1]
+            remaining -= steps
+
+        # Rounding in log space can land a hair under the floor
+        np.maximum(self.current_values[:n], MIN_PRICE, out=self.current_values[:n])
+        self.previous_values[:n] = np.maximum(previous, MIN_PRICE)
+
+
+class Company:
+    """A listed company - a thin view over one row of a MarketEngine"""
+
+    def __init__(self, name, starting_value, engine=None, sector=None):
+        # Standalone companies get a private single-row engine
+        if engine is None:
+            engine = MarketEngine(capacity=1)
+
+        self.name = name
+        self.engine = engine
+        self.index = engine._register(self, starting_value, sector)
+        self._price_history = PriceHistory(block=engine.history, row=self.index)
+
+    @property
+    def current_value(self):
+        return float(self.engine.current_values[self.index])
+
+    @current_value.setter
+    def current_value(self, value):
+        self.engine.current_values[self.index] = value
+
+    @property
+    def previous_value(self):
+        return float(self.engine.previous_values[self.index])
+
+    @previous_value.setter
+    def previous_value(self, value):
+        self.engine.previous_values[self.index] = value
+
+    @property
+    def owned_shares(self):
+        return int(self.engine.owned_shares[self.index])
+
+    @owned_shares.setter
+    def owned_shares(self, value):
+        self.engine.owned_shares[self.index] = value
+
+    @property
+    def sector(self):
+        """Sector name, or None if the engine has no sector model"""
+        if self.engine.sector_model is None:
+            return None
+        return self.engine.sector_model.sector_name(self.index)
+
+    @property
+    def price_history(self):
+        return self._price_history
+
+    @price_history.setter
+    def price_history(self, prices):
+        # Keeps only the most recent cycles that fit in the ring buffer
+        self.engine.history.set_row(self.index, prices)
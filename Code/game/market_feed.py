@@ -0,0 +1,71 @@
+import itertools
+import queue
+
+# How often the Tk thread checks for new market ticks (milliseconds)
+FEED_DRAIN_INTERVAL_MS = 100
+
+
+class MarketFeed:
+    """Thread-safe publish/subscribe channel from the market thread to the Tk thread.
+
+    The market thread publishes a tick event after every cycle. A single
+    ``after`` hook on the Tk root drains the queue and hands the newest
+    event to every subscribed window, so windows only do work when the
+    market actually moved.
+    """
+
+    def __init__(self, root, drain_interval_ms=FEED_DRAIN_INTERVAL_MS):
+        self.root = root
+        self.drain_interval_ms = drain_interval_ms
+
+        self._queue = queue.SimpleQueue()
+        self._subscribers = {}
+        self._tokens = itertools.count(1)
+        self._after_id = None
+
+    def publish(self, event):
+        """Queue a tick event - safe to call from any thread"""
+        self._queue.put(event)
+
+    def subscribe(self, callback):
+        """Call callback(event) on the Tk thread after every tick; returns a token for unsubscribe"""
+        token = next(self._tokens)
+        self._subscribers[token] = callback
+        return token
+
+    def unsubscribe(self, token):
+        """Stop delivering ticks to a subscriber"""
+        self._subscribers.pop(token, None)
+
+    def start(self):
+        """Start draining the queue on the Tk thread"""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.drain_interval_ms, self._drain)
+
+    def stop(self):
+        """Stop draining the queue"""
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass  # Root already destroyed
+            self._after_id = None
+
+    def _drain(self):
+        """Deliver the newest queued tick to every subscriber"""
+        latest = None
+        while True:
+            try:
+                latest = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+        # Ticks that queued up behind each other collapse into the newest one
+        if latest is not None:
+            for callback in list(self._subscribers.values()):
+                try:
+                    callback(latest)
+                except Exception as e:
+                    print(f"Error delivering market tick: {e}")
+
+        self._after_id = self.root.after(self.drain_interval_ms, self._drain)
@@ -0,0 +1,86 @@
+import datetime
+import threading
+
+# Default length of one market cycle in seconds
+MARKET_TICK_SECONDS = 60
+
+
+class MarketScheduler:
+    """Fires a callback on every market cycle boundary.
+
+    Instead of polling, the worker thread sleeps on a condition variable
+    until the next deadline, so ticks land exactly on the cycle boundary
+    and stop() wakes the thread immediately.
+    """
+
+    def __init__(self, tick_callback, tick_seconds=MARKET_TICK_SECONDS, last_tick_time=None):
+        if tick_seconds <= 0:
+            raise ValueError("Tick length must be positive")
+
+        # Called with the scheduled tick time on the scheduler thread
+        self.tick_callback = tick_callback
+        self.tick_seconds = tick_seconds
+        self.last_tick_time = last_tick_time or datetime.datetime.now()
+
+        self._condition = threading.Condition()
+        self._stopped = False
+        self.thread = None
+
+    def next_tick_time(self):
+        """Wall-clock time of the next cycle boundary"""
+        return self.last_tick_time + datetime.timedelta(seconds=self.tick_seconds)
+
+    def seconds_until_next_tick(self):
+        """Seconds remaining until the next cycle boundary (never negative)"""
+        remaining = (self.next_tick_time() - datetime.datetime.now()).total_seconds()
+        return max(0.0, remaining)
+
+    def start(self):
+        """Start the scheduler thread"""
+        self._stopped = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self, timeout=None):
+        """Wake the scheduler thread and wait for it to exit"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+        # Never join from inside a tick callback
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def reschedule(self, last_tick_time):
+        """Move the cycle boundary, e.g. after loading a save"""
+        with self._condition:
+            self.last_tick_time = last_tick_time
+            self._condition.notify_all()
+
+    def run(self):
+        """Scheduler loop - sleep until each deadline, then fire the tick"""
+        with self._condition:
+            while not self._stopped:
+                now = datetime.datetime.now()
+                deadline = self.next_tick_time()
+                remaining = (deadline - now).total_seconds()
+
+                if remaining > 0:
+                    # Sleep until the deadline, a reschedule or a stop - whichever comes first
+                    self._condition.wait(remaining)
+                    continue
+
+                # Stay on the cycle boundary unless we've fallen more than a whole cycle behind
+                if (now - deadline).total_seconds() < self.tick_seconds:
+                    self.last_tick_time = deadline
+                else:
+                    self.last_tick_time = now
+                tick_time = self.last_tick_time
+
+                # Run the tick without holding the lock so stop() and reschedule() never block
+                self._condition.release()
+                try:
+                    self.tick_callback(tick_time)
+                finally:
+                    self._condition.acquire()
@@ -0,0 +1,415 @@
+import datetime
+import os
+import queue
+import threading
+
+from game.market_engine import MarketEngine, COMPANY_NAMES, advance_cycle
+from game.price_history import DEFAULT_HISTORY_DEPTH
+from game.market_scheduler import MARKET_TICK_SECONDS
+from game.trade_ledger import TradeLedger
+from game.portfolio import Portfolio
+from game.order_book import OrderBook
+from game.sector_model import SectorModel
+from game.rng_streams import RandomStreams
+from game.market_snapshot import MarketSnapshot
+from game.candles import CandlePyramid
+from game.indicators import IndicatorEngine
+
+
+class MarketSession:
+    """The game's stock market without any windows - ticks, trades, orders, saving and loading.
+
+    SpaceStationGame is a MarketSession, and the market benchmarks time
+    the same methods, so they always measure the code the game runs.
+    Subclasses set player_data and can override the hooks:
+        publish_market_tick() - let open windows know a tick happened
+        mark_dirty(*sections) - note changed save sections for the autosave
+    """
+
+    def __init__(self, saves_path, seed=None, history_depth=DEFAULT_HISTORY_DEPTH, company_names=COMPANY_NAMES,
+                 market_tick_seconds=MARKET_TICK_SECONDS):
+        # Folder holding the saves and trade journals
+        self.saves_path = saves_path
+
+        self.market_scheduler = None
+        self.market_tick_seconds = market_tick_seconds  # Length of one market cycle
+        self.last_update_time = datetime.datetime.now()
+
+        # Held while the market moves - only market writers take it, readers use the published snapshot
+        self.market_lock = threading.RLock()
+
+        # Standing orders triggered by the market thread, waiting to be filled on the Tk thread
+        self.order_fills = queue.SimpleQueue()
+
+        # Trade history - kept in memory until a character is created or loaded
+        self.trade_ledger = TradeLedger()
+
+        # Share lots, cost basis and P&L for the stock holdings
+        self.portfolio = Portfolio()
+
+        # Standing limit/stop orders, matched by the market thread every cycle
+        self.order_book = OrderBook()
+
+        # Seeded random streams, one per subsystem, so runs can be reproduced
+        self.rng_streams = RandomStreams(seed)
+
+        # Cycles of price history kept per company (and per sector index) - saves store all of it
+        self.history_depth = history_depth
+
+        # Every company is a row of one vectorized engine, with prices correlated through their sectors
+        self.market_engine = MarketEngine(capacity=len(company_names), rng=self.rng_streams.numpy("market"),
+                                          history_depth=self.history_depth,
+                                          sector_model=SectorModel(history_depth=self.history_depth),
+                                          indicators=IndicatorEngine(len(company_names)))
+        self.companies = [self.market_engine.add_company(name, self.rng_streams.stream("market").uniform(10, 1000))
+                          for name in company_names]
+        self.companies_by_name = {company.name: company for company in self.companies}
+
+        # Generate 5 cycles of history for each company
+        for _ in range(5):
+            self.market_engine.step()
+
+        self.stock_cycle_number = 1
+        self.stock_day_number = 1
+
+        # Day/week/month candles start on cycle 1 of day 1 with the prices the warm-up left
+        self.market_engine.candles = CandlePyramid(len(self.market_engine.current_values))
+        self.market_engine.candles.set_cycle(self.stock_cycle_number, self.stock_day_number)
+        self.market_engine.candles.append(self.market_engine.prices)
+
+        # Immutable market state published every tick - saves and windows read it without locking
+        self.market_snapshot = MarketSnapshot()
+        self.update_market_data()
+
+        self.player_data = {"stock_market": {}}
+
+    # Hooks
+
+    def publish_market_tick(self):
+        """Let listeners know a tick happened (nothing listens without windows)"""
+
+    def mark_dirty(self, *sections):
+        """Note that sections of the player data changed (nothing to note without an autosave)"""
+
+    # Ticks
+
+    def run_stock_market(self, tick_time):
+        """Advance the stock market by one cycle (called by the market scheduler on each cycle boundary)"""
+        with self.market_lock:
+            # Update all companies in a single vectorized step
+            self.market_engine.step()
+
+            # Update cycle and day numbers (cycles run 1-5, then the day advances)
+            self.stock_cycle_number, self.stock_day_number = advance_cycle(
+                self.stock_cycle_number, self.stock_day_number)
+
+            # Update last update time to the cycle boundary so ticks don't drift
+            self.last_update_time = tick_time
+
+            # Publish the new market state for the saver and UI windows
+            self.update_market_data()
+
+            # Reprice the held positions
+            self.portfolio.revalue(self.companies_by_name)
+
+            # Queue standing orders whose trigger price was reached
+            self.match_standing_orders()
+
+        # Let the game and open market windows know a tick happened
+        self.publish_market_tick()
+
+    def run_scheduled_tick(self, tick_time):
+        """Market scheduler callback - runs the tick unless the scheduler was moved while it waited for the lock"""
+        with self.market_lock:
+            # A load reschedules the scheduler while holding the lock, leaving the tick it already started stale
+            if self.market_scheduler is not None and tick_time != self.market_scheduler.last_tick_time:
+                return
+            self.run_stock_market(tick_time)
+
+    def update_market_data(self):
+        """Publish the current market state (call while holding the market lock)"""
+        # Unchanged columns are shared with the previous state and the history is append-only
+        self.market_snapshot.capture(self.market_engine, self.stock_cycle_number, self.stock_day_number,
+                                     self.last_update_time)
+
+    def catch_up_market(self):
+        """Fast-forward the market through every cycle missed since the last update"""
+        tick = datetime.timedelta(seconds=self.market_tick_seconds)
+        missed_cycles = int((datetime.datetime.now() - self.last_update_time) / tick)
+        if missed_cycles <= 0:
+            return 0
+
+        # Run the first missed cycle normally so pending trades land on the cycle they were queued for -
+        # logged here, since on_market_tick only sees the tick after the fast-forward below
+        self.run_stock_market(self.last_update_time + tick)
+        with self.market_lock:
+            self.process_pending_trades()
+
+        # Generate the rest in one batched pass
+        remaining = missed_cycles - 1
+        if remaining > 0:
+            with self.market_lock:
+                # Fill standing orders at the first skipped cycle that crossed their trigger
+                rows = {company.name: company.index for company in self.companies}
+                start_cycle, start_day = self.stock_cycle_number, self.stock_day_number
+
+                def fill_crossed_orders(first_cycle, prices):
+                    for order, cycle, price in self.order_book.match_path(rows, prices):
+                        fill_cycle, fill_day = advance_cycle(start_cycle, start_day, first_cycle + cycle + 1)
+                        self.order_fills.put((order, price, fill_day, fill_cycle))
+
+                self.market_engine.fast_forward(remaining, on_chunk=fill_crossed_orders)
+                self.stock_cycle_number, self.stock_day_number = advance_cycle(
+                    self.stock_cycle_number, self.stock_day_number, remaining)
+
+                # Stay on the cycle boundary so the next tick lands on schedule
+                self.last_update_time += tick * remaining
+                self.update_market_data()
+                self.portfolio.revalue(self.companies_by_name)
+                self.match_standing_orders()
+            self.publish_market_tick()
+
+        return missed_cycles
+
+    def get_time_until_next_update(self):
+        """Calculate the time in seconds until the next market update"""
+        now = datetime.datetime.now()
+        elapsed = (now - self.last_update_time).total_seconds()
+        remaining = max(0, self.market_tick_seconds - elapsed)
+        return int(remaining)
+
+    # Trades and orders
+
+    def add_note(self, text):
+        """Add a note to the player's notes"""
+        if "notes" not in self.player_data:
+            self.player_data["notes"] = []
+
+        # Create a new note with timestamp
+        note = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "text": text
+        }
+
+        # Add the note to the player's notes
+        self.player_data["notes"].append(note)
+        self.mark_dirty("notes")
+
+    def process_pending_trades(self):
+        """Process any pending trades in the player data"""
+        if "pending_trades" in self.player_data["stock_market"]:
+            pending = self.player_data["stock_market"]["pending_trades"]
+            if pending and (pending.get('bought') or pending.get('sold')):
+                # Log them on the current cycle - the ledger finds or creates the entry in O(1)
+                self.trade_ledger.merge_pending(self.stock_day_number, self.stock_cycle_number, pending)
+
+                # Clear pending trades
+                self.player_data["stock_market"]["pending_trades"] = {}
+
+    def match_standing_orders(self):
+        """Queue the limit/stop orders triggered by this cycle's prices, with the price they fill at"""
+        for order in self.order_book.match(self.companies_by_name):
+            self.order_fills.put((order, self.companies_by_name[order["company"]].current_value,
+                                  self.stock_day_number, self.stock_cycle_number))
+
+    def apply_order_fills(self):
+        """Execute queued standing orders on the Tk thread at the price of the cycle that triggered them"""
+        while True:
+            try:
+                order, price, day, cycle = self.order_fills.get_nowait()
+            except queue.Empty:
+                break
+
+            company = self.companies_by_name[order["company"]]
+            self.mark_dirty("player", "stock_market")
+            shares = order["shares"]
+            total = shares * price
+            holdings = self.player_data.setdefault("stock_holdings", {})
+            order_text = f"{order['type']} {order['side']} order for {shares} shares of {company.name}"
+
+            if order["side"] == "buy":
+                if total > self.player_data["credits"]:
+                    self.add_note(f"Cancelled {order_text}: not enough credits")
+                    continue
+                self.player_data["credits"] -= total
+                holdings[company.name] = holdings.get(company.name, 0) + shares
+                company.owned_shares += shares
+                self.portfolio.buy(company.name, shares, price)
+                self.trade_ledger.record(day, cycle, "bought", company.name, shares, price, total)
+                self.add_note(f"Filled {order_text} at {price:.2f} cr/share (Total: {total:.2f} cr)")
+            else:
+                if holdings.get(company.name, 0) < shares:
+                    self.add_note(f"Cancelled {order_text}: not enough shares")
+                    continue
+                self.player_data["credits"] += total
+                holdings[company.name] -= shares
+                if holdings[company.name] <= 0:
+                    del holdings[company.name]
+                company.owned_shares -= shares
+                profit = self.portfolio.sell(company.name, shares, price)
+                self.trade_ledger.record(day, cycle, "sold", company.name, shares, price, total)
+                self.add_note(f"Filled {order_text} at {price:.2f} cr/share (Total: {total:.2f} cr, P&L: {profit:+.2f} cr)")
+
+    # Saving
+
+    def prepare_save(self):
+        """Bring player data up to date with the market, trades, orders and random seed before writing a save"""
+        # Apply anything the last tick left for the Tk thread so the save matches the market state
+        self.process_pending_trades()
+        self.apply_order_fills()
+
+        # Read the last published market state - never waits for the market thread
+        self.save_market_columns()
+        self.save_trade_ledger()
+        self.save_portfolio()
+        self.save_order_book()
+        self.player_data["rng"] = self.rng_streams.to_dict()
+
+    def save_market_columns(self):
+        """Store the latest published market state in player data, re-encoding only the columns that changed"""
+        # The candles are copied under the lock, so they match the state published by the same tick
+        with self.market_lock:
+            state = self.market_snapshot.state
+            candles, candle_rows = self.market_engine.candles.to_dict(state.size)
+        columns = self.market_snapshot.to_columns(state)
+        columns["candles"] = candle_rows
+        market_data = self.player_data.setdefault("stock_market", {})
+        market_data.update({
+            "cycle_number": state.cycle_number,
+            "day_number": state.day_number,
+            "last_update_time": state.last_update_time.isoformat(),
+            "columns": columns,
+            "candles": candles
+        })
+        market_data.pop("companies", None)  # Per-company layout of older saves
+
+    def get_trade_journal_path(self):
+        """Path of the append-only trade journal for the current character"""
+        os.makedirs(self.saves_path, exist_ok=True)
+        return os.path.join(self.saves_path, f"{self.player_data['name']}.trades.jsonl")
+
+    def save_trade_ledger(self):
+        """Append new trades to the journal and record how many the save covers"""
+        self.trade_ledger.flush()
+        self.player_data["stock_market"]["trade_journal_records"] = self.trade_ledger.journal_records
+        self.player_data["stock_market"]["trade_journal_bytes"] = self.trade_ledger.journal_bytes
+
+    def save_order_book(self):
+        """Store the standing orders in player data"""
+        self.player_data["stock_market"]["orders"] = self.order_book.to_list()
+
+    def save_portfolio(self):
+        """Store the portfolio's lots and realized P&L in player data"""
+        self.player_data["portfolio"] = self.portfolio.to_dict()
+
+    # Loading
+
+    def load_market_state(self):
+        """Restore the trades, orders, random streams and market of the loaded player data"""
+        # The market thread matches orders and draws prices, so they're swapped under its lock
+        with self.market_lock:
+            # Rebuild the trade history from its journal
+            self.load_trade_ledger()
+            self.load_order_book()
+
+            # Restore the saved random streams before the market catches up
+            self.rng_streams = RandomStreams.from_dict(self.player_data.get("rng"))
+            self.market_engine.rng = self.rng_streams.numpy("market")
+
+            # Update company data from saved game
+            self.load_market_data()
+
+    def load_trade_ledger(self):
+        """Rebuild the trade ledger for the loaded character"""
+        market_data = self.player_data.setdefault("stock_market", {})
+        journal_path = self.get_trade_journal_path()
+
+        legacy_log = market_data.pop("trade_log", None)
+        if legacy_log is not None:
+            # Older saves kept the whole log inline - move it into the journal
+            self.trade_ledger = TradeLedger.from_trade_log(legacy_log, journal_path)
+        else:
+            # The journal is only read when the trade history is first needed
+            self.trade_ledger = TradeLedger.open_journal(journal_path, market_data.get("trade_journal_records"),
+                                                         market_data.get("trade_journal_bytes"))
+
+    def load_order_book(self):
+        """Restore the standing orders for the loaded character"""
+        self.order_book = OrderBook(self.player_data.get("stock_market", {}).get("orders", []))
+
+    def load_portfolio(self):
+        """Rebuild the portfolio for the loaded character (older saves get lots at today's prices)"""
+        self.portfolio = Portfolio.from_dict(self.player_data.get("portfolio"),
+                                             self.player_data.get("stock_holdings", {}),
+                                             self.companies_by_name)
+
+    def load_market_data(self):
+        """Load market data from player data"""
+        if "stock_market" in self.player_data:
+            market_data = self.player_data["stock_market"]
+
+            # Everything the market thread reads is replaced under the lock, so a tick never sees half a load
+            with self.market_lock:
+                # Load cycle and day numbers
+                self.stock_cycle_number = market_data.get("cycle_number", 0)
+                self.stock_day_number = market_data.get("day_number", 1)
+
+                # Load last update time
+                if "last_update_time" in market_data:
+                    try:
+                        self.last_update_time = datetime.datetime.fromisoformat(market_data["last_update_time"])
+                    except (ValueError, TypeError):
+                        # If there's an error parsing the time, use current time
+                        self.last_update_time = datetime.datetime.now()
+                else:
+                    self.last_update_time = datetime.datetime.now()
+
+                # Load company data - columnar saves, or one dict per company in older saves
+                columns = market_data.get("columns")
+                if columns and len(columns.get("names", [])) == len(self.companies):
+                    size = len(self.companies)
+                    self.market_engine.current_values[:size] = columns["current_values"]
+                    self.market_engine.previous_values[:size] = columns["previous_values"]
+                    for company, name, history in zip(self.companies, columns["names"], columns["price_history"]):
+                        company.name = name
+                        company.price_history = history
+                elif "companies" in market_data and len(market_data["companies"]) == len(self.companies):
+                    for i, company_data in enumerate(market_data["companies"]):
+                        self.companies[i].name = company_data["name"]
+                        self.companies[i].current_value = company_data["current_value"]
+                        self.companies[i].previous_value = company_data["previous_value"]
+                        self.companies[i].price_history = company_data["price_history"]
+                self.companies_by_name = {company.name: company for company in self.companies}
+
+                # Day/week/month candles - saved with the game, or rebuilt from the price history of older saves
+                size = self.market_engine.size
+                capacity = len(self.market_engine.current_values)
+                if columns and "candles" in market_data and "candles" in columns:
+                    self.market_engine.candles = CandlePyramid.from_dict(market_data["candles"], columns["candles"],
+                                                                         size, capacity)
+                else:
+                    self.market_engine.candles = CandlePyramid.from_history(
+                        self.market_engine.history, size, max(1, self.stock_cycle_number), self.stock_day_number)
+
+                # Indicators for the loaded price history
+                self.market_engine.indicators = IndicatorEngine.from_history(self.market_engine.history,
+                                                                             self.market_engine.size)
+
+                # Shares owned come from the holdings, which are only changed on the Tk thread
+                holdings = self.player_data.get("stock_holdings", {})
+                for company in self.companies:
+                    company.owned_shares = holdings.get(company.name, 0)
+
+                # Publish the loaded market
+                self.update_market_data()
+
+                # Rebuild share lots and P&L before catching up, so missed cycles revalue them and fill orders
+                self.load_portfolio()
+
+                # Generate the cycles that passed while the game was closed
+                self.catch_up_market()
+
+                # Move the running scheduler onto the loaded cycle boundary before letting it tick again -
+                # a tick it started before the load is then dropped by run_scheduled_tick
+                if self.market_scheduler:
+                    self.market_scheduler.reschedule(self.last_update_time)
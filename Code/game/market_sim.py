@@ -0,0 +1,153 @@
+"""
+Headless stock market simulation for backtests and benchmarks.
+
+Runs the same cycle/day logic as MarketSession.run_stock_market, but as
+fast as possible and without tkinter. Run from the Code folder:
+
+    python -m game.market_sim --days 1000 --companies 5000 --output prices.csv
+"""
+
+import argparse
+import csv
+import importlib
+import time
+import numpy as np
+
+from game.market_engine import MarketEngine, COMPANY_NAMES, CYCLES_PER_DAY, advance_cycle
+from game.sector_model import SectorModel
+
+# Default price history kept by the engine during a simulation
+SIMULATION_HISTORY_DEPTH = 50
+
+
+def company_names(count):
+    """The game's company names, padded with generated tickers for larger universes"""
+    names = COMPANY_NAMES[:count]
+    for i in range(len(names), count):
+        names.append(f"Ticker {i + 1:05d}")
+    return names
+
+
+class MarketSimulation:
+    """Advances a market engine cycle by cycle with no UI or wall clock"""
+
+    def __init__(self, companies=len(COMPANY_NAMES), seed=None, history_depth=None, strategy=None, sectors=True):
+        # Price paths are recorded separately, so the engine only needs a short history
+        rng = np.random.default_rng(seed)
+        history_depth = history_depth or SIMULATION_HISTORY_DEPTH
+
+        # Sector-correlated moves like the game, or independent moves for comparison
+        sector_model = SectorModel(history_depth=history_depth) if sectors else None
+        self.engine = MarketEngine(capacity=companies, rng=rng, history_depth=history_depth,
+                                   sector_model=sector_model)
+
+        # Same starting prices and warm-up as a new game
+        for name in company_names(companies):
+            self.engine.add_company(name, rng.uniform(10, 1000))
+        for _ in range(5):
+            self.engine.step()
+
+        self.cycle_number = 1
+        self.day_number = 1
+
+        # Optional callable run after every tick: strategy(simulation)
+        self.strategy = strategy
+
+        # Recorded price paths, one row per tick (filled by run)
+        self.price_paths = None
+
+    def tick(self):
+        """Advance the market one cycle"""
+        # Update all companies in a single vectorized step
+        self.engine.step()
+
+        # Update cycle and day numbers
+        self.cycle_number, self.day_number = advance_cycle(self.cycle_number, self.day_number)
+
+        # Let the strategy under test react to the new prices
+        if self.strategy:
+            self.strategy(self)
+
+    def run(self, days, record=True):
+        """Simulate the given number of days and return throughput statistics"""
+        ticks = days * CYCLES_PER_DAY
+
+        # Preallocate the price paths, including the starting prices
+        if record:
+            self.price_paths = np.empty((ticks + 1, self.engine.size), dtype=np.float64)
+            self.price_paths[0] = self.engine.prices
+
+        start = time.perf_counter()
+        for t in range(1, ticks + 1):
+            self.tick()
+            if record:
+                self.price_paths[t] = self.engine.prices
+        elapsed = time.perf_counter() - start
+
+        return {
+            "days": days,
+            "ticks": ticks,
+            "companies": self.engine.size,
+            "seconds": elapsed,
+            "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+            "company_updates_per_second": ticks * self.engine.size / elapsed if elapsed > 0 else float("inf")
+        }
+
+    def write_price_paths(self, path):
+        """Write the recorded price paths as .npy or CSV (one column per company)"""
+        if self.price_paths is None:
+            raise ValueError("No price paths recorded - run the simulation first")
+
+        if path.endswith(".npy"):
+            np.save(path, self.price_paths)
+            return
+
+        names = [company.name for company in self.engine.companies]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["tick", "day", "cycle"] + names)
+            cycle, day = 1, 1
+            for t, row in enumerate(self.price_paths):
+                writer.writerow([t, day, cycle] + [f"{price:.6f}" for price in row])
+                cycle, day = advance_cycle(cycle, day)
+
+
+def load_strategy(spec):
+    """Import a strategy given as 'module:function'"""
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ValueError("Strategy must be given as module:function")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the stock market headless and report throughput")
+    parser.add_argument("--days", type=int, default=100, help="simulated trading days (5 cycles each)")
+    parser.add_argument("--companies", type=int, default=len(COMPANY_NAMES), help="number of listed companies")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a reproducible run")
+    parser.add_argument("--history-depth", type=int, default=None, help="price history cycles kept per company")
+    parser.add_argument("--independent", action="store_true", help="move companies independently (no sectors)")
+    parser.add_argument("--strategy", default=None, help="strategy callable as module:function, run every tick")
+    parser.add_argument("--output", default=None, help="write price paths to this .csv or .npy file")
+    args = parser.parse_args(argv)
+
+    strategy = load_strategy(args.strategy) if args.strategy else None
+    simulation = MarketSimulation(args.companies, seed=args.seed,
+                                  history_depth=args.history_depth, strategy=strategy,
+                                  sectors=not args.independent)
+    stats = simulation.run(args.days, record=args.output is not None)
+
+    print(f"Simulated {stats['days']} days ({stats['ticks']} ticks) of {stats['companies']} companies "
+          f"in {stats['seconds']:.3f}s")
+    print(f"{stats['ticks_per_second']:.1f} ticks/second, "
+          f"{stats['company_updates_per_second']:.0f} company updates/second")
+
+    if args.output:
+        simulation.write_price_paths(args.output)
+        print(f"Price paths written to {args.output}")
+
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import numpy as np
+
+# Columns of the snapshot, in save order
+SNAPSHOT_COLUMNS = ("names", "current_values", "previous_values", "owned_shares", "price_history")
+
+# Rows per block of the price log - a block is never written again once it's full
+PRICE_LOG_BLOCK_ROWS = 256
+
+
+class PriceLog:
+    """Append-only log of every company's price, one row per cycle, stored in fixed-size blocks.
+
+    Rows are written once and never changed, so a published state only has
+    to remember which blocks existed and how many rows there were - the
+    market thread can keep appending without copying anything or waiting
+    for readers. Blocks that fall out of the history depth are dropped from
+    the log; states that still reference them keep them alive.
+    """
+
+    def __init__(self, columns, depth, block_rows=PRICE_LOG_BLOCK_ROWS):
+        self.columns = columns
+        self.depth = depth
+        self.block_rows = block_rows
+
+        self.blocks = ()  # Replaced, never modified, when blocks are added or dropped
+        self.base = 0  # Absolute row number of the first row of blocks[0]
+        self.rows = 0  # Absolute number of rows written
+        self.starts = np.zeros(columns, dtype=np.int64)  # First row that has data for each company
+
+    def append(self, values):
+        """Add one row of prices"""
+        offset = self.rows - self.base
+        if offset == len(self.blocks) * self.block_rows:
+            self.blocks = self.blocks + (np.empty((self.block_rows, self.columns)),)
+        block, row = divmod(offset, self.block_rows)
+        self.blocks[block][row] = values
+        self.rows += 1
+
+        # Drop the oldest block once every row in it is older than the history depth
+        if self.rows - self.depth >= self.base + self.block_rows:
+            self.blocks = self.blocks[1:]
+            self.base += self.block_rows
+
+    @classmethod
+    def from_history(cls, history, n, block_rows=PRICE_LOG_BLOCK_ROWS):
+        """Build a log holding the current contents of a HistoryBlock's first n rows"""
+        log = cls(n, history.depth, block_rows)
+        lengths = history.lengths[:n]
+        longest = int(lengths.max()) if n else 0
+
+        # Companies with a shorter history start later in the log
+        rows = np.full((longest, n), np.nan)
+        for company in range(n):
+            length = int(lengths[company])
+            if length:
+                rows[longest - length:, company] = history.window(company)
+            log.starts[company] = longest - length
+
+        for row in rows:
+            log.append(row)
+        return log
+
+    def view(self):
+        """Immutable description of the log as it is now"""
+        return (self.blocks, self.base, self.rows, self.starts.copy(), self.depth, self.block_rows)
+
+
+class MarketState:
+    """One published, read-only view of the market.
+
+    Never changed after it's published, so the saver and UI windows can
+    read it from any thread while the market thread builds the next one.
+    """
+
+    __slots__ = ("names", "current_values", "previous_values", "owned_shares", "history",
+                 "history_version", "cycle_number", "day_number", "last_update_time")
+
+    def __init__(self, names, current_values, previous_values, owned_shares, history, history_version,
+                 cycle_number, day_number, last_update_time):
+        self.names = names
+        self.current_values = current_values
+        self.previous_values = previous_values
+        self.owned_shares = owned_shares
+        self.history = history
+        self.history_version = history_version
+        self.cycle_number = cycle_number
+        self.day_number = day_number
+        self.last_update_time = last_update_time
+
+    @property
+    def size(self):
+        return len(self.names)
+
+    def company(self, index):
+        """One company's values as a dict, like the old per-company save entries"""
+        return {
+            "name": self.names[index],
+            "current_value": float(self.current_values[index]),
+            "previous_value": float(self.previous_values[index]),
+            "owned_shares": int(self.owned_shares[index])
+        }
+
+    def price_history(self, index, last=None):
+        """A company's price history, oldest first (at most the last `last` cycles)"""
+        blocks, base, rows, starts, depth, block_rows = self.history
+        first = max(int(starts[index]), rows - depth, base)
+        if last is not None:
+            first = max(first, rows - last)
+
+        # Gather the slices of each block the window covers
+        parts = []
+        row = first
+        while row < rows:
+            block, offset = divmod(row - base, block_rows)
+            end = min(block_rows, offset + rows - row)
+            parts.append(blocks[block][offset:end, index])
+            row += end - offset
+
+        if not parts:
+            return np.zeros(0)
+        return parts[0].copy() if len(parts) == 1 else np.concatenate(parts)
+
+
+class MarketSnapshot:
+    """Publishes a new immutable MarketState after every market tick.
+
+    Only the market writer calls capture. Columns that didn't change are
+    shared with the previous state, and the price history is the shared
+    append-only PriceLog, so publishing costs O(companies) per tick.
+    Readers just take ``snapshot.state`` - a single reference assignment,
+    so they always see a whole state and never block the tick.
+    """
+
+    def __init__(self):
+        self.state = None
+
+        # Price log and the engine counters it was last brought up to date with
+        self._log = None
+        self._ticks = -1
+        self._history_version = -1
+
+        # Column -> (array or version it was encoded from, encoded list)
+        self._encoded = {}
+
+    def _column(self, previous, values, dtype):
+        """Reuse the previous state's array if nothing changed, else take a read-only copy"""
+        if previous is not None and len(previous) == len(values) and np.array_equal(previous, values):
+            return previous
+        column = np.array(values, dtype=dtype)
+        column.flags.writeable = False
+        return column
+
+    def capture(self, engine, cycle_number, day_number, last_update_time):
+        """Publish the engine's current state - call from the thread that moves the market"""
+        n = engine.size
+        previous = self.state
+        history = engine.history
+
+        # One new cycle since the last capture just appends a row; anything else rebuilds the log
+        if self._log is None or self._log.columns != n:
+            self._log = PriceLog.from_history(history, n)
+        elif engine.ticks == self._ticks + 1 and history.version == self._history_version + 1:
+            self._log.append(engine.current_values[:n])
+        elif engine.ticks != self._ticks or history.version != self._history_version:
+            self._log = PriceLog.from_history(history, n)
+        self._ticks = engine.ticks
+        self._history_version = history.version
+
+        names = tuple(company.name for company in engine.companies)
+        self.state = MarketState(
+            names=previous.names if previous is not None and previous.names == names else names,
+            current_values=self._column(previous and previous.current_values, engine.current_values[:n], np.float64),
+            previous_values=self._column(previous and previous.previous_values, engine.previous_values[:n], np.float64),
+            owned_shares=self._column(previous and previous.owned_shares, engine.owned_shares[:n], np.int64),
+            history=self._log.view(),
+            history_version=history.version,
+            cycle_number=cycle_number,
+            day_number=day_number,
+            last_update_time=last_update_time
+        )
+        return self.state
+
+    def to_columns(self, state=None):
+        """A state's columns as JSON-ready lists - columns unchanged since the last call reuse their lists"""
+        state = state or self.state
+        columns = {}
+        for column in SNAPSHOT_COLUMNS:
+            cached = self._encoded.get(column)
+            if column == "price_history":
+                source = state.history_version
+                changed = cached is None or cached[0] != source
+            else:
+                source = getattr(state, column)
+                changed = cached is None or cached[0] is not source
+            if changed:
+                if column == "names":
+                    encoded = list(state.names)
+                elif column == "price_history":
+                    encoded = [state.price_history(index).tolist() for index in range(state.size)]
+                else:
+                    encoded = source.tolist()
+                cached = self._encoded[column] = (source, encoded)
+            columns[column] = cached[1]
+        return columns
@@ -0,0 +1,162 @@
+import heapq
+import itertools
+import threading
+import numpy as np
+
+# Order kinds and sides, as stored in the save file
+ORDER_TYPES = ("limit", "stop")
+ORDER_SIDES = ("buy", "sell")
+
+
+class OrderBook:
+    """Standing limit and stop orders, kept in price-indexed heaps per company.
+
+    Each company has two heaps keyed on trigger price:
+        below - orders that trigger once the price falls to the trigger
+                (buy limits and sell stops), max-heap so the highest trigger is on top
+        above - orders that trigger once the price rises to the trigger
+                (sell limits and buy stops), min-heap so the lowest trigger is on top
+
+    Matching a tick only pops from the top of each heap, so it costs
+    O(k log n) for the k orders that trigger. Cancelled orders are dropped
+    from the order index and skipped lazily when they reach the top.
+    """
+
+    def __init__(self, orders=None):
+        # order id -> order dict for every live order
+        self.orders = {}
+
+        # company -> heap of (key, order id) - see class docstring
+        self.below = {}
+        self.above = {}
+
+        self._ids = itertools.count(1)
+
+        # Orders are placed on the Tk thread and matched on the market thread
+        self._lock = threading.Lock()
+
+        for order in orders or []:
+            self._insert(dict(order))
+        if self.orders:
+            self._ids = itertools.count(max(self.orders) + 1)
+
+    def __len__(self):
+        return len(self.orders)
+
+    @staticmethod
+    def _triggers_below(order):
+        """True if the order fires when the price falls to its trigger"""
+        return (order["side"] == "buy") == (order["type"] == "limit")
+
+    def _insert(self, order):
+        """Index an order in its company's heap"""
+        self.orders[order["id"]] = order
+        if self._triggers_below(order):
+            heapq.heappush(self.below.setdefault(order["company"], []), (-order["price"], order["id"]))
+        else:
+            heapq.heappush(self.above.setdefault(order["company"], []), (order["price"], order["id"]))
+
+    def place(self, company, side, order_type, shares, price, day=0, cycle=0):
+        """Add a standing order and return it"""
+        if side not in ORDER_SIDES:
+            raise ValueError(f"Unknown order side: {side}")
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"Unknown order type: {order_type}")
+        if shares <= 0 or price <= 0:
+            raise ValueError("Orders need a positive share count and price")
+
+        with self._lock:
+            order = {
+                "id": next(self._ids),
+                "company": company,
+                "side": side,
+                "type": order_type,
+                "shares": shares,
+                "price": price,
+                "day": day,
+                "cycle": cycle
+            }
+            self._insert(order)
+            return order
+
+    def cancel(self, order_id):
+        """Remove an order; its heap entry is skipped when it reaches the top"""
+        with self._lock:
+            return self.orders.pop(order_id, None)
+
+    def orders_for_company(self, company):
+        """Live orders for one company, oldest first"""
+        with self._lock:
+            return [order for order in self.orders.values() if order["company"] == company]
+
+    def _pop_triggered(self, heap, triggered, price, sign):
+        """Pop every live order at the top of a heap whose trigger the price has reached"""
+        while heap:
+            key, order_id = heap[0]
+            order = self.orders.get(order_id)
+            if order is None:
+                heapq.heappop(heap)  # Cancelled
+                continue
+            if sign * price < key:
+                break
+            heapq.heappop(heap)
+            del self.orders[order_id]
+            triggered.append(order)
+
+    def match(self, companies_by_name):
+        """Remove and return the orders triggered by the companies' current prices"""
+        triggered = []
+        with self._lock:
+            for company, heap in self.below.items():
+                listed = companies_by_name.get(company)
+                if listed is not None:
+                    # Stored as -trigger: fires while -price >= -trigger
+                    self._pop_triggered(heap, triggered, listed.current_value, -1)
+            for company, heap in self.above.items():
+                listed = companies_by_name.get(company)
+                if listed is not None:
+                    self._pop_triggered(heap, triggered, listed.current_value, 1)
+
+        # Fill in the order they were placed
+        triggered.sort(key=lambda order: order["id"])
+        return triggered
+
+    def match_path(self, rows, prices):
+        """Remove the orders triggered anywhere along a run of cycles.
+
+        rows maps company names to their column in prices, which has one
+        row per cycle. Returns (order, cycle, price) for each triggered
+        order, where cycle is the first row that crossed its trigger and
+        price the price there, in the order they triggered. Only the
+        companies' lowest and highest prices are compared with the heaps,
+        so orders that don't trigger cost nothing beyond the min/max.
+        """
+        prices = np.asarray(prices)
+        if len(prices) == 0:
+            return []
+        lows = prices.min(axis=0)
+        highs = prices.max(axis=0)
+
+        fills = []
+        with self._lock:
+            for heaps, extremes, sign in ((self.below, lows, -1), (self.above, highs, 1)):
+                for company, heap in heaps.items():
+                    row = rows.get(company)
+                    if row is None:
+                        continue
+                    triggered = []
+                    self._pop_triggered(heap, triggered, extremes[row], sign)
+                    for order in triggered:
+                        # First cycle at or past the trigger
+                        column = prices[:, row]
+                        crossed = column <= order["price"] if sign < 0 else column >= order["price"]
+                        cycle = int(np.argmax(crossed))
+                        fills.append((order, cycle, float(column[cycle])))
+
+        fills.sort(key=lambda fill: (fill[1], fill[0]["id"]))
+        return fills
+
+    def to_list(self):
+        """Serializable form for the save file"""
+        with self._lock:
+            return [dict(order) for order in self.orders.values()]
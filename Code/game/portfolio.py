@@ -0,0 +1,148 @@
+import threading
+from collections import deque
+
+
+class Portfolio:
+    """Stock holdings as FIFO lots, with market value and P&L kept up to date incrementally.
+
+    Each trade adjusts the running totals for one company, and each market
+    tick only revalues the companies actually held, so the holdings view
+    reads cached aggregates instead of rescanning holdings and prices.
+    """
+
+    def __init__(self):
+        # company -> deque of [shares, price] lots, oldest first
+        self.lots = {}
+
+        # Per-company running figures
+        self.shares = {}
+        self.cost_basis = {}
+        self.prices = {}
+        self.market_values = {}
+        self.realized_by_company = {}
+
+        # Portfolio-wide running totals
+        self.total_market_value = 0.0
+        self.total_cost_basis = 0.0
+        self.realized_pnl = 0.0
+
+        # Trades happen on the Tk thread, revaluation on the market thread
+        self._lock = threading.Lock()
+
+    @property
+    def unrealized_pnl(self):
+        return self.total_market_value - self.total_cost_basis
+
+    def holdings(self):
+        """Shares held per company"""
+        return dict(self.shares)
+
+    def _set_price(self, company, price):
+        """Revalue one company's position and adjust the total by the difference"""
+        self.prices[company] = price
+        value = self.shares.get(company, 0) * price
+        self.total_market_value += value - self.market_values.get(company, 0.0)
+        self.market_values[company] = value
+
+    def buy(self, company, shares, price):
+        """Add a lot of newly bought shares"""
+        if shares <= 0:
+            return
+        with self._lock:
+            self.lots.setdefault(company, deque()).append([shares, price])
+            self.shares[company] = self.shares.get(company, 0) + shares
+            self.cost_basis[company] = self.cost_basis.get(company, 0.0) + shares * price
+            self.total_cost_basis += shares * price
+            self._set_price(company, price)
+
+    def sell(self, company, shares, price):
+        """Sell shares from the oldest lots first; returns the realized profit (negative for a loss)"""
+        if shares <= 0:
+            return 0.0
+        with self._lock:
+            lots = self.lots.get(company)
+            if not lots or self.shares.get(company, 0) < shares:
+                raise ValueError(f"Not enough shares of {company} to sell")
+
+            # Consume lots FIFO, tracking the cost of the shares sold
+            remaining = shares
+            cost = 0.0
+            while remaining > 0:
+                lot = lots[0]
+                taken = min(lot[0], remaining)
+                cost += taken * lot[1]
+                lot[0] -= taken
+                remaining -= taken
+                if lot[0] == 0:
+                    lots.popleft()
+
+            profit = shares * price - cost
+            self.realized_pnl += profit
+            self.realized_by_company[company] = self.realized_by_company.get(company, 0.0) + profit
+
+            self.shares[company] -= shares
+            self.cost_basis[company] -= cost
+            self.total_cost_basis -= cost
+            self._set_price(company, price)
+
+            # Forget positions that are fully closed
+            if self.shares[company] == 0:
+                self.total_cost_basis -= self.cost_basis[company]  # Clear rounding leftovers
+                self.total_market_value -= self.market_values.get(company, 0.0)
+                for figures in (self.lots, self.shares, self.cost_basis, self.prices, self.market_values):
+                    figures.pop(company, None)
+            return profit
+
+    def revalue(self, companies_by_name):
+        """Reprice every held position after a market tick - O(companies held)"""
+        with self._lock:
+            for company in list(self.shares):
+                listed = companies_by_name.get(company)
+                if listed is not None:
+                    self._set_price(company, listed.current_value)
+
+    def average_cost(self, company):
+        """Average cost per share of the open lots, or 0 if none are held"""
+        shares = self.shares.get(company, 0)
+        return self.cost_basis.get(company, 0.0) / shares if shares else 0.0
+
+    def unrealized_for(self, company):
+        """Unrealized profit on one company's open lots"""
+        return self.market_values.get(company, 0.0) - self.cost_basis.get(company, 0.0)
+
+    def allocation(self, company):
+        """Share of the portfolio's market value held in one company (0-1)"""
+        if self.total_market_value <= 0:
+            return 0.0
+        return self.market_values.get(company, 0.0) / self.total_market_value
+
+    def to_dict(self):
+        """Serializable form for the save file"""
+        with self._lock:
+            return {
+                "lots": {company: [list(lot) for lot in lots] for company, lots in self.lots.items()},
+                "realized_pnl": self.realized_pnl,
+                "realized_by_company": dict(self.realized_by_company)
+            }
+
+    @classmethod
+    def from_dict(cls, data, holdings, companies_by_name):
+        """Restore from a save; holdings without lots (older saves) are costed at today's price"""
+        portfolio = cls()
+        data = data or {}
+        lots = data.get("lots", {})
+
+        for company, shares in holdings.items():
+            listed = companies_by_name.get(company)
+            price = listed.current_value if listed is not None else 0.0
+            company_lots = lots.get(company)
+            if company_lots:
+                for lot_shares, lot_price in company_lots:
+                    portfolio.buy(company, lot_shares, lot_price)
+            elif shares > 0:
+                portfolio.buy(company, shares, price)
+
+        portfolio.realized_pnl = data.get("realized_pnl", 0.0)
+        portfolio.realized_by_company = dict(data.get("realized_by_company", {}))
+        portfolio.revalue(companies_by_name)
+        return portfolio
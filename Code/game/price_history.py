@@ -0,0 +1,184 @@
+import numpy as np
+
+# Default number of cycles of price history kept per company - what the game keeps for charting and analysis.
+# The buffer holds every value twice, so this costs 16 bytes per company per cycle (about 2.4 MB for the game's 15).
+DEFAULT_HISTORY_DEPTH = 10000
+
+# Short histories for benchmarking large company universes (not used by the game)
+SHALLOW_HISTORY_DEPTH = 500
+
+
+class HistoryBlock:
+    """Circular price history for many rows at once with O(1) appends.
+
+    Every value is written twice, at ``pos`` and ``pos + depth``, so the
+    window holding a row's history is always one contiguous slice of the
+    buffer no matter where the ring currently starts.
+    """
+
+    def __init__(self, rows, depth=DEFAULT_HISTORY_DEPTH, dtype=np.float64):
+        if depth < 1:
+            raise ValueError("History depth must be at least 1")
+
+        self.depth = depth
+        self.dtype = np.dtype(dtype)
+
+        # Doubled ring buffer plus the start and length of each row's window
+        rows = max(1, rows)
+        self.buffer = np.zeros((rows, 2 * depth), dtype=self.dtype)
+        self.starts = np.zeros(rows, dtype=np.int64)
+        self.lengths = np.zeros(rows, dtype=np.int64)
+        self._row_numbers = np.arange(rows)
+
+        # Bumped on every write so readers can tell when the history changed
+        self.version = 0
+
+    def grow(self, rows):
+        """Make room for more rows, keeping existing history"""
+        buffer = np.zeros((rows, 2 * self.depth), dtype=self.dtype)
+        buffer[:len(self.buffer)] = self.buffer
+        starts = np.zeros(rows, dtype=np.int64)
+        starts[:len(self.starts)] = self.starts
+        lengths = np.zeros(rows, dtype=np.int64)
+        lengths[:len(self.lengths)] = self.lengths
+
+        self.buffer = buffer
+        self.starts = starts
+        self.lengths = lengths
+        self._row_numbers = np.arange(rows)
+
+    def append(self, values):
+        """Append one value to each of the first len(values) rows"""
+        n = len(values)
+        if n == 0:
+            return
+
+        depth = self.depth
+        starts = self.starts[:n]
+        lengths = self.lengths[:n]
+        rows = self._row_numbers[:n]
+
+        self.version += 1
+
+        # Next write position - when a row is full this overwrites its oldest value
+        positions = (starts + lengths) % depth
+        self.buffer[rows, positions] = values
+        self.buffer[rows, positions + depth] = values
+
+        # Full rows drop their oldest value, the rest just get longer
+        full = lengths == depth
+        np.copyto(starts, (starts + 1) % depth, where=full)
+        np.minimum(lengths + 1, depth, out=lengths)
+
+    def extend(self, values):
+        """Append several values to each row - values has one row per step and one column per row"""
+        values = np.asarray(values, dtype=self.dtype)
+        steps, n = values.shape
+        if steps == 0 or n == 0:
+            return
+
+        depth = self.depth
+        self.version += 1
+
+        # Enough new values to fill every ring - just rewrite them from the start
+        if steps >= depth:
+            recent = values[-depth:].T
+            self.buffer[:n, :depth] = recent
+            self.buffer[:n, depth:] = recent
+            self.starts[:n] = 0
+            self.lengths[:n] = depth
+            return
+
+        starts = self.starts[:n]
+        lengths = self.lengths[:n]
+        rows = self._row_numbers[:n]
+
+        # Write position of every new value, wrapping around each ring
+        positions = (starts + lengths + np.arange(steps)[:, None]) % depth
+        self.buffer[rows, positions] = values
+        self.buffer[rows, positions + depth] = values
+
+        # Rings that overflowed drop their oldest values
+        new_lengths = np.minimum(lengths + steps, depth)
+        np.copyto(starts, (starts + lengths + steps - new_lengths) % depth)
+        np.copyto(lengths, new_lengths)
+
+    def append_row(self, row, value):
+        """Append one value to a single row"""
+        depth = self.depth
+        start = self.starts[row]
+        length = self.lengths[row]
+        self.version += 1
+
+        position = (start + length) % depth
+        self.buffer[row, position] = value
+        self.buffer[row, position + depth] = value
+
+        if length == depth:
+            self.starts[row] = (start + 1) % depth
+        else:
+            self.lengths[row] = length + 1
+
+    def window(self, row):
+        """A row's history, oldest first, as a contiguous view"""
+        start = self.starts[row]
+        return self.buffer[row, start:start + self.lengths[row]]
+
+    def set_row(self, row, values):
+        """Replace a row's history, keeping only the most recent values that fit"""
+        values = np.asarray(values, dtype=self.dtype)[-self.depth:]
+        length = len(values)
+        self.version += 1
+
+        self.buffer[row, :length] = values
+        self.buffer[row, self.depth:self.depth + length] = values
+        self.starts[row] = 0
+        self.lengths[row] = length
+
+
+class PriceHistory:
+    """Price history of one company - a row of a HistoryBlock.
+
+    Behaves like a read-only sequence. Slicing returns a contiguous NumPy
+    view, so plotting the most recent cycles never copies the history.
+    """
+
+    def __init__(self, depth=DEFAULT_HISTORY_DEPTH, dtype=np.float64, block=None, row=0):
+        # Standalone histories get a private single-row block
+        if block is None:
+            block = HistoryBlock(1, depth, dtype)
+
+        self.block = block
+        self.row = row
+
+    @property
+    def depth(self):
+        return self.block.depth
+
+    def append(self, value):
+        """Add a price to the end of the history"""
+        self.block.append_row(self.row, value)
+
+    def view(self):
+        """The whole history, oldest first, as a contiguous view"""
+        return self.block.window(self.row)
+
+    def tolist(self):
+        """The whole history as a list of floats (for saving)"""
+        return self.view().tolist()
+
+    def __len__(self):
+        return int(self.block.lengths[self.row])
+
+    def __getitem__(self, key):
+        return self.view()[key]
+
+    def __iter__(self):
+        return iter(self.view())
+
+    def __array__(self, dtype=None, copy=None):
+        window = self.view()
+        return window if dtype is None else window.astype(dtype)
+
+    def __repr__(self):
+        return f"PriceHistory({self.tolist()!r})"
@@ -1,5 +1,5 @@
 class Quarters:
-    def __init__(self, parent_window, player_data, return_callback):
+    def __init__(self, parent_window, player_data, return_callback, save_callback):
         # Create a new toplevel window
         self.quarters_window = tk.Toplevel(parent_window)
         self.quarters_window.title("Your Quarters")
@@ -10,6 +10,9 @@ class Quarters:
         self.player_data = player_data
         self.return_callback = return_callback
         
+        # Saves player data through the game's save writer (SpaceStationGame.save_player_data)
+        self.save_callback = save_callback
+        
         # Bind window closing
         self.quarters_window.protocol("WM_DELETE_WINDOW", self.on_closing)
         
@@ -133,9 +136,8 @@ class Quarters:
     
     def save_game_and_close(self, save_window):
         """Save the game and close the save dialog"""
-        # Save game using Game's save_game method
-        from game.game import Game
-        Game.save_game(self.player_data)
+        # Save game through the game's background save writer
+        self.save_callback(self.player_data)
         
         # Show confirmation
         tk.messagebox.showinfo("Game Saved", "Your game has been saved successfully.")
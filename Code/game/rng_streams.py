@@ -0,0 +1,50 @@
+import random
+import secrets
+import zlib
+import numpy as np
+
+
+class RandomStreams:
+    """Named, independently seeded random streams for each game subsystem.
+
+    Every stream is derived from one game seed plus the stream's name, so
+    drawing more numbers in one subsystem (say, extra hallway events) never
+    shifts the numbers another subsystem (the market) sees. The seed and a
+    generation counter are stored in the save; loading the same save always
+    replays the same streams.
+    """
+
+    def __init__(self, seed=None, generation=0):
+        self.seed = seed if seed is not None else secrets.randbits(63)
+        self.generation = generation
+        self._streams = {}
+        self._generators = {}
+
+    def _key(self, name):
+        """Entropy for a named stream - stable across runs and Python versions"""
+        return [self.seed, self.generation, zlib.crc32(name.encode("utf-8"))]
+
+    def stream(self, name):
+        """A random.Random for a subsystem (created on first use)"""
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = self._streams[name] = random.Random(
+                int(np.random.SeedSequence(self._key(name)).generate_state(2, np.uint64)[0]))
+        return stream
+
+    def numpy(self, name):
+        """A NumPy Generator for a subsystem (created on first use)"""
+        generator = self._generators.get(name)
+        if generator is None:
+            generator = self._generators[name] = np.random.default_rng(self._key(name))
+        return generator
+
+    def to_dict(self):
+        """Seed data for the save file - the next load starts a fresh generation"""
+        return {"seed": self.seed, "generation": self.generation + 1}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Streams for a loaded save (older saves without a seed get a new one)"""
+        data = data or {}
+        return cls(data.get("seed"), data.get("generation", 0))
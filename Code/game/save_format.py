@@ -0,0 +1,259 @@
+import json
+import os
+import struct
+import zlib
+import numpy as np
+
+# First bytes of a compact save file - legacy saves are plain JSON and start with "{"
+SAVE_MAGIC = b"SSXSAVE\x00"
+
+# Version of the compact layout, stored in every file
+FORMAT_VERSION = 1
+
+# Extensions of compact saves and of the older pretty-printed JSON saves
+SAVE_EXTENSION = ".sav"
+LEGACY_SAVE_EXTENSION = ".json"
+
+# Sidecar file in the saves folder summarizing every save (see save_index.py) - not a save itself
+INDEX_FILENAME = "saves_index.json"
+
+# Market columns stored as packed binary blocks, and their dtypes
+PACKED_COLUMNS = {
+    "current_values": "<f8",
+    "previous_values": "<f8",
+    "owned_shares": "<i8",
+    "price_history": "<f8",
+    "candles": "<f4"
+}
+
+# Top-level sections only some screens need - stored as their own blocks and decoded on first use
+COLD_SECTIONS = ("notes",)
+
+# zlib levels - the JSON part compresses well, float blocks barely benefit from more effort
+HEADER_COMPRESSION_LEVEL = 6
+BLOCK_COMPRESSION_LEVEL = 1
+
+# Magic, format version and compressed header length
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def _pack_block(values, dtype, blocks):
+    """Store an array as a compressed, byte-shuffled block and return its reference"""
+    array = np.ascontiguousarray(values, dtype=dtype)
+
+    # Grouping the bytes of each position together lets zlib find the repeats in exponents
+    shuffled = array.view(np.uint8).reshape(-1, array.itemsize).T.tobytes()
+    data = zlib.compress(shuffled, BLOCK_COMPRESSION_LEVEL)
+    blocks.append(data)
+    return {"block": len(blocks) - 1, "dtype": dtype, "count": len(array)}
+
+
+def _unpack_block(reference, body, offsets):
+    """Array stored by _pack_block"""
+    start, end = offsets[reference["block"]]
+    dtype = np.dtype(reference["dtype"])
+    shuffled = np.frombuffer(zlib.decompress(body[start:end]), dtype=np.uint8)
+    return shuffled.reshape(dtype.itemsize, reference["count"]).T.copy().view(dtype).ravel()
+
+
+def _pack_column(values, dtype, blocks):
+    """A flat column, or a list of rows (like the price history) stored as values plus row lengths"""
+    if values and isinstance(values[0], (list, tuple, np.ndarray)):
+        lengths = [len(row) for row in values]
+        flat = np.concatenate([np.asarray(row, dtype=dtype) for row in values])
+        return {"$rows": _pack_block(flat, dtype, blocks), "lengths": _pack_block(lengths, "<i8", blocks)}
+    return {"$array": _pack_block(values, dtype, blocks)}
+
+
+def _unpack_column(packed, body, offsets):
+    """Lists stored by _pack_column, as the JSON format would have loaded them"""
+    if "$rows" in packed:
+        values = _unpack_block(packed["$rows"], body, offsets)
+        lengths = _unpack_block(packed["lengths"], body, offsets)
+        ends = np.cumsum(lengths)
+        return [row.tolist() for row in np.split(values, ends[:-1])] if len(lengths) else []
+    return _unpack_block(packed["$array"], body, offsets).tolist()
+
+
+class ColdSection:
+    """A cold section still in its compressed block"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def load(self):
+        """The section's value"""
+        return json.loads(zlib.decompress(self.data))
+
+
+class SaveData(dict):
+    """Player data whose cold sections are decoded the first time they're used.
+
+    Reading, testing for or assigning a cold key works like it would on a
+    plain dict. Until then the section stays compressed, and saving writes
+    the compressed block back as it is.
+    """
+
+    def __init__(self, data=(), cold=None):
+        super().__init__(data)
+
+        # Key -> ColdSection not decoded yet
+        self.cold = dict(cold or {})
+
+    def __missing__(self, key):
+        section = self.cold.pop(key, None)
+        if section is None:
+            raise KeyError(key)
+        value = section.load()
+        dict.__setitem__(self, key, value)
+        return value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.cold
+
+    def __setitem__(self, key, value):
+        self.cold.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if self.cold.pop(key, None) is None:
+            dict.__delitem__(self, key)
+        elif dict.__contains__(self, key):
+            dict.__delitem__(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key in self.cold:
+            self.__missing__(key)
+        return dict.pop(self, key, *default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def load_all(self):
+        """Decode every cold section still compressed"""
+        for key in list(self.cold):
+            self.__missing__(key)
+
+
+def dumps_save(player_data):
+    """Encode player data in the compact format.
+
+    The file is the magic, the format version, the zlib-compressed minified
+    JSON of the player data, and then one zlib block per packed market
+    column and per cold section. The JSON refers to the blocks instead of
+    holding their data.
+    """
+    blocks = []
+    document = dict(player_data)
+
+    # Cold sections - a section that was never decoded is written back without touching it
+    sections = {}
+    pending = player_data.cold if isinstance(player_data, SaveData) else {}
+    for key in COLD_SECTIONS:
+        if key in document:
+            blocks.append(zlib.compress(json.dumps(document.pop(key), separators=(",", ":")).encode("utf-8"),
+                                        HEADER_COMPRESSION_LEVEL))
+        elif key in pending:
+            blocks.append(bytes(pending[key].data))
+        else:
+            continue
+        sections[key] = len(blocks) - 1
+
+    market = document.get("stock_market")
+    if isinstance(market, dict) and isinstance(market.get("columns"), dict):
+        columns = dict(market["columns"])
+        for column, dtype in PACKED_COLUMNS.items():
+            if column in columns:
+                columns[column] = _pack_column(columns[column], dtype, blocks)
+        document["stock_market"] = dict(market, columns=columns)
+
+    header = {
+        "version": FORMAT_VERSION,
+        "blocks": [len(block) for block in blocks],
+        "data": document
+    }
+    if sections:
+        header["sections"] = sections
+    header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    header = zlib.compress(header, HEADER_COMPRESSION_LEVEL)
+
+    return b"".join([_PREAMBLE.pack(SAVE_MAGIC, FORMAT_VERSION, len(header)), header] + blocks)
+
+
+def loads_save(data, lazy=False):
+    """Decode a compact save, or a legacy JSON save, into player data.
+
+    With lazy, the cold sections are left compressed in a SaveData until
+    they're first used.
+    """
+    if not data.startswith(SAVE_MAGIC):
+        return json.loads(data)
+
+    magic, version, header_length = _PREAMBLE.unpack_from(data)
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Save format version {version} is newer than this game supports")
+
+    start = _PREAMBLE.size
+    header = json.loads(zlib.decompress(data[start:start + header_length]))
+    body = memoryview(data)[start + header_length:]
+
+    # Byte range of each block in the body
+    offsets = []
+    position = 0
+    for size in header["blocks"]:
+        offsets.append((position, position + size))
+        position += size
+
+    player_data = header["data"]
+    market = player_data.get("stock_market")
+    if isinstance(market, dict) and isinstance(market.get("columns"), dict):
+        columns = market["columns"]
+        for column in PACKED_COLUMNS:
+            if isinstance(columns.get(column), dict):
+                columns[column] = _unpack_column(columns[column], body, offsets)
+
+    cold = {}
+    for key, block in header.get("sections", {}).items():
+        start, end = offsets[block]
+        cold[key] = ColdSection(bytes(body[start:end]))
+    if lazy:
+        return SaveData(player_data, cold)
+    for key, section in cold.items():
+        player_data[key] = section.load()
+    return player_data
+
+
+def read_save_file(path, lazy=False):
+    """Load player data from a compact or legacy JSON save file (see loads_save for lazy)"""
+    with open(path, "rb") as f:
+        return loads_save(f.read(), lazy)
+
+
+def save_file_path(saves_path, name):
+    """Save file of a character - the compact save if there is one, else a legacy JSON save"""
+    path = os.path.join(saves_path, name + SAVE_EXTENSION)
+    legacy_path = os.path.join(saves_path, name + LEGACY_SAVE_EXTENSION)
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        return legacy_path
+    return path
+
+
+def list_saves(saves_path):
+    """Names of the characters with a save in the folder, compact or legacy"""
+    names = set()
+    for filename in os.listdir(saves_path):
+        if filename == INDEX_FILENAME:
+            continue
+        for extension in (SAVE_EXTENSION, LEGACY_SAVE_EXTENSION):
+            if filename.endswith(extension):
+                names.add(filename[:-len(extension)])
+    return sorted(names)
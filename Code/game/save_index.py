@@ -0,0 +1,153 @@
+import datetime
+import json
+import os
+import threading
+
+from game.save_format import read_save_file, SAVE_EXTENSION, LEGACY_SAVE_EXTENSION, INDEX_FILENAME
+
+# Version of the index layout - an index from another version is rebuilt
+INDEX_VERSION = 1
+
+# Orders the Load Game screen can list saves in: label -> (entry field, newest/largest first)
+SORT_ORDERS = {
+    "Last Played": ("last_played", True),
+    "Name": ("name", False),
+    "Job": ("job", False),
+    "Credits": ("credits", True),
+    "File Size": ("size", True)
+}
+
+
+def summarize(player_data, last_played=None):
+    """Index fields of a save, taken from its player data"""
+    location = player_data.get("location") or {}
+    return {
+        "name": player_data.get("name", ""),
+        "job": player_data.get("job", ""),
+        "credits": player_data.get("credits", 0),
+        "location": {"x": location.get("x", 0), "y": location.get("y", 0)},
+        "last_played": last_played or datetime.datetime.now().isoformat(timespec="seconds")
+    }
+
+
+class SaveIndex:
+    """Summaries of every save (name, job, credits, location, last played, file size).
+
+    The Load Game screen lists saves from this index instead of opening
+    them. Each entry remembers the size and modification time of its save
+    file, so a save written by an older version, copied in by hand or
+    changed outside the game is noticed and summarized again - the only
+    time a save body is read. Saves are indexed on the save writer thread
+    as they're written, and entries() rewrites the index from the thread
+    listing the saves (the Tk thread) when it finds stale entries. Every
+    write holds the index lock and replaces the file atomically, so the
+    two never interleave.
+    """
+
+    def __init__(self, saves_path):
+        self.saves_path = saves_path
+        self.path = os.path.join(saves_path, INDEX_FILENAME)
+
+        # Save name -> entry, read from the index file on first use
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Entries from the index file (none if it's missing, unreadable or from another version)"""
+        if self._entries is not None:
+            return self._entries
+        try:
+            with open(self.path, "r") as f:
+                document = json.load(f)
+            entries = document["entries"] if document.get("version") == INDEX_VERSION else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            entries = {}
+        self._entries = entries
+        return entries
+
+    def _write(self):
+        """Replace the index file atomically"""
+        os.makedirs(self.saves_path, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump({"version": INDEX_VERSION, "entries": self._entries}, f, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def record(self, path, summary):
+        """Index a save that was just written to path"""
+        stat = os.stat(path)
+        entry = dict(summary, file=os.path.basename(path), size=stat.st_size, mtime=stat.st_mtime)
+        with self._lock:
+            self._load()[entry["name"]] = entry
+            self._write()
+
+    def touch(self, summary):
+        """Update the summary of a save without it being rewritten (e.g. after an autosave)"""
+        with self._lock:
+            entry = self._load().get(summary["name"])
+            if entry is None:
+                return
+            entry.update(summary)
+            self._write()
+
+    def entries(self, sort_order="Last Played"):
+        """Entries of every save in the folder, sorted by one of SORT_ORDERS"""
+        field, descending = SORT_ORDERS[sort_order]
+        with self._lock:
+            entries = self._refresh()
+        entries = sorted(entries, key=lambda entry: entry["name"].lower())
+        entries.sort(key=lambda entry: entry[field].lower() if isinstance(entry[field], str) else entry[field],
+                     reverse=descending)
+        return entries
+
+    def _refresh(self):
+        """Check the index against the saves folder (one stat per file) and fix entries that are out of date"""
+        entries = self._load()
+        if not os.path.isdir(self.saves_path):
+            return []
+
+        # Save file of each name - a compact save wins over a legacy JSON one
+        files = {}
+        for dir_entry in os.scandir(self.saves_path):
+            if not dir_entry.is_file():
+                continue
+            if dir_entry.name.endswith(SAVE_EXTENSION):
+                files[dir_entry.name[:-len(SAVE_EXTENSION)]] = dir_entry
+            elif dir_entry.name.endswith(LEGACY_SAVE_EXTENSION) and dir_entry.name != INDEX_FILENAME:
+                files.setdefault(dir_entry.name[:-len(LEGACY_SAVE_EXTENSION)], dir_entry)
+
+        changed = False
+        for name in list(entries):
+            if name not in files:
+                del entries[name]
+                changed = True
+
+        for name, dir_entry in files.items():
+            stat = dir_entry.stat()
+            entry = entries.get(name)
+            if (entry is not None and entry.get("file") == dir_entry.name and entry.get("size") == stat.st_size
+                    and entry.get("mtime") == stat.st_mtime):
+                continue
+
+            # Missing or stale - summarize the save from its body this once
+            try:
+                player_data = read_save_file(dir_entry.path, lazy=True)
+            except (OSError, ValueError):
+                player_data = {}
+            last_played = datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds")
+            summary = summarize(player_data, last_played)
+            summary["name"] = name
+            entries[name] = dict(summary, file=dir_entry.name, size=stat.st_size, mtime=stat.st_mtime)
+            changed = True
+
+        if changed:
+            try:
+                self._write()
+            except OSError as e:
+                print(f"Error writing save index: {e}")
+        return list(entries.values())
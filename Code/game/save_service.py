@@ -0,0 +1,157 @@
+import copy
+import os
+import threading
+
+from game.save_format import dumps_save, SaveData, SAVE_EXTENSION
+from game.save_index import SaveIndex, summarize
+
+
+def write_save_file(path, player_data):
+    """Write a compact save atomically - a temp file beside the save is renamed over it once it's on disk"""
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+
+    data = dumps_save(player_data)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        # Leave the old save untouched and don't litter the folder
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def snapshot_player_data(player_data):
+    """Copy of player data that later changes on the Tk thread can't reach.
+
+    The market columns are built fresh by MarketSnapshot.to_columns and
+    never modified afterwards, so they're shared instead of copied, and so
+    are cold sections that were never decoded.
+    """
+    snapshot = {}
+    for key, value in player_data.items():
+        if key == "stock_market" and isinstance(value, dict):
+            columns = value.get("columns")
+            market = copy.deepcopy({name: data for name, data in value.items() if name != "columns"})
+            if columns is not None:
+                market["columns"] = dict(columns)
+            snapshot[key] = market
+        else:
+            snapshot[key] = copy.deepcopy(value)
+    if isinstance(player_data, SaveData):
+        return SaveData(snapshot, player_data.cold)
+    return snapshot
+
+
+class SaveService:
+    """Writes saves on a background thread so the game never waits for the disk.
+
+    save() takes a snapshot of the player data on the calling thread and
+    hands it to the writer thread, which serializes it and writes it with
+    write_save_file, so a crash mid-write leaves the previous save intact.
+    Saves requested for a file that's still waiting to be written replace
+    the waiting snapshot - only the newest one is written. Other file work
+    (like autosave passes) is queued on the same thread with submit(), so
+    it always happens in the order it was requested. Each save written
+    is also summarized in the save index for the Load Game screen.
+    """
+
+    def __init__(self, saves_path):
+        self.saves_path = saves_path
+        self.index = SaveIndex(saves_path)
+
+        # Key (usually the save path) -> job waiting to run, oldest request first
+        self._pending = {}
+        self._writing = False
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = False
+
+        # Last error from the writer thread (None if the last write succeeded)
+        self.last_error = None
+
+        # Saves written since the service started
+        self.saves_written = 0
+
+    def path_for(self, name):
+        """Save file of a character"""
+        return os.path.join(self.saves_path, name + SAVE_EXTENSION)
+
+    def save(self, player_data, after=None):
+        """Queue a save of the player data; returns at once.
+
+        after, if given, runs on the writer thread once the save is on disk.
+        """
+        path = self.path_for(player_data["name"])
+        snapshot = snapshot_player_data(player_data)
+        summary = summarize(player_data)
+
+        def write():
+            write_save_file(path, snapshot)
+            self.index.record(path, summary)
+            if after:
+                after()
+
+        self.submit(path, write)
+        return path
+
+    def submit(self, key, job):
+        """Queue a job for the writer thread - a newer job with the same key replaces one still waiting"""
+        with self._condition:
+            self._pending.pop(key, None)
+            self._pending[key] = job
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="SaveWriter", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def is_pending(self, key):
+        """True if a save for the given file (or a job with the key) hasn't run yet"""
+        with self._condition:
+            return key in self._pending
+
+    def flush(self, timeout=None):
+        """Wait for every queued save to be written; returns False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def stop(self, timeout=None):
+        """Write the queued saves, then stop the writer thread"""
+        self.flush(timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        """Writer thread - runs queued jobs one at a time"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    return
+                key = next(iter(self._pending))
+                job = self._pending.pop(key)
+                self._writing = True
+
+            try:
+                job()
+                error = None
+            except Exception as e:
+                print(f"Error saving game: {e}")
+                error = e
+
+            with self._condition:
+                self._writing = False
+                self.last_error = error
+                if error is None:
+                    self.saves_written += 1
+                self._condition.notify_all()
@@ -0,0 +1,133 @@
+import numpy as np
+
+from game.market_engine import MAX_CHANGE
+from game.price_history import HistoryBlock, DEFAULT_HISTORY_DEPTH
+
+# Market sectors and the sector of each of the game's companies
+SECTORS = ["Technology", "Finance", "Health", "Energy", "Consumer", "Industrial"]
+COMPANY_SECTORS = {
+    "TechCorp": "Technology", "TechStart": "Technology", "SmartHome": "Technology", "MediaGroup": "Technology",
+    "GlobalBank": "Finance", "DigitalBank": "Finance", "RealEstate Co": "Finance",
+    "HealthCare Plus": "Health", "PharmaTech": "Health",
+    "EnergyCo": "Energy", "GreenEnergy": "Energy",
+    "FoodChain": "Consumer", "RetailGiant": "Consumer",
+    "AutoMakers": "Industrial", "Aerospace Inc": "Industrial"
+}
+
+# Per-cycle volatility of a company's price - matches the old uniform +/- 10% moves
+CYCLE_VOLATILITY = MAX_CHANGE / np.sqrt(3)
+
+# Fraction of a company's variance that comes from its sector factor (the rest is its own noise)
+SECTOR_SHARE = 0.5
+
+# Correlation between any two sector factors - the whole-market component
+SECTOR_CORRELATION = 0.3
+
+
+class SectorModel:
+    """Correlated price moves from a sector factor model.
+
+    Every company loads on its sector's factor, and the sector factors are
+    correlated through the Cholesky factor of their correlation matrix. The
+    two are folded into one (companies x sectors) loading matrix, so a tick
+    is one matrix-vector product plus independent noise per company. Sector
+    indexes (the average price of each sector's members) come from a second
+    product of the new prices against the membership weights.
+    """
+
+    def __init__(self, sectors=None, sector_share=SECTOR_SHARE, correlation=SECTOR_CORRELATION,
+                 volatility=CYCLE_VOLATILITY, history_depth=DEFAULT_HISTORY_DEPTH, max_change=MAX_CHANGE):
+        self.sectors = list(sectors or SECTORS)
+        self.sector_index = {sector: i for i, sector in enumerate(self.sectors)}
+        self.max_change = max_change
+
+        # Factor correlation matrix and its Cholesky factor (factors = chol @ independent draws)
+        count = len(self.sectors)
+        correlation_matrix = np.full((count, count), correlation) + (1.0 - correlation) * np.eye(count)
+        self.factor_chol = np.linalg.cholesky(correlation_matrix)
+
+        # How much of each company's move is its sector, and how much is its own
+        self.factor_volatility = volatility * np.sqrt(sector_share)
+        self.noise_volatility = volatility * np.sqrt(1.0 - sector_share)
+
+        # Sector of each engine row
+        self.sector_of = []
+
+        # Combined loadings and membership weights, rebuilt when companies are added
+        self._loadings = None
+        self._weights = None
+
+        # Sector index levels and their history
+        self.index_levels = np.zeros(count)
+        self.index_history = HistoryBlock(count, history_depth)
+
+    def default_sector(self, name, row):
+        """Sector of a listed company; companies without one are spread across the sectors"""
+        sector = COMPANY_SECTORS.get(name)
+        return sector if sector in self.sector_index else self.sectors[row % len(self.sectors)]
+
+    def assign(self, row, sector):
+        """Put an engine row in a sector"""
+        if sector not in self.sector_index:
+            raise ValueError(f"Unknown sector: {sector}")
+        while len(self.sector_of) <= row:
+            self.sector_of.append(0)
+        self.sector_of[row] = self.sector_index[sector]
+        self._loadings = None
+
+    def sector_name(self, row):
+        """Sector of an engine row, or None if it has none"""
+        if row < len(self.sector_of):
+            return self.sectors[self.sector_of[row]]
+        return None
+
+    def index_row(self, sector):
+        """History row holding a sector's index series"""
+        return self.sector_index[sector]
+
+    def _rebuild(self):
+        """Fold the sector loadings and factor Cholesky into one matrix"""
+        n = len(self.sector_of)
+        rows = np.arange(n)
+        members = np.zeros((n, len(self.sectors)))
+        members[rows, self.sector_of] = 1.0
+
+        # Company moves: (members * factor volatility) @ chol, applied to independent draws
+        self._loadings = (members * self.factor_volatility) @ self.factor_chol
+
+        # Sector indexes: equal-weighted mean of the member companies' prices
+        counts = members.sum(axis=0)
+        self._weights = members / np.maximum(counts, 1.0)
+
+    def _ensure_built(self, n):
+        if self._loadings is None or len(self._loadings) != n:
+            self._rebuild()
+
+    def draw(self, rng, n, steps=None):
+        """Correlated relative price moves for the first n rows, shape (n,) or (steps, n)"""
+        self._ensure_built(n)
+
+        shape = (n,) if steps is None else (steps, n)
+        factor_shape = (len(self.sectors),) if steps is None else (steps, len(self.sectors))
+
+        # One matrix product for the whole universe plus each company's own noise
+        factors = rng.standard_normal(factor_shape)
+        changes = factors @ self._loadings.T
+        changes += self.noise_volatility * rng.standard_normal(shape)
+        np.clip(changes, -self.max_change, self.max_change, out=changes)
+        return changes
+
+    def record_indexes(self, prices):
+        """Add the sector index levels for new prices, shape (n,) or (steps, n)"""
+        self._ensure_built(prices.shape[-1])
+        levels = prices @ self._weights
+        if levels.ndim == 1:
+            self.index_levels = levels
+            self.index_history.append(levels)
+        elif len(levels):
+            self.index_levels = levels[-1]
+            self.index_history.extend(levels)
+
+    def index_series(self, sector):
+        """History of a sector's index level (a view, oldest first)"""
+        return self.index_history.window(self.index_row(sector))
@@ -2385,7 +2385,7 @@ class Engineering:
     # --- End of added method ---
 
 class Bar:
-    def __init__(self, parent_window, player_data, station_crew, return_callback):
+    def __init__(self, parent_window, player_data, station_crew, return_callback, rng=None):
         # Create a new toplevel window
         self.bar_window = tk.Toplevel(parent_window)
         self.bar_window.title("Bar")
@@ -2398,6 +2398,9 @@ class Bar:
         self.station_crew = station_crew # Store crew data
         self.return_callback = return_callback
         
+        # Random stream for bar chatter - the game passes its seeded "rooms" stream
+        self.rng = rng if rng is not None else random.Random()
+        
         # Define drinks available in the bar
         self.drinks_menu = {
             "Beer": {"price": 10, "desc": "A refreshing glass of regular beer."},
@@ -2814,7 +2817,7 @@ class Bar:
         ]
         
         # Select a random conversation
-        conversation = random.choice(conversations)
+        conversation = self.rng.choice(conversations)
         
         # Show the conversation result
         self.bar_window.after(10, lambda: tk.messagebox.showinfo("Socializing", conversation, parent=self.bar_window))
@@ -1,38 +1,43 @@
 import tkinter as tk
-import random
 import datetime
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from tkinter import messagebox, ttk
 
-class Company:
-    def __init__(self, name, starting_value):
-        self.name = name
-        self.current_value = starting_value
-        self.previous_value = starting_value
-        self.price_history = [starting_value]
-        self.owned_shares = 0
-        
-    def update_value(self):
-        """Update the company's stock value"""
-        # Store the previous value for reference
-        self.previous_value = self.current_value
-        
-        # Random change between -10% and +10%
-        change = random.uniform(-0.10, 0.10)
-        
-        # Apply change
-        self.current_value = max(1.0, self.current_value * (1 + change))
-        
-        # Add to price history
-        self.price_history.append(self.current_value)
-        
-        # Limit price history to most recent 50 cycles
-        if len(self.price_history) > 50:
-            self.price_history.pop(0)
+# Company lives with the vectorized market engine; re-exported here for existing imports
+from game.market_engine import Company
+from game.market_scheduler import MARKET_TICK_SECONDS
+from game.company_list import CompanyListModel
+from game.company_query import CompanyQuery
+from game.trade_ledger import TradeLedger
+from game.trade_history import TradeHistoryView
+from game.portfolio import Portfolio
+from game.order_book import OrderBook
+
+# Number of most recent cycles shown on the price graph
+GRAPH_CYCLES = 50
+
+# Horizontal pixels per candle when the whole history is shown
+CANDLE_PIXELS = 4
+
+# Price graph ranges - recent cycles, or the whole history as candles
+GRAPH_RANGES = ["Recent Cycles", "All History"]
+
+# Values the company list can be sorted by - display name -> "price" or an indicator name
+SORT_KEYS = {
+    "Price": "price",
+    "Moving Average": "sma",
+    "EMA": "ema",
+    "Volatility": "volatility",
+    "RSI": "rsi",
+    "Drawdown": "drawdown"
+}
 
 class StockMarket:
-    def __init__(self, parent_window, player_data, companies, cycle_number, day_number, return_callback):
+    def __init__(self, parent_window, player_data, companies, cycle_number, day_number, return_callback,
+                 tick_seconds=MARKET_TICK_SECONDS, market_feed=None, last_update_time=None, trade_ledger=None,
+                 portfolio=None, order_book=None, market_snapshot=None):
         # Create a new toplevel window
         self.stock_window = tk.Toplevel(parent_window)
         self.stock_window.title("Stock Market")
@@ -46,9 +51,33 @@ class StockMarket:
         self.parent_window = parent_window
         self.player_data = player_data
         self.companies = companies
+        self.companies_by_name = {company.name: company for company in companies}
         self.cycle_number = cycle_number
         self.day_number = day_number
         self.return_callback = return_callback
+        self.tick_seconds = tick_seconds
+        self.market_feed = market_feed
+        self.market_snapshot = market_snapshot  # Published market states - read instead of the live engine
+        self.timer_id = None
+        
+        # Indexed trade history - without one, index the trade log kept in player data
+        if trade_ledger is None:
+            market_data = player_data.setdefault("stock_market", {})
+            trade_ledger = TradeLedger(entries=market_data.setdefault("trade_log", []))
+        self.trade_ledger = trade_ledger
+        
+        # Share lots and P&L - without one, cost the current holdings at today's prices
+        if portfolio is None:
+            portfolio = Portfolio.from_dict(player_data.get("portfolio"), player_data.get("stock_holdings", {}),
+                                            self.companies_by_name)
+        self.portfolio = portfolio
+        
+        # Standing limit/stop orders - matched by the game's market thread
+        if order_book is None:
+            order_book = OrderBook(player_data.get("stock_market", {}).get("orders", []))
+        self.order_book = order_book
+        self.order_list = None
+        self.shown_orders = []
         self.current_company = None
         
         # Track transactions for notes
@@ -60,9 +89,16 @@ class StockMarket:
         # Sort order: "price_asc" (low to high) or "price_desc" (high to low)
         self.sort_order = "price_asc"
         
+        # Value to sort by: "price" or an indicator name (see SORT_KEYS)
+        self.sort_key = "price"
+        
         # Ownership filter: "all", "owned", "not_owned" 
         self.ownership_filter = "all"
         
+        # Name search and the indexes every filter, sort and search is answered from
+        self.search_text = tk.StringVar()
+        self.company_query = CompanyQuery()
+        
         # Bind window closing
         self.stock_window.protocol("WM_DELETE_WINDOW", self.on_closing)
         
@@ -191,10 +227,18 @@ class StockMarket:
         self.expensive_btn.pack(side=tk.LEFT, padx=2, fill=tk.X, expand=True)
         
         # Sort options
-        sort_label = tk.Label(self.filter_frame, text="Sort By Price:", 
+        sort_label = tk.Label(self.filter_frame, text="Sort By:", 
                             font=("Arial", 12), bg="black", fg="white")
         sort_label.pack(anchor="w", pady=(10,0))
         
+        # Sort key - price or one of the indicators
+        self.sort_key_var = tk.StringVar(value="Price")
+        sort_key_dropdown = ttk.Combobox(self.filter_frame, textvariable=self.sort_key_var,
+                                         values=list(SORT_KEYS), state="readonly", width=16)
+        sort_key_dropdown.pack(anchor="w", pady=(5,0))
+        sort_key_dropdown.bind("<<ComboboxSelected>>",
+                               lambda event: self.sort_companies(self.sort_order, SORT_KEYS[self.sort_key_var.get()]))
+        
         # Sort buttons
         self.sort_buttons_frame = tk.Frame(self.filter_frame, bg="black")
         self.sort_buttons_frame.pack(fill=tk.X, pady=5)
@@ -238,6 +282,15 @@ class StockMarket:
                                      command=lambda: self.filter_by_ownership("not_owned"))
         self.not_owned_btn.pack(side=tk.LEFT, padx=2, fill=tk.X, expand=True)
         
+        # Name search - shows companies whose name starts with the text
+        search_label = tk.Label(self.filter_frame, text="Search:", 
+                              font=("Arial", 12), bg="black", fg="white")
+        search_label.pack(anchor="w", pady=(10,0))
+        search_entry = tk.Entry(self.filter_frame, textvariable=self.search_text, font=("Arial", 12),
+                                bg="#333333", fg="white", insertbackground="white")
+        search_entry.pack(fill=tk.X, pady=5)
+        search_entry.bind("<KeyRelease>", lambda event: self.refresh_companies())
+        
         # Companies list
         self.companies_listbox = tk.Listbox(self.left_content, 
                                          font=("Arial", 12), bg="black", fg="white",
@@ -245,6 +298,9 @@ class StockMarket:
                                          width=30, height=15)
         self.companies_listbox.pack(pady=10, fill=tk.BOTH, expand=True)
         
+        # Row model so refreshes only touch rows that changed
+        self.company_rows = CompanyListModel(self.companies_listbox)
+        
         # Add Trade History button
         self.history_btn = tk.Button(self.left_content, text="View Trade History", 
                                    font=("Arial", 12), bg="#333333", fg="white",
@@ -271,12 +327,37 @@ class StockMarket:
         self.ax.spines['top'].set_color('white')
         self.ax.spines['left'].set_color('white')
         self.ax.spines['right'].set_color('white')
+        self.ax.set_xlabel("Cycles", color='white')
+        self.ax.set_ylabel("Price", color='white')
+        self.ax.set_xlim(0, GRAPH_CYCLES - 1)
+        self.ax.grid(False)
+        
+        # Persistent chart artists - update_graph only changes their data.
+        # They're animated so full draws skip them and they can be blitted on top.
+        # Candle wicks are one line broken by NaNs, so any number of candles is a single artist.
+        self.wick_line, = self.ax.plot([], [], color='gray', linewidth=1, animated=True)
+        self.price_line, = self.ax.plot([], [], color='green', animated=True)
+        self.chart_title = self.ax.set_title("", color='white', animated=True)
+        self.chart_background = None
+        
+        # Graph range selector
+        range_frame = tk.Frame(self.right_frame, bg="black")
+        range_frame.pack(fill=tk.X, padx=10)
+        tk.Label(range_frame, text="Range:", font=("Arial", 10), bg="black", fg="white").pack(side=tk.LEFT)
+        self.graph_range = tk.StringVar(value=GRAPH_RANGES[0])
+        range_dropdown = ttk.Combobox(range_frame, textvariable=self.graph_range, values=GRAPH_RANGES,
+                                      state="readonly", width=14)
+        range_dropdown.pack(side=tk.LEFT, padx=5)
+        range_dropdown.bind("<<ComboboxSelected>>", lambda event: self.update_graph())
         
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.right_frame)
         self.canvas_widget = self.canvas.get_tk_widget()
         self.canvas_widget.configure(bg="black", highlightbackground="black")
         self.canvas_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
+        # Re-capture the static background whenever the axes are fully redrawn (e.g. on resize)
+        self.canvas.mpl_connect("draw_event", self._on_chart_draw)
+        
         # Trade buttons frame
         self.trade_frame = tk.Frame(self.right_frame, bg="black")
         self.trade_frame.pack(fill=tk.X, pady=10)
@@ -284,10 +365,20 @@ class StockMarket:
         # Bind selection event for the listbox AFTER all frames are created
         self.companies_listbox.bind('<<ListboxSelect>>', self.on_company_select)
         
-        # Add polling for player_data updates
+        # Track the last tick we've displayed
         self.last_seen_cycle = cycle_number
         self.last_seen_day = day_number
         
+        # Time of the last market update - parsed once here, then pushed with every tick
+        if last_update_time is None:
+            last_update_time = self._parse_update_time(player_data.get("stock_market", {}).get("last_update_time"))
+        self.last_update_time = last_update_time
+        
+        # Subscribe to market ticks so the window refreshes only when the market moves
+        self.feed_token = None
+        if self.market_feed:
+            self.feed_token = self.market_feed.subscribe(self.on_market_tick)
+        
         # Fill the companies listbox with all companies initially
         self.populate_companies_listbox()
         
@@ -302,124 +393,67 @@ class StockMarket:
         # Initial update of scrollable area
         self.update_scrollable_area()
     
+    @staticmethod
+    def _parse_update_time(value):
+        """Parse a saved ISO update time, returning None if it's missing or invalid"""
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            return None
+    
     def update_timer(self):
         """Update the countdown timer for next stock update"""
-        # Poll for changes in player_data
-        if "stock_market" in self.player_data:
-            poll_cycle = self.player_data["stock_market"].get("cycle_number", 0)
-            poll_day = self.player_data["stock_market"].get("day_number", 1)
-            
-            # If cycle or day has changed in player_data, update our values
+        # Without a market feed, fall back to watching the cycle number in player_data
+        if not self.market_feed and "stock_market" in self.player_data:
+            market_data = self.player_data["stock_market"]
+            poll_cycle = market_data.get("cycle_number", 0)
+            poll_day = market_data.get("day_number", 1)
             if poll_cycle != self.last_seen_cycle or poll_day != self.last_seen_day:
-                self.cycle_number = poll_cycle
-                self.day_number = poll_day
-                self.last_seen_cycle = poll_cycle
-                self.last_seen_day = poll_day
-                
-                # Directly update UI
-                self.cycle_label.config(text=f"Cycle: {self.cycle_number}")
-                self.day_label.config(text=f"Day: {self.day_number}")
-                
-                # Force update company data
-                if "companies" in self.player_data["stock_market"]:
-                    for i, company_data in enumerate(self.player_data["stock_market"]["companies"]):
-                        if i < len(self.companies):
-                            self.companies[i].current_value = company_data["current_value"]
-                            self.companies[i].previous_value = company_data["previous_value"]
-                            self.companies[i].price_history = company_data["price_history"]
-                
-                # Refresh the company list with current filters and sorting
-                self.populate_companies_listbox()
-                
-                # Try to maintain the same company selection
-                if self.current_company:
-                    selected_name = self.current_company.name
-                    # Find this company in the list
-                    for i in range(self.companies_listbox.size()):
-                        item_text = self.companies_listbox.get(i)
-                        if item_text == selected_name:
-                            self.companies_listbox.selection_clear(0, tk.END)
-                            self.companies_listbox.selection_set(i)
-                            self.companies_listbox.see(i)
-                            self.on_company_select(None)  # Refresh display
-                            break
-        
-        # Get the last update time from player data
-        if "stock_market" in self.player_data and "last_update_time" in self.player_data["stock_market"]:
-            try:
-                last_update = datetime.datetime.fromisoformat(self.player_data["stock_market"]["last_update_time"])
-                now = datetime.datetime.now()
-                elapsed = (now - last_update).total_seconds()
-                remaining = max(0, 60 - elapsed)  # Update every 60 seconds
-                
-                if remaining <= 0:
-                    # Timer has reached zero - update the display with new data
-                    self.timer_label.config(text="Updating Market...", fg="green")
-                    
-                    # Directly update from player data
-                    if "stock_market" in self.player_data:
-                        # Always update our cycle/day display to match player_data
-                        self.cycle_number = self.player_data["stock_market"].get("cycle_number", self.cycle_number)
-                        self.day_number = self.player_data["stock_market"].get("day_number", self.day_number)
-                        
-                        # Update the UI
-                        self.cycle_label.config(text=f"Cycle: {self.cycle_number}")
-                        self.day_label.config(text=f"Day: {self.day_number}")
-                        
-                        # Update company data from player_data
-                        if "companies" in self.player_data["stock_market"]:
-                            for i, company_data in enumerate(self.player_data["stock_market"]["companies"]):
-                                if i < len(self.companies):
-                                    self.companies[i].current_value = company_data["current_value"]
-                                    self.companies[i].previous_value = company_data["previous_value"]
-                                    self.companies[i].price_history = company_data["price_history"]
-                    
-                    # Remember which company was selected before the update
-                    selected_company = None
-                    selected_idx = -1
-                    if self.companies_listbox.curselection():
-                        selected_idx = self.companies_listbox.curselection()[0]
-                        if selected_idx < self.companies_listbox.size():
-                            selected_company = self.companies_listbox.get(selected_idx)
-                    
-                    # Refresh the company list with proper filtering
-                    self.populate_companies_listbox()
-                    
-                    # Try to restore the previous selection
-                    if selected_company:
-                        for i in range(self.companies_listbox.size()):
-                            if self.companies_listbox.get(i) == selected_company:
-                                self.companies_listbox.selection_set(i)
-                                self.companies_listbox.see(i)
-                                self.on_company_select(None)
-                                break
-                        else:
-                            # If company not found in new filtered list, select first item if available
-                            if self.companies_listbox.size() > 0:
-                                self.companies_listbox.selection_set(0)
-                                self.on_company_select(None)
-                    elif self.companies_listbox.size() > 0:
-                        # If no previous selection, select the first company
-                        self.companies_listbox.selection_set(0)
-                        self.on_company_select(None)
-                    
-                    # Wait briefly before next check to avoid spamming updates
-                    self.stock_window.after(1000, self.update_timer)
-                    return
-                else:
-                    minutes = int(remaining // 60)
-                    seconds = int(remaining % 60)
-                    self.timer_label.config(text=f"Next Update: {minutes:02d}:{seconds:02d}", 
-                                           fg="yellow" if remaining > 15 else "orange" if remaining > 5 else "red")
-            except (ValueError, TypeError):
-                # If there's an error parsing the time, show unknown
-                self.timer_label.config(text="Next Update: Unknown", fg="gray")
+                self.on_market_tick({
+                    "cycle_number": poll_cycle,
+                    "day_number": poll_day,
+                    "last_update_time": self._parse_update_time(market_data.get("last_update_time"))
+                })
+        
+        # Count down from the last tick we were told about - no re-parsing every second
+        if self.last_update_time:
+            elapsed = (datetime.datetime.now() - self.last_update_time).total_seconds()
+            remaining = max(0, self.tick_seconds - elapsed)  # Update every market cycle
+            
+            if remaining <= 0:
+                # Timer has reached zero - the new data arrives with the next tick
+                self.timer_label.config(text="Updating Market...", fg="green")
+            else:
+                minutes = int(remaining // 60)
+                seconds = int(remaining % 60)
+                self.timer_label.config(text=f"Next Update: {minutes:02d}:{seconds:02d}", 
+                                       fg="yellow" if remaining > 15 else "orange" if remaining > 5 else "red")
         else:
             # If last update time is not available
             self.timer_label.config(text="Next Update: Unknown", fg="gray")
         
         # Schedule next update in 1 second
-        self.stock_window.after(1000, self.update_timer)
+        self.timer_id = self.stock_window.after(1000, self.update_timer)
+    
+    def on_market_tick(self, event):
+        """Refresh the window after a market tick (runs on the Tk thread)"""
+        self.cycle_number = event["cycle_number"]
+        self.day_number = event["day_number"]
+        self.last_seen_cycle = self.cycle_number
+        self.last_seen_day = self.day_number
+        if event.get("last_update_time"):
+            self.last_update_time = event["last_update_time"]
+        
+        # Update the UI
+        self.cycle_label.config(text=f"Cycle: {self.cycle_number}")
+        self.day_label.config(text=f"Day: {self.day_number}")
+        
+        # Standing orders may have filled during the tick
+        self.credits_label.config(text=f"Credits: {self.player_data['credits']:.2f}")
+        self.refresh_order_list()
+        
+        # Companies are shared with the market thread, so the list already holds the new prices
+        self.refresh_companies()
     
     def on_company_select(self, event):
         """Handle company selection from the listbox"""
@@ -431,13 +465,11 @@ class StockMarket:
         selected_company_name = self.companies_listbox.get(selection_idx)
         
         # Find the actual company object by name
-        for company in self.companies:
-            if company.name == selected_company_name:
-                self.current_company = company
-                break
-        else:
+        company = self.companies_by_name.get(selected_company_name)
+        if company is None:
             # If company not found (should never happen), return
             return
+        self.current_company = company
         
         # Clear company info frame
         for widget in self.company_info_frame.winfo_children():
@@ -452,13 +484,16 @@ class StockMarket:
                               font=("Arial", 18, "bold"), bg="black", fg="white")
         company_name.grid(row=0, column=0, columnspan=2, sticky="w", pady=5)
         
-        current_price = tk.Label(self.company_info_frame, text=f"Current Price: {self.current_company.current_value:.2f}", 
+        # Prices from one published market state, so they always belong to the same cycle
+        current_value, previous_value = self._company_prices(self.current_company)
+        
+        current_price = tk.Label(self.company_info_frame, text=f"Current Price: {current_value:.2f}", 
                                font=("Arial", 12), bg="black", fg="white")
         current_price.grid(row=1, column=0, sticky="w", pady=2)
         
         # Calculate price change
-        price_change = self.current_company.current_value - self.current_company.previous_value
-        price_change_pct = (price_change / self.current_company.previous_value) * 100
+        price_change = current_value - previous_value
+        price_change_pct = (price_change / previous_value) * 100
         
         # Choose color based on price change
         change_color = "green" if price_change >= 0 else "red"
@@ -468,59 +503,160 @@ class StockMarket:
                                     font=("Arial", 12), bg="black", fg=change_color)
         price_change_label.grid(row=1, column=1, sticky="w", pady=2)
         
+        # Sector and its index (average member price)
+        sector = self.current_company.sector
+        if sector:
+            sector_model = self.current_company.engine.sector_model
+            sector_label = tk.Label(self.company_info_frame,
+                                  text=f"Sector: {sector} (index {sector_model.index_levels[sector_model.index_row(sector)]:.2f})",
+                                  font=("Arial", 12), bg="black", fg="white")
+            sector_label.grid(row=0, column=2, sticky="w", pady=5)
+        
         shares_owned = tk.Label(self.company_info_frame, 
                               text=f"Shares Owned: {self.current_company.owned_shares}", 
                               font=("Arial", 12), bg="black", fg="white")
         shares_owned.grid(row=2, column=0, sticky="w", pady=2)
         
         # Calculate total value of owned shares
-        total_value = self.current_company.owned_shares * self.current_company.current_value
+        total_value = self.current_company.owned_shares * current_value
         
         shares_value = tk.Label(self.company_info_frame, 
                               text=f"Total Value: {total_value:.2f}", 
                               font=("Arial", 12), bg="black", fg="white")
         shares_value.grid(row=2, column=1, sticky="w", pady=2)
         
+        # Cost basis and P&L of the shares held, from the portfolio's running totals
+        if self.current_company.owned_shares > 0:
+            unrealized = self.portfolio.unrealized_for(self.current_company.name)
+            average_cost = tk.Label(self.company_info_frame,
+                                  text=f"Average Cost: {self.portfolio.average_cost(self.current_company.name):.2f}",
+                                  font=("Arial", 12), bg="black", fg="white")
+            average_cost.grid(row=3, column=0, sticky="w", pady=2)
+            
+            unrealized_label = tk.Label(self.company_info_frame,
+                                      text=f"Unrealized P&L: {unrealized:+.2f}",
+                                      font=("Arial", 12), bg="black", fg="green" if unrealized >= 0 else "red")
+            unrealized_label.grid(row=3, column=1, sticky="w", pady=2)
+        
+        # Technical indicators, kept up to date by the market engine
+        indicators = self.current_company.engine.indicators
+        if indicators is not None:
+            values = indicators.values(self.current_company.index)
+            averages_label = tk.Label(self.company_info_frame,
+                                    text=f"SMA: {values['sma']:.2f}   EMA: {values['ema']:.2f}",
+                                    font=("Arial", 12), bg="black", fg="white")
+            averages_label.grid(row=4, column=0, sticky="w", pady=2)
+            
+            risk_label = tk.Label(self.company_info_frame,
+                                text=f"Volatility: {values['volatility'] * 100:.2f}%   RSI: {values['rsi']:.0f}   "
+                                     f"Drawdown: {values['drawdown'] * 100:.1f}%",
+                                font=("Arial", 12), bg="black", fg="white")
+            risk_label.grid(row=4, column=1, columnspan=2, sticky="w", pady=2)
+        
         # Update the graph
         self.update_graph()
         
         # Add trade interface
         self.create_trade_interface()
     
+    def _company_prices(self, company):
+        """(current, previous) price of a company from the last published market state"""
+        state = self.market_snapshot.state if self.market_snapshot else None
+        if state is not None and company.index < state.size:
+            return float(state.current_values[company.index]), float(state.previous_values[company.index])
+        return company.current_value, company.previous_value
+    
     def update_graph(self):
         """Update the price history graph for the selected company"""
         if not self.current_company:
             return
-            
-        # Clear the axis
-        self.ax.clear()
-        
-        # Set up the plot
-        self.ax.set_facecolor('black')
-        self.ax.tick_params(colors='white')
         
-        # Plot the price history
-        prices = self.current_company.price_history
-        x = range(len(prices))
+        candles = self.current_company.engine.candles
+        if self.graph_range.get() == GRAPH_RANGES[1] and candles is not None and candles.cycles:
+            # Whole history at the finest candle size that fits the chart's width
+            max_points = max(20, self.canvas_widget.winfo_width() // CANDLE_PIXELS)
+            level, opens, highs, lows, closes = candles.series(self.current_company.index, max_points)
+            prices = closes
+            
+            # One low-high segment per candle, separated by NaNs
+            wick_x = np.repeat(np.arange(len(closes), dtype=float), 3)
+            wick_x[2::3] = np.nan
+            wick_y = np.empty(len(closes) * 3)
+            wick_y[0::3] = lows
+            wick_y[1::3] = highs
+            wick_y[2::3] = np.nan
+            self.wick_line.set_data(wick_x, wick_y)
+            x_label = f"{level.name}s"
+            x_limit = max(len(closes) - 1, 1)
+            low, high = lows.min(), highs.max()
+        else:
+            # Plot the most recent cycles of the last published state, which the market thread never changes
+            state = self.market_snapshot.state if self.market_snapshot else None
+            if state is not None and self.current_company.index < state.size:
+                prices = state.price_history(self.current_company.index, GRAPH_CYCLES)
+            else:
+                prices = self.current_company.price_history[-GRAPH_CYCLES:]
+            self.wick_line.set_data([], [])
+            x_label = "Cycles"
+            x_limit = GRAPH_CYCLES - 1
+            low, high = (prices.min(), prices.max()) if len(prices) else (0, 0)
+        if len(prices) == 0:
+            return
         
         # Determine plot color based on price trend
         if prices[-1] >= prices[0]:
             line_color = 'green'
         else:
             line_color = 'red'
-            
-        self.ax.plot(x, prices, color=line_color)
-        
-        # Set labels
-        self.ax.set_title(f"{self.current_company.name} Price History", color='white')
-        self.ax.set_xlabel("Cycles", color='white')
-        self.ax.set_ylabel("Price", color='white')
         
-        # Remove grid
-        self.ax.grid(False)
+        # Update the persistent artists in place
+        self.price_line.set_data(np.arange(len(prices)), prices)
+        self.price_line.set_color(line_color)
+        self.chart_title.set_text(f"{self.current_company.name} Price History")
         
-        # Draw the canvas
-        self.canvas.draw()
+        # Only redraw the axes when the range or scale changed, or the prices leave the current limits
+        x_changed = self._update_chart_x_axis(x_limit, x_label)
+        if self._update_chart_limits(low, high) or x_changed or self.chart_background is None:
+            self.canvas.draw_idle()
+        else:
+            self._blit_chart()
+    
+    def _update_chart_x_axis(self, x_limit, x_label):
+        """Switch the x-axis between cycles and candle sizes; returns True if it changed"""
+        if self.ax.get_xlim() == (0, x_limit) and self.ax.get_xlabel() == x_label:
+            return False
+        self.ax.set_xlim(0, x_limit)
+        self.ax.set_xlabel(x_label, color='white')
+        return True
+    
+    def _update_chart_limits(self, low, high):
+        """Widen or tighten the y-axis when needed; returns True if the limits changed"""
+        bottom, top = self.ax.get_ylim()
+        span = max(high - low, 1.0)
+        
+        # Keep the current limits while the data fits and still fills a reasonable share of them
+        if self.chart_background is not None and bottom <= low and high <= top and (top - bottom) <= 3 * span:
+            return False
+        
+        # Leave some headroom so small moves don't force another redraw
+        margin = span * 0.25
+        self.ax.set_ylim(max(0.0, low - margin), high + margin)
+        return True
+    
+    def _on_chart_draw(self, event):
+        """Store the freshly drawn static background and put the animated artists back on top"""
+        self.chart_background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax.draw_artist(self.chart_title)
+        self.ax.draw_artist(self.wick_line)
+        self.ax.draw_artist(self.price_line)
+    
+    def _blit_chart(self):
+        """Redraw just the line and title over the cached background"""
+        self.canvas.restore_region(self.chart_background)
+        self.ax.draw_artist(self.chart_title)
+        self.ax.draw_artist(self.wick_line)
+        self.ax.draw_artist(self.price_line)
+        self.canvas.blit(self.fig.bbox)
     
     def create_trade_interface(self):
         """Create the interface for buying and selling stocks"""
@@ -595,6 +731,83 @@ class StockMarket:
         
         # Initialize button states
         update_total_cost()
+        
+        # Standing orders - Limit buys below / sells above the price, Stop buys above / sells below
+        order_label = tk.Label(self.trade_frame, text="Order:",
+                             font=("Arial", 12), bg="black", fg="white")
+        order_label.grid(row=2, column=0, padx=5, pady=5)
+        
+        self.order_type_var = tk.StringVar(value="Limit")
+        order_type_dropdown = ttk.Combobox(self.trade_frame, textvariable=self.order_type_var,
+                                         values=["Limit", "Stop"], state="readonly", width=6)
+        order_type_dropdown.grid(row=2, column=1, padx=5, pady=5)
+        
+        self.order_price_var = tk.StringVar(value=f"{self.current_company.current_value:.2f}")
+        order_price_entry = tk.Entry(self.trade_frame, textvariable=self.order_price_var, width=8)
+        order_price_entry.grid(row=2, column=2, padx=5, pady=5)
+        
+        buy_order_btn = tk.Button(self.trade_frame, text="Buy Order", font=("Arial", 10),
+                                bg="#333333", fg="white", command=lambda: self.place_order("buy"))
+        buy_order_btn.grid(row=2, column=3, padx=5, pady=5)
+        
+        sell_order_btn = tk.Button(self.trade_frame, text="Sell Order", font=("Arial", 10),
+                                 bg="#333333", fg="white", command=lambda: self.place_order("sell"))
+        sell_order_btn.grid(row=2, column=4, padx=5, pady=5)
+        
+        # Open orders for this company
+        self.order_list = tk.Listbox(self.trade_frame, font=("Arial", 10), bg="black", fg="white",
+                                   selectbackground="#333333", height=3, width=50)
+        self.order_list.grid(row=3, column=0, columnspan=4, padx=5, pady=5, sticky="we")
+        
+        cancel_order_btn = tk.Button(self.trade_frame, text="Cancel", font=("Arial", 10),
+                                   bg="#333333", fg="white", command=self.cancel_order)
+        cancel_order_btn.grid(row=3, column=4, padx=5, pady=5)
+        
+        self.refresh_order_list()
+    
+    def place_order(self, side):
+        """Add a standing order for the selected company"""
+        try:
+            shares = int(self.shares_var.get())
+            price = float(self.order_price_var.get())
+        except ValueError:
+            messagebox.showerror("Input Error", "Please enter a valid number of shares and price.")
+            return
+        
+        if side == "sell" and shares > self.current_company.owned_shares:
+            messagebox.showerror("Order Failed", "You don't own that many shares.")
+            return
+        
+        try:
+            self.order_book.place(self.current_company.name, side, self.order_type_var.get().lower(),
+                                  shares, price, self.day_number, self.cycle_number)
+        except ValueError as e:
+            messagebox.showerror("Order Failed", str(e))
+            return
+        
+        self.refresh_order_list()
+    
+    def cancel_order(self):
+        """Cancel the order selected in the open orders list"""
+        if not self.order_list or not self.order_list.curselection():
+            return
+        order = self.shown_orders[self.order_list.curselection()[0]]
+        self.order_book.cancel(order["id"])
+        self.refresh_order_list()
+    
+    def refresh_order_list(self):
+        """Show the selected company's open orders"""
+        if not self.order_list or not self.current_company:
+            return
+        try:
+            self.order_list.delete(0, tk.END)
+        except tk.TclError:
+            return  # Trade interface was rebuilt
+        
+        self.shown_orders = self.order_book.orders_for_company(self.current_company.name)
+        for order in self.shown_orders:
+            self.order_list.insert(tk.END, f"{order['type'].title()} {order['side']} {order['shares']} "
+                                           f"@ {order['price']:.2f} (Day {order['day']}, Cycle {order['cycle']})")
     
     def buy_stock(self):
         """Buy stock of the currently selected company"""
@@ -625,6 +838,9 @@ class StockMarket:
             else:
                 self.player_data["stock_holdings"][self.current_company.name] += shares
             
+            # Add a new lot at this price
+            self.portfolio.buy(self.current_company.name, shares, self.current_company.current_value)
+            
             # Track transaction for notes
             transaction = {
                 "type": "buy",
@@ -636,48 +852,9 @@ class StockMarket:
             }
             self.stock_transactions.append(transaction)
             
-            # Add to trade log for history
-            if "stock_market" not in self.player_data:
-                self.player_data["stock_market"] = {}
-                
-            if "trade_log" not in self.player_data["stock_market"]:
-                self.player_data["stock_market"]["trade_log"] = []
-                
-            # Check if there's an entry for the current cycle/day
-            current_cycle_entry = None
-            for entry in self.player_data["stock_market"]["trade_log"]:
-                if entry.get("cycle") == self.cycle_number and entry.get("day") == self.day_number:
-                    current_cycle_entry = entry
-                    break
-                    
-            # Create a new entry if needed
-            if not current_cycle_entry:
-                current_cycle_entry = {
-                    "cycle": self.cycle_number,
-                    "day": self.day_number,
-                    "trades": {"bought": {}, "sold": {}}
-                }
-                self.player_data["stock_market"]["trade_log"].append(current_cycle_entry)
-                
-            # Add the buy transaction
-            if "bought" not in current_cycle_entry["trades"]:
-                current_cycle_entry["trades"]["bought"] = {}
-                
-            company_name = self.current_company.name
-            if company_name in current_cycle_entry["trades"]["bought"]:
-                # Update existing entry
-                existing = current_cycle_entry["trades"]["bought"][company_name]
-                existing["amount"] += shares
-                existing["total"] += total_cost
-                # Update average price
-                existing["price"] = existing["total"] / existing["amount"]
-            else:
-                # Add new entry
-                current_cycle_entry["trades"]["bought"][company_name] = {
-                    "amount": shares,
-                    "price": self.current_company.current_value,
-                    "total": total_cost
-                }
+            # Add to trade log for history (merged with this cycle's entry if there is one)
+            self.trade_ledger.record(self.day_number, self.cycle_number, "bought", self.current_company.name,
+                                     shares, self.current_company.current_value, total_cost)
             
             # Update display
             self.credits_label.config(text=f"Credits: {self.player_data['credits']:.2f}")
@@ -699,241 +876,80 @@ class StockMarket:
         try:
             # Get share amount
             shares = int(self.shares_var.get())
-            
-            # Check if player owns enough shares
-            if shares > self.current_company.owned_shares:
-                messagebox.showerror("Transaction Failed", "You don't own that many shares.")
-                return
-                
-            # Calculate total value
-            total_value = shares * self.current_company.current_value
-            
-            # Update player credits
-            self.player_data["credits"] += total_value
-            
-            # Update company owned shares
-            self.current_company.owned_shares -= shares
-            
-            # Update stock holdings in player data
-            if "stock_holdings" in self.player_data and self.current_company.name in self.player_data["stock_holdings"]:
-                self.player_data["stock_holdings"][self.current_company.name] -= shares
-                
-                # Remove entry if no shares left
-                if self.player_data["stock_holdings"][self.current_company.name] <= 0:
-                    del self.player_data["stock_holdings"][self.current_company.name]
-            
-            # Calculate profit/loss if we have the purchase price history
-            profit = 0
-            if "stock_purchases" in self.player_data and self.current_company.name in self.player_data["stock_purchases"]:
-                # Get the average purchase price of shares
-                purchases = self.player_data["stock_purchases"][self.current_company.name]
-                if len(purchases) > 0:
-                    # Calculate average purchase price of shares being sold
-                    total_cost = sum(purchase["price"] * purchase["shares"] for purchase in purchases[:shares])
-                    avg_price = total_cost / shares if shares > 0 else 0
-                    
-                    # Calculate profit/loss
-                    profit = total_value - (avg_price * shares)
-            
-            # Track transaction for notes
-            transaction = {
-                "type": "sell",
-                "company": self.current_company.name,
-                "shares": shares,
-                "price": self.current_company.current_value,
-                "total": total_value,
-                "profit": profit,
-                "timestamp": datetime.datetime.now().isoformat()
-            }
-            self.stock_transactions.append(transaction)
-            
-            # Add to trade log for history
-            if "stock_market" not in self.player_data:
-                self.player_data["stock_market"] = {}
-                
-            if "trade_log" not in self.player_data["stock_market"]:
-                self.player_data["stock_market"]["trade_log"] = []
-                
-            # Check if there's an entry for the current cycle/day
-            current_cycle_entry = None
-            for entry in self.player_data["stock_market"]["trade_log"]:
-                if entry.get("cycle") == self.cycle_number and entry.get("day") == self.day_number:
-                    current_cycle_entry = entry
-                    break
-                    
-            # Create a new entry if needed
-            if not current_cycle_entry:
-                current_cycle_entry = {
-                    "cycle": self.cycle_number,
-                    "day": self.day_number,
-                    "trades": {"bought": {}, "sold": {}}
-                }
-                self.player_data["stock_market"]["trade_log"].append(current_cycle_entry)
-                
-            # Add the sell transaction
-            if "sold" not in current_cycle_entry["trades"]:
-                current_cycle_entry["trades"]["sold"] = {}
-                
-            company_name = self.current_company.name
-            if company_name in current_cycle_entry["trades"]["sold"]:
-                # Update existing entry
-                existing = current_cycle_entry["trades"]["sold"][company_name]
-                existing["amount"] += shares
-                existing["total"] += total_value
-                # Update average price
-                existing["price"] = existing["total"] / existing["amount"]
-            else:
-                # Add new entry
-                current_cycle_entry["trades"]["sold"][company_name] = {
-                    "amount": shares,
-                    "price": self.current_company.current_value,
-                    "total": total_value
-                }
-            
-            # Update display
-            self.credits_label.config(text=f"Credits: {self.player_data['credits']:.2f}")
-            
-            # Success message
-            profit_text = ""
-            if profit != 0:
-                if profit > 0:
-                    profit_text = f" (Profit: {profit:.2f} credits)"
-                else:
-                    profit_text = f" (Loss: {abs(profit):.2f} credits)"
-                    
-            messagebox.showinfo("Transaction Complete", 
-                               f"Sold {shares} shares of {self.current_company.name} for {total_value:.2f} credits.{profit_text}")
-            
-            # Refresh company info
-            self.on_company_select(None)
         except ValueError:
             messagebox.showerror("Input Error", "Please enter a valid number of shares.")
-    
-    def show_trade_history(self):
-        """Show the trade history log"""
-        # Create a new toplevel window
-        history_window = tk.Toplevel(self.stock_window)
-        history_window.title("Trade History")
-        history_window.geometry("650x550")  # Increased size for better visibility
-        history_window.configure(bg="black")
+            return
         
-        # Set minimum size
-        history_window.minsize(500, 400)
+        if shares <= 0:
+            messagebox.showerror("Input Error", "Please enter a positive number of shares.")
+            return
         
-        # Ensure this window stays on top
-        history_window.transient(self.stock_window)
-        history_window.grab_set()
-        
-        # Title
-        title_label = tk.Label(history_window, text="Trade History", 
-                             font=("Arial", 18), bg="black", fg="white")
-        title_label.pack(pady=10)
-        
-        # Create frame with scrollbar
-        frame = tk.Frame(history_window, bg="black")
-        frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
-        
-        # Add a scrollbar
-        scrollbar = tk.Scrollbar(frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Create the trade log text widget with tags for color formatting
-        trade_log = tk.Text(frame, font=("Arial", 12), 
-                          bg="black", fg="white", width=60, height=20,
-                          yscrollcommand=scrollbar.set, wrap=tk.WORD)
-        trade_log.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=trade_log.yview)
-        
-        # Create tags for colored text
-        trade_log.tag_configure("header", foreground="yellow", font=("Arial", 14, "bold"))
-        trade_log.tag_configure("cycle", foreground="cyan", font=("Arial", 12, "bold"))
-        trade_log.tag_configure("bought", foreground="green", font=("Arial", 12))
-        trade_log.tag_configure("sold", foreground="red", font=("Arial", 12))
-        trade_log.tag_configure("company", foreground="white", font=("Arial", 12))
-        
-        # Populate the trade log
-        if "stock_market" in self.player_data and "trade_log" in self.player_data["stock_market"]:
-            trade_log.insert(tk.END, "TRADE HISTORY\n\n", "header")
-            
-            # Display trade log entries in reverse order (newest first)
-            for entry in reversed(self.player_data["stock_market"]["trade_log"]):
-                cycle = entry.get("cycle", 0)
-                day = entry.get("day", 0)
-                trade_log.insert(tk.END, f"Cycle {cycle} (Day {day}):\n", "cycle")
-                
-                trades = entry.get("trades", {})
-                
-                # Bought trades
-                if "bought" in trades and trades["bought"]:
-                    trade_log.insert(tk.END, "  BOUGHT:\n", "bought")
-                    for company, data in trades["bought"].items():
-                        amount = data.get("amount", 0)
-                        price = data.get("price", 0)
-                        total = data.get("total", 0)
-                        trade_log.insert(tk.END, f"    {company}: {amount} shares @ {price:.2f} cr each = {total:.2f} cr\n", "company")
-                
-                # Sold trades
-                if "sold" in trades and trades["sold"]:
-                    trade_log.insert(tk.END, "  SOLD:\n", "sold")
-                    for company, data in trades["sold"].items():
-                        amount = data.get("amount", 0)
-                        price = data.get("price", 0)
-                        total = data.get("total", 0)
-                        trade_log.insert(tk.END, f"    {company}: {amount} shares @ {price:.2f} cr each = {total:.2f} cr\n", "company")
-                
-                trade_log.insert(tk.END, "\n")
-        else:
-            trade_log.insert(tk.END, "No trade history available.")
+        # Check if player owns enough shares - the lots have to cover the sale too
+        if shares > self.current_company.owned_shares or \
+                shares > self.portfolio.shares.get(self.current_company.name, 0):
+            messagebox.showerror("Transaction Failed", "You don't own that many shares.")
+            return
         
-        # Make the text widget read-only
-        trade_log.config(state=tk.DISABLED)
+        try:
+            # Sell the oldest lots first and work out the profit/loss against what they cost
+            profit = self.portfolio.sell(self.current_company.name, shares, self.current_company.current_value)
+        except ValueError as e:
+            messagebox.showerror("Transaction Failed", str(e))
+            return
         
-        # Mouse wheel binding for scrolling
-        def _on_trade_mousewheel(event):
-            try:
-                # Windows style scrolling (positive or negative delta)
-                trade_log.yview_scroll(int(-1*(event.delta/120)), "units")
-            except Exception as e:
-                try:
-                    # Linux style scrolling (positive delta for scroll up, negative for down)
-                    if event.num == 4:
-                        trade_log.yview_scroll(-1, "units")
-                    elif event.num == 5:
-                        trade_log.yview_scroll(1, "units")
-                except:
-                    pass  # Ignore errors if the widget was destroyed
+        # Calculate total value
+        total_value = shares * self.current_company.current_value
         
-        # Bind mousewheel to trade log and all parent widgets to ensure it works everywhere
-        trade_log.bind("<MouseWheel>", _on_trade_mousewheel)  # Windows
-        trade_log.bind("<Button-4>", _on_trade_mousewheel)    # Linux scroll up
-        trade_log.bind("<Button-5>", _on_trade_mousewheel)    # Linux scroll down
+        # Update player credits
+        self.player_data["credits"] += total_value
         
-        frame.bind("<MouseWheel>", _on_trade_mousewheel)
-        frame.bind("<Button-4>", _on_trade_mousewheel)
-        frame.bind("<Button-5>", _on_trade_mousewheel)
+        # Update company owned shares
+        self.current_company.owned_shares -= shares
         
-        history_window.bind("<MouseWheel>", _on_trade_mousewheel)
-        history_window.bind("<Button-4>", _on_trade_mousewheel)
-        history_window.bind("<Button-5>", _on_trade_mousewheel)
+        # Update stock holdings in player data
+        if "stock_holdings" in self.player_data and self.current_company.name in self.player_data["stock_holdings"]:
+            self.player_data["stock_holdings"][self.current_company.name] -= shares
+            
+            # Remove entry if no shares left
+            if self.player_data["stock_holdings"][self.current_company.name] <= 0:
+                del self.player_data["stock_holdings"][self.current_company.name]
+        
+        # Track transaction for notes
+        transaction = {
+            "type": "sell",
+            "company": self.current_company.name,
+            "shares": shares,
+            "price": self.current_company.current_value,
+            "total": total_value,
+            "profit": profit,
+            "timestamp": datetime.datetime.now().isoformat()
+        }
+        self.stock_transactions.append(transaction)
+        
+        # Add to trade log for history (merged with this cycle's entry if there is one)
+        self.trade_ledger.record(self.day_number, self.cycle_number, "sold", self.current_company.name,
+                                 shares, self.current_company.current_value, total_value)
+        
+        # Update display
+        self.credits_label.config(text=f"Credits: {self.player_data['credits']:.2f}")
+        
+        # Success message
+        profit_text = ""
+        if profit != 0:
+            if profit > 0:
+                profit_text = f" (Profit: {profit:.2f} credits)"
+            else:
+                profit_text = f" (Loss: {abs(profit):.2f} credits)"
+                
+        messagebox.showinfo("Transaction Complete", 
+                           f"Sold {shares} shares of {self.current_company.name} for {total_value:.2f} credits.{profit_text}")
         
-        # Override destroy method to cleanup bindings
-        orig_destroy = history_window.destroy
-        def _destroy_and_cleanup():
-            try:
-                history_window.unbind("<MouseWheel>")
-                history_window.unbind("<Button-4>")
-                history_window.unbind("<Button-5>")
-            except:
-                pass
-            orig_destroy()
-        
-        history_window.destroy = _destroy_and_cleanup
-        
-        # Close button
-        close_btn = tk.Button(history_window, text="Close", 
-                            font=("Arial", 12), bg="#333333", fg="white",
-                            command=history_window.destroy)
-        close_btn.pack(pady=10)
+        # Refresh company info
+        self.on_company_select(None)
+    
+    def show_trade_history(self):
+        """Show the trade history log (rendered a page at a time)"""
+        TradeHistoryView(self.stock_window, self.trade_ledger, list(self.companies_by_name))
     
     def on_closing(self):
         """Handle window closing"""
@@ -941,6 +957,14 @@ class StockMarket:
         if self.stock_transactions:
             self.player_data["stock_transactions"] = self.stock_transactions
         
+        # Stop listening for market ticks and stop the countdown
+        if self.market_feed and self.feed_token is not None:
+            self.market_feed.unsubscribe(self.feed_token)
+            self.feed_token = None
+        if self.timer_id:
+            self.stock_window.after_cancel(self.timer_id)
+            self.timer_id = None
+        
         # Cleanup any bindings to prevent errors
         try:
             self.left_canvas.unbind("<MouseWheel>")
@@ -976,36 +1000,17 @@ class StockMarket:
         elif filter_type == "Expensive":
             self.expensive_btn.config(relief=tk.SUNKEN)
         
-        # Preserve selection if possible
-        selected_company = None
-        if self.companies_listbox.curselection():
-            selected_idx = self.companies_listbox.curselection()[0]
-            if selected_idx < self.companies_listbox.size():
-                selected_company = self.companies_listbox.get(selected_idx)
-        
-        # Repopulate the listbox with filtered companies
-        self.populate_companies_listbox()
+        # Update the listbox with filtered companies, keeping the selection if possible
+        self.refresh_companies()
         
         # Update scrollable area after UI changes
         self.update_scrollable_area()
-        
-        # Try to restore selection
-        if selected_company:
-            for i in range(self.companies_listbox.size()):
-                if self.companies_listbox.get(i) == selected_company:
-                    self.companies_listbox.selection_set(i)
-                    self.companies_listbox.see(i)
-                    self.on_company_select(None)  # Explicitly call after selection is restored
-                    return
-        
-        # If previous selection not found, select the first item if any exist
-        if self.companies_listbox.size() > 0:
-            self.companies_listbox.selection_set(0)
-            self.on_company_select(None)  # Explicitly call after selection is made
     
-    def sort_companies(self, sort_order):
-        """Sort companies based on price"""
+    def sort_companies(self, sort_order, sort_key=None):
+        """Sort companies by price or an indicator"""
         self.sort_order = sort_order
+        if sort_key is not None:
+            self.sort_key = sort_key
         
         # Update button appearance
         self.low_high_btn.config(relief=tk.RAISED)
@@ -1016,32 +1021,11 @@ class StockMarket:
         else:
             self.high_low_btn.config(relief=tk.SUNKEN)
         
-        # Preserve selection if possible
-        selected_company = None
-        if self.companies_listbox.curselection():
-            selected_idx = self.companies_listbox.curselection()[0]
-            if selected_idx < self.companies_listbox.size():
-                selected_company = self.companies_listbox.get(selected_idx)
-        
-        # Repopulate the listbox with sorted companies
-        self.populate_companies_listbox()
+        # Update the listbox with sorted companies, keeping the selection if possible
+        self.refresh_companies()
         
         # Update scrollable area after UI changes
         self.update_scrollable_area()
-        
-        # Try to restore selection
-        if selected_company:
-            for i in range(self.companies_listbox.size()):
-                if self.companies_listbox.get(i) == selected_company:
-                    self.companies_listbox.selection_set(i)
-                    self.companies_listbox.see(i)
-                    self.on_company_select(None)  # Explicitly call after selection is restored
-                    return
-        
-        # If previous selection not found, select the first item if any exist
-        if self.companies_listbox.size() > 0:
-            self.companies_listbox.selection_set(0)
-            self.on_company_select(None)  # Explicitly call after selection is made
     
     def filter_by_ownership(self, ownership_filter):
         """Filter companies based on ownership"""
@@ -1060,80 +1044,60 @@ class StockMarket:
         elif ownership_filter == "not_owned":
             self.not_owned_btn.config(relief=tk.SUNKEN)
         
-        # Preserve selection if possible
-        selected_company = None
-        if self.companies_listbox.curselection():
-            selected_idx = self.companies_listbox.curselection()[0]
-            if selected_idx < self.companies_listbox.size():
-                selected_company = self.companies_listbox.get(selected_idx)
-        
-        # Repopulate the listbox with filtered companies
-        self.populate_companies_listbox()
+        # Update the listbox with filtered companies, keeping the selection if possible
+        self.refresh_companies()
         
         # Update scrollable area after UI changes
         self.update_scrollable_area()
+    
+    def refresh_companies(self):
+        """Re-apply filters and sorting, then restore the selected company if it's still listed"""
+        selected_name = self.current_company.name if self.current_company else None
         
-        # Try to restore selection
-        if selected_company:
-            for i in range(self.companies_listbox.size()):
-                if self.companies_listbox.get(i) == selected_company:
-                    self.companies_listbox.selection_set(i)
-                    self.companies_listbox.see(i)
-                    self.on_company_select(None)  # Explicitly call after selection is restored
-                    return
+        # Update only the rows that changed
+        self.populate_companies_listbox()
         
-        # If previous selection not found, select the first item if any exist
-        if self.companies_listbox.size() > 0:
-            self.companies_listbox.selection_set(0)
+        # Find the previous selection in O(1), falling back to the first row
+        row = self.company_rows.index_of(selected_name)
+        if row is None and len(self.company_rows) > 0:
+            row = 0
+        
+        self.companies_listbox.selection_clear(0, tk.END)
+        if row is not None:
+            self.companies_listbox.selection_set(row)
+            self.companies_listbox.see(row)
             self.on_company_select(None)  # Explicitly call after selection is made
     
     def populate_companies_listbox(self):
         """Populate the companies listbox based on current filter and sort order"""
-        # Clear current contents
-        self.companies_listbox.delete(0, tk.END)
-        
-        # Get player credits for affordability check
-        player_credits = self.player_data["credits"]
+        # Prices from the last published market state; the query only re-sorts them when they change
+        state = self.market_snapshot.state if self.market_snapshot else None
+        engine = self.companies[0].engine if self.companies else None
+        if state is not None and engine is not None and state.size == len(self.companies):
+            prices = state.current_values
+        else:
+            prices = np.array([company.current_value for company in self.companies])
+        self.company_query.index([company.name for company in self.companies], prices)
         
-        # Prepare filtered and sorted companies list
-        filtered_companies = []
+        # Sort values - the price, or an indicator for every company at once
+        sort_values = None
+        if self.sort_key != "price" and engine is not None and engine.indicators is not None:
+            sort_values = engine.indicators.column(self.sort_key)
         
-        for company in self.companies:
-            # Calculate exactly how many shares can be bought
-            max_shares = player_credits // company.current_value  # Integer division to get whole shares
-            can_afford = max_shares >= 1  # Can afford if at least 1 whole share can be bought
-            
-            # Check if company passes the affordability filter
-            passes_affordability = (
-                self.current_filter == "All" or
-                (self.current_filter == "Affordable" and can_afford) or
-                (self.current_filter == "Expensive" and not can_afford)
-            )
-            
-            # Check if company passes the ownership filter
-            is_owned = company.owned_shares > 0
-            passes_ownership = (
-                self.ownership_filter == "all" or
-                (self.ownership_filter == "owned" and is_owned) or
-                (self.ownership_filter == "not_owned" and not is_owned)
-            )
-            
-            # Add to filtered list if it passes both filters
-            if passes_affordability and passes_ownership:
-                filtered_companies.append((company.name, company.current_value))
-        
-        # Sort the filtered companies
-        if self.sort_order == "price_asc":
-            # Sort by price, low to high
-            filtered_companies.sort(key=lambda x: x[1])
+        # Shares owned change on this thread, so read them from the engine rather than the state
+        if engine is not None:
+            owned_shares = engine.owned_shares
         else:
-            # Sort by price, high to low
-            filtered_companies.sort(key=lambda x: x[1], reverse=True)
+            owned_shares = np.array([company.owned_shares for company in self.companies])
+        
+        # Affordable companies cost at most the player's credits for one whole share
+        names = self.company_query.select(self.player_data["credits"], affordability=self.current_filter,
+                                          ownership=self.ownership_filter, owned_shares=owned_shares,
+                                          prefix=self.search_text.get().strip(), sort_values=sort_values,
+                                          descending=self.sort_order != "price_asc")
         
-        # Add sorted companies to the listbox
-        for company_name, price in filtered_companies:
-            # Add company to listbox
-            self.companies_listbox.insert(tk.END, company_name)
+        # Update the listbox, touching only rows whose order or visibility changed
+        self.company_rows.update(names)
         
         # Make sure all widgets are properly arranged for scrolling
         self.left_content.update_idletasks()
@@ -0,0 +1,152 @@
+import itertools
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+# Trades rendered per page; more are fetched as the list is scrolled
+HISTORY_PAGE_SIZE = 100
+
+# Fetch the next page once the view is scrolled past this fraction of the loaded rows
+HISTORY_PREFETCH_AT = 0.9
+
+
+class TradeHistoryView:
+    """Trade History window that renders one page of trades at a time.
+
+    Rows come from TradeLedger.query, a generator over the ledger's
+    indexes, so opening the window or changing a filter only formats the
+    first page. Further pages are pulled lazily as the user scrolls.
+    """
+
+    def __init__(self, parent_window, trade_ledger, company_names):
+        self.trade_ledger = trade_ledger
+        self.rows = None  # Generator for the current filter
+        self.exhausted = False
+        self.page_pending = False
+
+        # Create a new toplevel window
+        self.history_window = tk.Toplevel(parent_window)
+        self.history_window.title("Trade History")
+        self.history_window.geometry("650x550")
+        self.history_window.configure(bg="black")
+
+        # Set minimum size
+        self.history_window.minsize(500, 400)
+
+        # Ensure this window stays on top
+        self.history_window.transient(parent_window)
+        self.history_window.grab_set()
+
+        # Title
+        title_label = tk.Label(self.history_window, text="Trade History",
+                             font=("Arial", 18), bg="black", fg="white")
+        title_label.pack(pady=10)
+
+        # Filter controls
+        filter_frame = tk.Frame(self.history_window, bg="black")
+        filter_frame.pack(fill=tk.X, padx=20)
+
+        tk.Label(filter_frame, text="Company:", font=("Arial", 10), bg="black", fg="white").grid(row=0, column=0, sticky="w")
+        self.company_var = tk.StringVar(value="All")
+        ttk.Combobox(filter_frame, textvariable=self.company_var, values=["All"] + sorted(company_names),
+                     state="readonly", width=16).grid(row=0, column=1, padx=5)
+
+        tk.Label(filter_frame, text="Side:", font=("Arial", 10), bg="black", fg="white").grid(row=0, column=2, sticky="w")
+        self.side_var = tk.StringVar(value="All")
+        ttk.Combobox(filter_frame, textvariable=self.side_var, values=["All", "Bought", "Sold"],
+                     state="readonly", width=7).grid(row=0, column=3, padx=5)
+
+        tk.Label(filter_frame, text="Days:", font=("Arial", 10), bg="black", fg="white").grid(row=0, column=4, sticky="w")
+        self.first_day_entry = tk.Entry(filter_frame, width=5)
+        self.first_day_entry.grid(row=0, column=5)
+        tk.Label(filter_frame, text="to", font=("Arial", 10), bg="black", fg="white").grid(row=0, column=6, padx=2)
+        self.last_day_entry = tk.Entry(filter_frame, width=5)
+        self.last_day_entry.grid(row=0, column=7)
+
+        apply_btn = tk.Button(filter_frame, text="Apply", font=("Arial", 10), bg="#333333", fg="white",
+                              command=self.apply_filters)
+        apply_btn.grid(row=0, column=8, padx=5)
+
+        # Create frame with scrollbar
+        frame = tk.Frame(self.history_window, bg="black")
+        frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+        # Add a scrollbar
+        self.scrollbar = tk.Scrollbar(frame)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # One listbox row per trade - only loaded pages are ever rendered
+        self.trade_list = tk.Listbox(frame, font=("Arial", 12), bg="black", fg="white",
+                                     selectbackground="#333333", activestyle="none",
+                                     yscrollcommand=self._on_scroll)
+        self.trade_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.config(command=self.trade_list.yview)
+
+        # Status line (rows loaded / no trades)
+        self.status_label = tk.Label(self.history_window, text="", font=("Arial", 10), bg="black", fg="gray")
+        self.status_label.pack()
+
+        # Close button
+        close_btn = tk.Button(self.history_window, text="Close",
+                            font=("Arial", 12), bg="#333333", fg="white",
+                            command=self.history_window.destroy)
+        close_btn.pack(pady=10)
+
+        # Show the first page
+        self.apply_filters()
+
+    def apply_filters(self):
+        """Restart the listing with the current filters"""
+        company = self.company_var.get()
+        side = self.side_var.get()
+
+        try:
+            first_day = int(self.first_day_entry.get()) if self.first_day_entry.get().strip() else None
+            last_day = int(self.last_day_entry.get()) if self.last_day_entry.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Input Error", "Days must be whole numbers.", parent=self.history_window)
+            return
+
+        # Lazily evaluated - nothing is formatted until a page is requested
+        self.rows = self.trade_ledger.query(
+            company=None if company == "All" else company,
+            side=None if side == "All" else side.lower(),
+            first_day=first_day,
+            last_day=last_day
+        )
+        self.exhausted = False
+
+        self.trade_list.delete(0, tk.END)
+        self.load_next_page()
+        self.trade_list.yview_moveto(0)
+
+    def load_next_page(self):
+        """Render the next page of trades"""
+        self.page_pending = False
+        if self.exhausted:
+            return
+
+        page = list(itertools.islice(self.rows, HISTORY_PAGE_SIZE))
+        if len(page) < HISTORY_PAGE_SIZE:
+            self.exhausted = True
+
+        for day, cycle, side, company, amount, price, total in page:
+            self.trade_list.insert(tk.END, f"Day {day}, Cycle {cycle}  {'BOUGHT' if side == 'bought' else 'SOLD'}  "
+                                           f"{company}: {amount} shares @ {price:.2f} cr each = {total:.2f} cr")
+            self.trade_list.itemconfig(tk.END, fg="green" if side == "bought" else "red")
+
+        # Update the status line
+        loaded = self.trade_list.size()
+        if loaded == 0:
+            self.status_label.config(text="No trade history available.")
+        elif self.exhausted:
+            self.status_label.config(text=f"{loaded} trades")
+        else:
+            self.status_label.config(text=f"Showing {loaded} trades - scroll for more")
+
+    def _on_scroll(self, first, last):
+        """Keep the scrollbar in sync and fetch another page near the bottom"""
+        self.scrollbar.set(first, last)
+        if not self.exhausted and not self.page_pending and float(last) >= HISTORY_PREFETCH_AT:
+            # Defer so we don't insert rows while Tk is still scrolling
+            self.page_pending = True
+            self.history_window.after_idle(self.load_next_page)
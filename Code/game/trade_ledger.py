@@ -0,0 +1,310 @@
+import bisect
+import itertools
+import json
+import os
+import threading
+
+# Trade sides, matching the keys used in trade log entries
+SIDES = ("bought", "sold")
+
+
+class TradeLedger:
+    """Trade log indexed by (day, cycle) and by company, persisted to an append-only journal.
+
+    Entries keep the layout of the old inline trade log:
+        {"cycle": 2, "day": 1, "trades": {"bought": {company: {...}}, "sold": {...}}}
+
+    Each individual trade is also written as one JSON line to the journal
+    file, so saving the game only appends the new trades instead of
+    rewriting the whole history. A ledger from open_journal() reads the
+    journal the first time its trades are needed, not when the game loads.
+    """
+
+    def __init__(self, entries=None, journal_path=None):
+        # Entries in the order they were created (shared with the caller if given)
+        self.entries = entries if entries is not None else []
+
+        # (day, cycle) -> entry, company -> {(day, cycle): entry} and day -> [entries]
+        self.by_cycle = {}
+        self.by_company = {}
+        self.by_day = {}
+        self.days = []  # Sorted days that have trades
+
+        # Journal file, how many records it holds and its size in bytes
+        self.journal_path = journal_path
+        self.journal_records = 0
+        self.journal_bytes = 0
+        self._unsaved = []
+
+        # Records at the start of the journal that aren't in the indexes yet (see open_journal()),
+        # and the trades recorded since, which go back in after them once the journal is read
+        self._unread = 0
+        self._recorded_unread = []
+
+        # The market thread and the Tk thread both record trades
+        self._lock = threading.Lock()
+
+        for entry in self.entries:
+            self._index_entry(entry)
+
+    def __len__(self):
+        self._read_journal()
+        return len(self.entries)
+
+    def __iter__(self):
+        self._read_journal()
+        return iter(self.entries)
+
+    def _index_entry(self, entry):
+        """Add an existing entry to the indexes"""
+        key = (entry.get("day", 0), entry.get("cycle", 0))
+        self.by_cycle[key] = entry
+        self._index_day(entry)
+        for side in SIDES:
+            for company in entry.get("trades", {}).get(side, {}) or {}:
+                self.by_company.setdefault(company, {})[key] = entry
+
+    def _index_day(self, entry):
+        """Add an entry to the per-day index"""
+        day = entry.get("day", 0)
+        if day not in self.by_day:
+            self.by_day[day] = []
+            bisect.insort(self.days, day)
+        self.by_day[day].append(entry)
+
+    def entry(self, day, cycle):
+        """The entry for a cycle, or None if nothing was traded"""
+        self._read_journal()
+        return self.by_cycle.get((day, cycle))
+
+    def entries_for_company(self, company):
+        """Entries in which a company was traded, oldest first"""
+        self._read_journal()
+        return list(self.by_company.get(company, {}).values())
+
+    def record(self, day, cycle, side, company, amount, price, total=None):
+        """Add a trade, merging it with the same company's trades in the same cycle"""
+        if side not in SIDES:
+            raise ValueError(f"Unknown trade side: {side}")
+        if amount <= 0:
+            return
+        if total is None:
+            total = amount * price
+
+        record = {
+            "day": day, "cycle": cycle, "side": side, "company": company,
+            "amount": amount, "price": price, "total": total
+        }
+        with self._lock:
+            self._apply(day, cycle, side, company, amount, price, total)
+            self._unsaved.append(record)
+            if self._unread:
+                self._recorded_unread.append(record)
+
+    def _apply(self, day, cycle, side, company, amount, price, total):
+        """Merge a trade into the indexed entries"""
+        key = (day, cycle)
+
+        # Find or create the entry for this cycle in O(1)
+        entry = self.by_cycle.get(key)
+        if entry is None:
+            entry = {"cycle": cycle, "day": day, "trades": {"bought": {}, "sold": {}}}
+            self.entries.append(entry)
+            self.by_cycle[key] = entry
+            self._index_day(entry)
+
+        trades = entry.setdefault("trades", {})
+        side_trades = trades.get(side)
+        if side_trades is None:
+            side_trades = trades[side] = {}
+
+        if company in side_trades:
+            # Update existing entry and its average price
+            existing = side_trades[company]
+            existing["amount"] += amount
+            existing["total"] += total
+            existing["price"] = existing["total"] / existing["amount"]
+        else:
+            side_trades[company] = {"amount": amount, "price": price, "total": total}
+
+        self.by_company.setdefault(company, {})[key] = entry
+
+    def query(self, company=None, side=None, first_day=None, last_day=None):
+        """Yield matching trades newest first as (day, cycle, side, company, amount, price, total).
+
+        Uses the company index or the sorted day index to pick candidate
+        entries, and is a generator so callers can fetch one page at a time.
+        """
+        sides = SIDES if side is None else (side,)
+
+        # Pick candidate entries from the narrowest index (copied so the market thread can keep recording)
+        with self._lock:
+            self._read_journal_locked()
+            if company is not None:
+                candidates = list(self.by_company.get(company, {}).values())
+            elif first_day is not None or last_day is not None:
+                low = 0 if first_day is None else bisect.bisect_left(self.days, first_day)
+                high = len(self.days) if last_day is None else bisect.bisect_right(self.days, last_day)
+                candidates = [entry for day in self.days[low:high] for entry in self.by_day[day]]
+            else:
+                candidates = list(self.entries)
+
+        for entry in reversed(candidates):
+            day = entry.get("day", 0)
+            if (first_day is not None and day < first_day) or (last_day is not None and day > last_day):
+                continue
+            trades = entry.get("trades", {})
+            for trade_side in sides:
+                side_trades = trades.get(trade_side) or {}
+                names = [company] if company is not None else list(side_trades)
+                for name in names:
+                    trade = side_trades.get(name)
+                    if trade:
+                        yield (day, entry.get("cycle", 0), trade_side, name,
+                               trade.get("amount", 0), trade.get("price", 0), trade.get("total", 0))
+
+    def merge_pending(self, day, cycle, pending):
+        """Log a pending_trades dict ({"bought": {...}, "sold": {...}}) on the given cycle"""
+        for side in SIDES:
+            for company, trade in (pending.get(side) or {}).items():
+                amount = trade.get("amount", 0)
+                if amount > 0:  # Only process trades with non-zero amounts
+                    total = trade.get("total", amount * trade.get("price", 0))
+                    self.record(day, cycle, side, company, amount, trade.get("price", total / amount), total)
+
+    def flush(self):
+        """Append trades recorded since the last flush to the journal"""
+        with self._lock:
+            if not self.journal_path or not self._unsaved:
+                return
+            records = self._unsaved
+            self._unsaved = []
+
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        try:
+            with open(self.journal_path, "ab") as f:
+                f.write(data)
+        except OSError:
+            # Keep the records so the next flush can retry
+            with self._lock:
+                self._unsaved = records + self._unsaved
+            raise
+
+        self.journal_records += len(records)
+        self.journal_bytes += len(data)
+
+    def reset_journal(self):
+        """Start a fresh, empty journal (for a new character)"""
+        with self._lock:
+            self._unsaved = []
+        self.journal_records = 0
+        self.journal_bytes = 0
+        self._unread = 0
+        self._recorded_unread = []
+        if self.journal_path:
+            open(self.journal_path, "w").close()
+
+    def _read_journal(self):
+        """Index the journal records open_journal() left unread"""
+        if self._unread:
+            with self._lock:
+                self._read_journal_locked()
+
+    def _read_journal_locked(self):
+        """_read_journal for callers already holding the lock"""
+        if not self._unread:
+            return
+        count = self._unread
+        recorded = self._recorded_unread
+        self._unread = 0
+        self._recorded_unread = []
+
+        # Rebuild the indexes with the journal's trades first and the newer ones after them
+        del self.entries[:]
+        self.by_cycle.clear()
+        self.by_company.clear()
+        self.by_day.clear()
+        del self.days[:]
+        with open(self.journal_path, "rb") as f:
+            records = [json.loads(line) for line in itertools.islice(f, count)]
+        for record in records + recorded:
+            self._apply(record["day"], record["cycle"], record["side"], record["company"],
+                        record["amount"], record["price"], record["total"])
+
+    @classmethod
+    def open_journal(cls, journal_path, records=None, size=None):
+        """Ledger over a journal whose records are only read when the trades are first needed.
+
+        size is the journal's byte length stored in the save with records -
+        anything past it is cut off without reading the file. Saves from
+        before the size was stored are read at once with load().
+        """
+        if records is None or size is None or not os.path.exists(journal_path) \
+                or os.path.getsize(journal_path) < size:
+            return cls.load(journal_path, records)
+
+        # Drop anything past the last record the save knows about
+        if os.path.getsize(journal_path) > size:
+            with open(journal_path, "r+b") as f:
+                f.truncate(size)
+
+        ledger = cls(journal_path=journal_path)
+        ledger.journal_records = records
+        ledger.journal_bytes = size
+        ledger._unread = records
+        return ledger
+
+    @classmethod
+    def load(cls, journal_path, records=None):
+        """Rebuild a ledger from its journal.
+
+        records is the count stored in the save file. Lines written after
+        that save (e.g. before a crash) are dropped so the trade history
+        always matches the credits and holdings in the save.
+        """
+        ledger = cls(journal_path=journal_path)
+        if not os.path.exists(journal_path):
+            return ledger
+
+        consumed = 0
+        count = 0
+        with open(journal_path, "rb") as f:
+            for line in f:
+                if records is not None and count >= records:
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # Torn final line
+                ledger._apply(record["day"], record["cycle"], record["side"], record["company"],
+                              record["amount"], record["price"], record["total"])
+                consumed += len(line)
+                count += 1
+
+        # Drop anything past the last record the save knows about
+        if consumed < os.path.getsize(journal_path):
+            with open(journal_path, "r+b") as f:
+                f.truncate(consumed)
+
+        ledger.journal_records = count
+        ledger.journal_bytes = consumed
+        return ledger
+
+    @classmethod
+    def from_trade_log(cls, trade_log, journal_path=None):
+        """Migrate an inline trade log from an older save into a journalled ledger"""
+        ledger = cls(journal_path=journal_path)
+        if journal_path:
+            ledger.reset_journal()
+
+        for entry in trade_log:
+            trades = entry.get("trades", {})
+            for side in SIDES:
+                for company, trade in (trades.get(side) or {}).items():
+                    amount = trade.get("amount", 0)
+                    total = trade.get("total", 0)
+                    ledger.record(entry.get("day", 0), entry.get("cycle", 0), side, company,
+                                  amount, trade.get("price", total / amount if amount else 0), total)
+
+        ledger.flush()
+        return ledger
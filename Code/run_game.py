@@ -5,8 +5,12 @@ Run script for Space Station Explorer game
 
 import sys
 import os
+import argparse
 import tkinter as tk
 
+# Environment variable holding a random seed for the game (the --seed flag takes precedence)
+SEED_VARIABLE = "SPACE_STATION_SEED"
+
 # Function to determine the base path for resources and saves
 def get_base_path():
     """Get the base path for the application in both exe and script modes"""
@@ -19,6 +23,23 @@ def get_base_path():
     
     return base_path
 
+def parse_seed(argv=None):
+    """Random seed from --seed or the SPACE_STATION_SEED environment variable (None for a random game)"""
+    parser = argparse.ArgumentParser(description="Space Station Explorer")
+    parser.add_argument("--seed", type=int, default=None,
+                        help=f"seed every random stream of a new game for a reproducible run (or set {SEED_VARIABLE})")
+    args = parser.parse_args(argv)
+    if args.seed is not None:
+        return args.seed
+
+    value = os.environ.get(SEED_VARIABLE, "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        parser.error(f"{SEED_VARIABLE} must be an integer, not {value!r}")
+
 # Check Python version
 if sys.version_info < (3, 6):
     print("This game requires Python 3.6 or higher")
@@ -35,6 +56,9 @@ except ImportError as e:
 
 # Run the game
 if __name__ == "__main__":
+    # Seed for reproducible runs - loaded games keep the seed stored in their save
+    seed = parse_seed()
+    
     # Create saves folder if it doesn't exist
     base_path = get_base_path()
     saves_path = os.path.join(base_path, "saves")
@@ -46,7 +70,7 @@ if __name__ == "__main__":
         from game.main import SpaceStationGame
         
         root = tk.Tk()
-        app = SpaceStationGame(root, base_path)
+        app = SpaceStationGame(root, base_path, seed=seed)
         root.mainloop()
     except Exception as e:
         print(f"Error starting game: {e}")
@@ -0,0 +1,127 @@
+import pytest
+
+from game.autosave import (SaveTracker, autosave_folder, write_pass, clear_passes, apply_passes, list_passes,
+                           section_keys)
+from game.save_service import write_save_file
+from game.save_format import read_save_file
+
+
+def player_data():
+    return {
+        "name": "Test",
+        "credits": 100,
+        "location": {"x": 0, "y": 0},
+        "stock_market": {"cycle_number": 1},
+        "stock_holdings": {},
+        "notes": [],
+        "inventory": []
+    }
+
+
+def take_and_write(tracker, folder, data, *sections):
+    """Mark sections dirty and write the pass the tracker takes for them"""
+    tracker.mark_dirty(*sections)
+    number, names, snapshot = tracker.take_pass(data)
+    write_pass(folder, number, names, snapshot)
+    return number
+
+
+def test_take_pass_writes_only_dirty_sections():
+    """A pass holds the keys of its dirty sections, and nothing is taken when nothing changed"""
+    tracker = SaveTracker()
+    data = player_data()
+    assert tracker.take_pass(data) is None
+
+    tracker.mark_dirty("notes", "player")
+    number, sections, snapshot = tracker.take_pass(data)
+    assert (number, sections) == (1, ["notes", "player"])
+    assert set(snapshot) == {"notes", "name", "credits", "location"}
+    assert tracker.take_pass(data) is None
+    assert section_keys(data, "stock_market") == ["stock_market", "stock_holdings"]
+
+    with pytest.raises(ValueError):
+        tracker.mark_dirty("nonsense")
+
+
+def test_write_pass_prunes_passes_no_longer_newest_for_any_section(tmp_path):
+    """The folder keeps at most one pass per section - the newest copy of it"""
+    folder = autosave_folder(str(tmp_path), "Test")
+    tracker = SaveTracker()
+    data = player_data()
+
+    take_and_write(tracker, folder, data, "player")
+    take_and_write(tracker, folder, data, "notes", "player")
+    take_and_write(tracker, folder, data, "stock_market")
+    assert [(number, names) for number, names, _ in list_passes(folder)] == [
+        (2, ["notes", "player"]), (3, ["stock_market"])]
+
+    take_and_write(tracker, folder, data, "notes")
+    take_and_write(tracker, folder, data, "player")
+    assert [number for number, _, _ in list_passes(folder)] == [3, 4, 5]
+
+
+def test_apply_passes_replays_passes_newer_than_the_save(tmp_path):
+    """A load takes every section from the newest pass that holds it, skipping passes the save covers"""
+    folder = autosave_folder(str(tmp_path), "Test")
+    tracker = SaveTracker()
+    data = player_data()
+
+    data["credits"] = 200
+    take_and_write(tracker, folder, data, "player")
+
+    # A full save covers pass 1
+    saved = dict(data, autosave_pass=tracker.last_pass)
+    save_path = str(tmp_path / "Test.sav")
+    write_save_file(save_path, saved)
+
+    data["credits"] = 300
+    data["notes"] = ["later"]
+    take_and_write(tracker, folder, data, "notes", "player")
+    data["stock_holdings"] = {"Acme": 5}
+    take_and_write(tracker, folder, data, "stock_market")
+
+    loaded = read_save_file(save_path, lazy=True)
+    assert apply_passes(loaded, folder) == 3
+    assert loaded["credits"] == 300
+    assert loaded["notes"] == ["later"]
+    assert loaded["stock_holdings"] == {"Acme": 5}
+
+
+def test_apply_passes_stops_at_an_unreadable_pass(tmp_path):
+    """A torn pass and everything after it are ignored"""
+    folder = autosave_folder(str(tmp_path), "Test")
+    tracker = SaveTracker()
+    data = player_data()
+
+    data["credits"] = 200
+    take_and_write(tracker, folder, data, "player")
+    number = take_and_write(tracker, folder, data, "notes")
+    path = [path for n, _, path in list_passes(folder) if n == number][0]
+    with open(path, "wb") as f:
+        f.write(b"torn")
+
+    loaded = player_data()
+    assert apply_passes(loaded, folder) == 1
+    assert loaded["credits"] == 200
+
+
+def test_passes_after_a_load_are_numbered_after_the_ones_on_disk(tmp_path):
+    """New passes never reuse a number already on disk, so replays keep their order and a full save clears them"""
+    folder = autosave_folder(str(tmp_path), "Test")
+    tracker = SaveTracker()
+    data = player_data()
+    for section in ("player", "notes", "inventory"):
+        take_and_write(tracker, folder, data, section)
+
+    # The save claims to cover every pass, as SpaceStationGame.load_game_file numbers after both
+    loaded = dict(data, autosave_pass=3)
+    last_pass = apply_passes(loaded, folder)
+    newest_on_disk = list_passes(folder)[-1][0]
+    tracker = SaveTracker(max(last_pass, newest_on_disk))
+
+    assert take_and_write(tracker, folder, loaded, "notes") == 4
+    assert [number for number, _, _ in list_passes(folder)] == [1, 3, 4]
+
+    # A full save covering pass 4 removes every pass up to it
+    clear_passes(folder, 4)
+    assert list_passes(folder) == []
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from game.candles import CandlePyramid, cycle_index
+from game.market_engine import CYCLES_PER_DAY, advance_cycle
+from game.price_history import HistoryBlock
+
+
+def random_prices(cycles, companies=3, seed=5):
+    """One row of prices per cycle, one column per company"""
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.cumprod(1.0 + rng.uniform(-0.1, 0.1, (cycles, companies)), axis=0)
+
+
+def assert_same_candles(first, second, companies):
+    assert first.position == second.position
+    assert first.cycles == second.cycles
+    for first_level, second_level in zip(first.levels, second.levels):
+        assert first_level.completed == second_level.completed
+        assert first_level.filled == second_level.filled
+        for row in range(companies):
+            np.testing.assert_allclose(first_level.candles(row), second_level.candles(row), rtol=1e-6)
+
+
+@pytest.mark.parametrize("cycle_number, day_number", [(1, 1), (4, 1), (2, 9)])
+@pytest.mark.parametrize("chunks", [[700], [3, 1, 40, 2, 654], [151, 149, 400]])
+def test_extend_matches_appending_one_cycle_at_a_time(cycle_number, day_number, chunks):
+    """Bulk extends in any chunking give the same candles as one append per cycle"""
+    prices = random_prices(sum(chunks))
+
+    appended = CandlePyramid(3, depth=50)
+    appended.set_cycle(cycle_number, day_number)
+    for row in prices:
+        appended.append(row)
+
+    extended = CandlePyramid(3, depth=50)
+    extended.set_cycle(cycle_number, day_number)
+    start = 0
+    for chunk in chunks:
+        extended.extend(prices[start:start + chunk])
+        start += chunk
+
+    assert_same_candles(appended, extended, 3)
+
+
+def test_day_candles_run_from_cycle_one_to_cycle_five():
+    """Each day candle opens on cycle 1 and closes on the last cycle of a game day"""
+    cycle_number, day_number = 3, 2
+    prices = random_prices(4 * CYCLES_PER_DAY)
+    pyramid = CandlePyramid(3)
+    pyramid.set_cycle(cycle_number, day_number)
+    pyramid.extend(prices)
+
+    # Prices by the game day they fall on
+    days = {}
+    for step, row in enumerate(prices):
+        cycle, day = advance_cycle(cycle_number, day_number, step)
+        days.setdefault(day, []).append(row)
+
+    opens, highs, lows, closes = pyramid.levels[0].candles(1)
+    for (day, rows), candle in zip(sorted(days.items()), zip(opens, highs, lows, closes)):
+        rows = np.array(rows)[:, 1]
+        assert candle == pytest.approx((rows[0], rows.max(), rows.min(), rows[-1]), rel=1e-6)
+
+    # Day 2 only saw cycles 3-5, and the last day is still in progress
+    assert pyramid.levels[0].completed == 4
+    assert pyramid.levels[0].filled == 2
+    assert cycle_index(1, 1) == 0 and cycle_index(1, 2) == CYCLES_PER_DAY
+
+
+def test_weeks_start_on_whole_days():
+    """A week candle holds seven whole game days"""
+    pyramid = CandlePyramid(1)
+    pyramid.set_cycle(1, 1)
+    pyramid.extend(np.arange(1.0, 7 * CYCLES_PER_DAY + 2).reshape(-1, 1))
+
+    week = pyramid.levels[1]
+    assert week.completed == 1
+    opens, highs, lows, closes = week.completed_candles(0)
+    assert (opens[0], highs[0], lows[0], closes[0]) == (1.0, 35.0, 1.0, 35.0)
+
+
+def test_saved_candles_continue_like_unsaved_ones():
+    """Candles restored with from_dict go on exactly like the ones that were saved"""
+    prices = random_prices(600)
+    pyramid = CandlePyramid(3, depth=40)
+    pyramid.set_cycle(2, 1)
+    pyramid.extend(prices[:437])
+
+    meta, rows = pyramid.to_dict(3)
+    restored = CandlePyramid.from_dict(meta, [np.asarray(row) for row in rows], 3, 8)
+    pyramid.extend(prices[437:])
+    restored.extend(prices[437:])
+    assert_same_candles(pyramid, restored, 3)
+
+
+def test_from_history_places_the_last_price_on_the_given_cycle():
+    """Candles rebuilt from an older save's price history line up with its game days"""
+    prices = random_prices(23)
+    history = HistoryBlock(3, depth=100)
+    history.extend(prices)
+
+    rebuilt = CandlePyramid.from_history(history, 3, cycle_number=3, day_number=5)
+    assert rebuilt.position == cycle_index(3, 5) + 1
+
+    expected = CandlePyramid(3)
+    expected.position = cycle_index(3, 5) + 1 - len(prices)
+    expected.extend(prices)
+    assert_same_candles(rebuilt, expected, 3)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from game.company_query import CompanyQuery
+
+
+def test_index_reuses_sort_for_same_names_and_prices():
+    """Indexing the same name list and price array again keeps both sorts"""
+    query = CompanyQuery()
+    names = ["Gamma", "alpha", "Beta"]
+    prices = np.array([30.0, 10.0, 20.0])
+
+    query.index(names, prices)
+    sorted_names = query.sorted_names
+    price_order = query.price_order
+
+    # A fresh list with the same names, like the stock market window builds on every refresh
+    query.index(list(names), prices)
+    assert query.sorted_names is sorted_names
+    assert query.price_order is price_order
+
+    assert query.select(100.0) == ["alpha", "Beta", "Gamma"]
+    assert query.select(100.0, prefix="b") == ["Beta"]
+
+
+def test_index_rebuilds_price_order_for_new_prices():
+    """A new price array (the next published market state) re-sorts by price"""
+    query = CompanyQuery()
+    names = ["Gamma", "alpha", "Beta"]
+    query.index(names, np.array([30.0, 10.0, 20.0]))
+    sorted_names = query.sorted_names
+
+    query.index(names, np.array([5.0, 10.0, 20.0]))
+    assert query.sorted_names is sorted_names
+    assert query.select(100.0) == ["Gamma", "alpha", "Beta"]
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from game.indicators import IndicatorEngine, INDICATORS
+from game.market_engine import MarketEngine
+from game.price_history import HistoryBlock
+
+
+def random_prices(cycles, companies=4, seed=3):
+    """One row of prices per cycle, one column per company"""
+    rng = np.random.default_rng(seed)
+    return 50.0 * np.cumprod(1.0 + rng.uniform(-0.1, 0.1, (cycles, companies)), axis=0)
+
+
+def appended(prices):
+    """Indicators updated one tick at a time"""
+    indicators = IndicatorEngine(prices.shape[1])
+    for row in prices:
+        indicators.append(row)
+    return indicators
+
+
+def assert_same_indicators(first, second, companies, rtol):
+    np.testing.assert_array_equal(first.counts[:companies], second.counts[:companies])
+    for name in INDICATORS:
+        np.testing.assert_allclose(first.column(name)[:companies], second.column(name)[:companies], rtol=rtol)
+
+
+def test_extend_replaying_everything_matches_appending():
+    """With every cycle replayed, extend is exactly one append per cycle"""
+    prices = random_prices(300)
+    indicators = IndicatorEngine(4)
+    indicators.extend(prices[:120], replay=120)
+    indicators.extend(prices[120:], replay=180)
+    assert_same_indicators(indicators, appended(prices), 4, rtol=1e-12)
+
+
+@pytest.mark.parametrize("replay", [400, 1000])
+def test_extend_with_a_short_replay_matches_appending(replay):
+    """Skipping the cycles that have decayed away leaves the same indicators as every tick"""
+    prices = random_prices(5000)
+    indicators = IndicatorEngine(4)
+    indicators.extend(prices, replay=replay)
+    assert_same_indicators(indicators, appended(prices), 4, rtol=1e-6)
+    np.testing.assert_array_equal(indicators.peaks[:4], prices.max(axis=0))
+
+
+def test_extend_after_appends_keeps_earlier_peaks():
+    """A replay on top of ticked indicators keeps their peaks and moving state"""
+    prices = random_prices(3000)
+    prices[10] *= 3.0  # Peak well before the replayed cycles
+    indicators = IndicatorEngine(4)
+    for row in prices[:50]:
+        indicators.append(row)
+    indicators.extend(prices[50:], replay=400)
+    assert_same_indicators(indicators, appended(prices), 4, rtol=1e-6)
+
+
+def test_fast_forward_updates_indicators_like_stepping():
+    """The engine's chunked fast_forward replays the right cycles into the indicators"""
+    def engine():
+        market = MarketEngine(capacity=4, rng=np.random.default_rng(9), history_depth=64,
+                              indicators=IndicatorEngine(4))
+        for i, price in enumerate([5.0, 50.0, 500.0, 1.5]):
+            market.add_company(f"Company {i}", price)
+        return market
+
+    stepped = engine()
+    for _ in range(2500):
+        stepped.step()
+    jumped = engine()
+    jumped.fast_forward(2500, chunk_size=700)
+    assert_same_indicators(jumped.indicators, stepped.indicators, 4, rtol=1e-6)
+
+
+def test_from_history_matches_appending_the_history():
+    """Indicators rebuilt on load match ticking through the saved history"""
+    prices = random_prices(80)
+    history = HistoryBlock(4, depth=100)
+    history.extend(prices)
+    assert_same_indicators(IndicatorEngine.from_history(history, 4), appended(prices), 4, rtol=1e-12)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from game.market_engine import MarketEngine, MIN_PRICE
+from game.candles import CandlePyramid
+
+# Starting prices - the first ones sit just above the floor so their walks hit it
+STARTING_PRICES = [1.02, 1.1, 1.5, 40.0, 300.0, 999.0]
+
+
+def seeded_engine(history_depth=32):
+    """Engine with independent moves, so step() and fast_forward() draw the same numbers"""
+    engine = MarketEngine(capacity=len(STARTING_PRICES), rng=np.random.default_rng(11), history_depth=history_depth,
+                          candles=CandlePyramid(len(STARTING_PRICES), depth=64))
+    for i, price in enumerate(STARTING_PRICES):
+        engine.add_company(f"Company {i}", price)
+    return engine
+
+
+@pytest.mark.parametrize("cycles, chunk_size", [(1, 4096), (7, 4096), (80, 4096), (80, 9)])
+def test_fast_forward_matches_stepping(cycles, chunk_size):
+    """fast_forward(n) leaves the same prices, history and candles as n calls to step()"""
+    stepped = seeded_engine()
+    for _ in range(cycles):
+        stepped.step()
+
+    jumped = seeded_engine()
+    jumped.fast_forward(cycles, chunk_size=chunk_size)
+
+    n = len(STARTING_PRICES)
+    assert jumped.ticks == stepped.ticks == cycles
+    np.testing.assert_allclose(jumped.prices, stepped.prices, rtol=1e-9)
+    np.testing.assert_allclose(jumped.previous_values[:n], stepped.previous_values[:n], rtol=1e-9)
+    assert jumped.prices.min() >= MIN_PRICE
+
+    for row in range(n):
+        np.testing.assert_allclose(jumped.history.window(row), stepped.history.window(row), rtol=1e-9)
+
+    assert jumped.candles.cycles == stepped.candles.cycles
+    for fast_level, slow_level in zip(jumped.candles.levels, stepped.candles.levels):
+        assert fast_level.completed == slow_level.completed
+        for row in range(n):
+            np.testing.assert_allclose(fast_level.candles(row), slow_level.candles(row), rtol=1e-6)
+
+
+def test_fast_forward_holds_prices_on_the_floor():
+    """Walks that fall to the floor stop on it instead of going below"""
+    engine = seeded_engine(history_depth=500)
+    engine.fast_forward(500, chunk_size=64)
+
+    history = np.array([engine.history.window(row) for row in range(len(STARTING_PRICES))])
+    assert history.min() >= MIN_PRICE
+    assert (history[0] == MIN_PRICE).any()
+    assert engine.previous_values[0] >= MIN_PRICE
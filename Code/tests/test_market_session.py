@@ -0,0 +1,66 @@
+import datetime
+
+import numpy as np
+
+from game.market_session import MarketSession
+from game.market_scheduler import MarketScheduler
+from game.trade_ledger import TradeLedger
+from game.save_service import write_save_file
+from game.save_format import read_save_file
+
+
+def test_save_and_load_restore_the_market(tmp_path):
+    """A saved session loads back with the same prices, cycle, orders and trades"""
+    session = MarketSession(str(tmp_path), seed=1)
+    session.player_data = {"name": "test", "credits": 1000.0, "stock_holdings": {}, "stock_market": {}}
+    session.trade_ledger = TradeLedger(journal_path=session.get_trade_journal_path())
+    company = session.companies[0]
+    session.order_book.place(company.name, "sell", "limit", 5, company.current_value * 10)
+    session.trade_ledger.record(1, 1, "bought", company.name, 1, 100.0, 100.0)
+    for _ in range(3):
+        session.run_stock_market(session.last_update_time)
+
+    session.prepare_save()
+    path = str(tmp_path / "test.sav")
+    write_save_file(path, session.player_data)
+
+    loaded = MarketSession(str(tmp_path), seed=2)
+    loaded.player_data = read_save_file(path, lazy=True)
+    loaded.load_market_state()
+
+    size = session.market_engine.size
+    assert np.array_equal(loaded.market_engine.current_values[:size], session.market_engine.current_values[:size])
+    assert (loaded.stock_cycle_number, loaded.stock_day_number) == (session.stock_cycle_number,
+                                                                    session.stock_day_number)
+    assert loaded.order_book.to_list() == session.order_book.to_list()
+    assert len(loaded.trade_ledger) == 1
+
+
+def test_ticks_started_before_a_load_are_dropped(tmp_path):
+    """A tick the scheduler began before a load rescheduled it doesn't run against the loaded market"""
+    session = MarketSession(str(tmp_path), seed=1)
+    session.player_data = {"name": "test", "credits": 1000.0, "stock_holdings": {}, "stock_market": {}}
+    session.prepare_save()
+    path = str(tmp_path / "test.sav")
+    write_save_file(path, session.player_data)
+
+    # The scheduler of the running game has just fired a tick that is waiting for the market lock
+    stale_tick = session.last_update_time + datetime.timedelta(seconds=30)
+    session.market_scheduler = MarketScheduler(session.run_scheduled_tick, session.market_tick_seconds, stale_tick)
+
+    session.player_data = read_save_file(path, lazy=True)
+    session.load_market_state()
+    assert session.market_scheduler.last_tick_time == session.last_update_time
+
+    ticks = session.market_engine.ticks
+    loaded_time = session.last_update_time
+    session.run_scheduled_tick(stale_tick)
+    assert session.market_engine.ticks == ticks
+    assert session.last_update_time == loaded_time
+
+    # The rescheduled boundary still ticks
+    next_tick = session.market_scheduler.next_tick_time()
+    session.market_scheduler.last_tick_time = next_tick
+    session.run_scheduled_tick(next_tick)
+    assert session.market_engine.ticks == ticks + 1
+    assert session.last_update_time == next_tick
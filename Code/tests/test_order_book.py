@@ -0,0 +1,116 @@
+import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from game.market_engine import advance_cycle
+from game.market_session import MarketSession
+from game.order_book import OrderBook
+
+
+def listed(**prices):
+    """companies_by_name for match(), with just the current prices"""
+    return {name: SimpleNamespace(current_value=price) for name, price in prices.items()}
+
+
+@pytest.mark.parametrize("side, order_type, trigger, quiet, crossed", [
+    ("buy", "limit", 90.0, 95.0, 90.0),    # Buys once the price falls to the limit
+    ("sell", "stop", 90.0, 95.0, 85.0),    # Sells once the price falls to the stop
+    ("sell", "limit", 110.0, 105.0, 110.0),  # Sells once the price rises to the limit
+    ("buy", "stop", 110.0, 105.0, 115.0)   # Buys once the price rises to the stop
+])
+def test_match_triggers_limit_and_stop_orders(side, order_type, trigger, quiet, crossed):
+    """Each side and type fires only once the price reaches its trigger, and only once"""
+    book = OrderBook()
+    order = book.place("Acme", side, order_type, 5, trigger)
+
+    assert book.match(listed(Acme=quiet)) == []
+    assert book.match(listed(Acme=crossed)) == [order]
+    assert len(book) == 0
+    assert book.match(listed(Acme=crossed)) == []
+
+
+def test_match_fills_in_placing_order_and_ignores_unlisted_companies():
+    """Orders triggered together come back oldest first"""
+    book = OrderBook()
+    stop = book.place("Acme", "sell", "stop", 1, 95.0)
+    limit = book.place("Acme", "buy", "limit", 1, 99.0)
+    other = book.place("Delisted", "buy", "limit", 1, 1000.0)
+
+    assert book.match(listed(Acme=90.0)) == [stop, limit]
+    assert book.to_list() == [other]
+
+
+def test_match_skips_cancelled_orders():
+    """A cancelled order never fires, and the orders behind it in the heap still do"""
+    book = OrderBook()
+    cancelled = book.place("Acme", "buy", "limit", 1, 95.0)
+    behind = book.place("Acme", "buy", "limit", 1, 90.0)
+
+    assert book.cancel(cancelled["id"]) == cancelled
+    assert book.cancel(cancelled["id"]) is None
+    assert book.match(listed(Acme=94.0)) == []
+    assert book.match(listed(Acme=90.0)) == [behind]
+
+
+def test_loaded_orders_keep_their_ids():
+    """Orders restored from a save keep matching, and new ones get fresh ids"""
+    book = OrderBook()
+    book.place("Acme", "sell", "limit", 1, 110.0)
+    restored = OrderBook(book.to_list())
+
+    assert restored.place("Acme", "buy", "limit", 1, 90.0)["id"] == 2
+    assert [order["id"] for order in restored.match(listed(Acme=120.0))] == [1]
+
+
+def test_match_path_returns_first_crossing_and_its_price():
+    """The fill is at the first cycle that reached the trigger, not the lowest or highest one"""
+    book = OrderBook()
+    buy = book.place("Acme", "buy", "limit", 1, 95.0)
+    stop = book.place("Acme", "buy", "stop", 1, 104.0)
+    untouched = book.place("Acme", "sell", "stop", 1, 50.0)
+    cancelled = book.place("Bolt", "sell", "limit", 1, 10.0)
+    book.cancel(cancelled["id"])
+
+    # One row per cycle, one column per company
+    prices = np.array([
+        [100.0, 20.0],
+        [94.0, 20.0],
+        [90.0, 20.0],
+        [105.0, 20.0],
+        [110.0, 20.0]
+    ])
+    fills = book.match_path({"Acme": 0, "Bolt": 1}, prices)
+
+    assert fills == [(buy, 1, 94.0), (stop, 3, 105.0)]
+    assert book.to_list() == [untouched]
+    assert book.match_path({"Acme": 0}, prices[:0]) == []
+
+
+def test_catch_up_fills_orders_crossed_in_skipped_cycles(tmp_path):
+    """Catching up fills a standing order on the skipped cycle that crossed it, at that cycle's price"""
+    missed = 20
+
+    def caught_up_session(order_price=None):
+        session = MarketSession(str(tmp_path), seed=7)
+        if order_price is not None:
+            session.order_book.place(session.companies[0].name, "buy", "limit", 1, order_price)
+        tick = datetime.timedelta(seconds=session.market_tick_seconds)
+        session.last_update_time = datetime.datetime.now() - tick * missed - tick / 2
+        assert session.catch_up_market() == missed
+        return session
+
+    # The same seed without the order gives the path the catch-up will take
+    path = caught_up_session().market_engine.history.window(0)[-missed:]
+    crossing = int(np.argmin(path[1:])) + 1
+    trigger = float(path[crossing])
+    assert path[:crossing].min() > trigger
+
+    session = caught_up_session(trigger)
+    order, price, day, cycle = session.order_fills.get_nowait()
+    assert order["price"] == trigger
+    assert price == pytest.approx(trigger)
+    assert (cycle, day) == advance_cycle(1, 1, crossing + 1)
+    assert len(session.order_book) == 0
+    assert session.order_fills.empty()
@@ -0,0 +1,140 @@
+import json
+import zlib
+
+import numpy as np
+import pytest
+
+from game.save_format import (dumps_save, loads_save, read_save_file, save_file_path, list_saves, _pack_block,
+                              SaveData, SAVE_MAGIC, SAVE_EXTENSION, LEGACY_SAVE_EXTENSION, INDEX_FILENAME)
+
+
+def player_data():
+    """Save data with every kind of packed market column"""
+    return {
+        "name": "Test",
+        "credits": 1234.5,
+        "stock_holdings": {"Acme": 10},
+        "stock_market": {
+            "cycle_number": 3,
+            "day_number": 7,
+            "columns": {
+                "names": ["Acme", "Bolt", "Core"],
+                "current_values": [101.25, 1.0, 999.5],
+                "previous_values": [100.0, 1.5, 1000.0],
+                "owned_shares": [10, 0, 2 ** 40],
+                "price_history": [[99.0, 100.0, 101.25], [], [1000.0, 999.5]],
+                "candles": [[1.5, 2.5], [3.25]]
+            }
+        },
+        "notes": [{"timestamp": "2000-01-01T00:00:00", "text": "Hello"}]
+    }
+
+
+def test_compact_save_round_trips():
+    """Packed columns, ragged rows and the rest of the player data load back as they were saved"""
+    data = player_data()
+    encoded = dumps_save(data)
+
+    assert encoded.startswith(SAVE_MAGIC)
+    assert loads_save(encoded) == data
+
+
+def test_packed_columns_are_shuffled_blocks_outside_the_json():
+    """Column values live in byte-shuffled zlib blocks, not in the JSON header"""
+    data = player_data()
+    data["stock_market"]["columns"]["price_history"] = [list(np.linspace(1.0, 2.0, 5000))]
+    encoded = dumps_save(data)
+    assert len(encoded) < len(json.dumps(data)) / 2
+
+    # Each byte position of the values is stored together
+    values = np.array([1.0, 2.0, 3.0], dtype="<f8")
+    blocks = []
+    reference = _pack_block(values, "<f8", blocks)
+    shuffled = zlib.decompress(blocks[reference["block"]])
+    assert shuffled == values.view(np.uint8).reshape(3, 8).T.tobytes()
+
+
+def test_empty_and_missing_columns_round_trip():
+    """A market with no companies, or a save without market columns, encodes too"""
+    data = player_data()
+    data["stock_market"]["columns"] = {"names": [], "current_values": [], "price_history": []}
+    assert loads_save(dumps_save(data)) == data
+
+    plain = {"name": "Plain", "stock_market": {"cycle_number": 1}}
+    assert loads_save(dumps_save(plain)) == plain
+
+
+def test_newer_format_versions_are_refused():
+    """A save from a newer game isn't misread"""
+    encoded = bytearray(dumps_save(player_data()))
+    encoded[len(SAVE_MAGIC):len(SAVE_MAGIC) + 4] = (99).to_bytes(4, "little")
+    with pytest.raises(ValueError):
+        loads_save(bytes(encoded))
+
+
+def test_legacy_json_saves_still_load(tmp_path):
+    """Pretty-printed JSON saves from older versions are read as they are, and found by name"""
+    data = player_data()
+    legacy_path = tmp_path / ("Old" + LEGACY_SAVE_EXTENSION)
+    legacy_path.write_text(json.dumps(data, indent=4))
+    (tmp_path / INDEX_FILENAME).write_text("{}")
+
+    assert loads_save(legacy_path.read_bytes()) == data
+    assert save_file_path(str(tmp_path), "Old") == str(legacy_path)
+    assert read_save_file(save_file_path(str(tmp_path), "Old")) == data
+    assert read_save_file(str(legacy_path), lazy=True) == data
+
+    # Once the game has written a compact save, that one wins
+    compact_path = tmp_path / ("Old" + SAVE_EXTENSION)
+    compact_path.write_bytes(dumps_save(dict(data, credits=1.0)))
+    assert save_file_path(str(tmp_path), "Old") == str(compact_path)
+    assert read_save_file(save_file_path(str(tmp_path), "Old"))["credits"] == 1.0
+    assert list_saves(str(tmp_path)) == ["Old"]
+
+
+def test_cold_sections_stay_compressed_until_used():
+    """A lazy load leaves the notes in their block until they're first read"""
+    encoded = dumps_save(player_data())
+    data = loads_save(encoded, lazy=True)
+
+    assert isinstance(data, SaveData)
+    assert "notes" in data.cold and not dict.__contains__(data, "notes")
+    assert "notes" in data
+    assert data["name"] == "Test"
+    assert "notes" in data.cold
+
+    assert data["notes"] == player_data()["notes"]
+    assert "notes" not in data.cold and dict.__contains__(data, "notes")
+
+
+def test_untouched_cold_sections_are_saved_back_unchanged():
+    """Saving a lazy load writes the cold block back as it was, without decoding it"""
+    encoded = dumps_save(player_data())
+    data = loads_save(encoded, lazy=True)
+    block = data.cold["notes"].data
+
+    def refuse():
+        raise AssertionError("cold section was decoded")
+    data.cold["notes"].load = refuse
+
+    data["credits"] = 1.0
+    resaved = dumps_save(data)
+    assert block in resaved
+    assert loads_save(resaved)["notes"] == player_data()["notes"]
+    assert loads_save(resaved)["credits"] == 1.0
+
+
+def test_changed_cold_sections_are_saved_with_the_change():
+    """Reading, replacing or removing a cold section works like a plain dict"""
+    data = loads_save(dumps_save(player_data()), lazy=True)
+    data.setdefault("notes", []).append({"timestamp": "2000-01-02T00:00:00", "text": "Again"})
+    assert len(loads_save(dumps_save(data))["notes"]) == 2
+
+    replaced = loads_save(dumps_save(player_data()), lazy=True)
+    replaced["notes"] = []
+    assert loads_save(dumps_save(replaced))["notes"] == []
+
+    removed = loads_save(dumps_save(player_data()), lazy=True)
+    del removed["notes"]
+    assert "notes" not in removed
+    assert "notes" not in loads_save(dumps_save(removed))
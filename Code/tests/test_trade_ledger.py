@@ -0,0 +1,95 @@
+import os
+
+from game.trade_ledger import TradeLedger
+
+
+def journalled_ledger(path, trades):
+    """Ledger with the given (day, cycle, side, company, amount, price) trades flushed to its journal"""
+    ledger = TradeLedger(journal_path=str(path))
+    ledger.reset_journal()
+    for day, cycle, side, company, amount, price in trades:
+        ledger.record(day, cycle, side, company, amount, price)
+    ledger.flush()
+    return ledger
+
+
+SAVED_TRADES = [
+    (1, 1, "bought", "Acme", 10, 5.0),
+    (1, 1, "bought", "Acme", 10, 7.0),
+    (1, 2, "sold", "Acme", 5, 8.0),
+    (2, 3, "bought", "Bolt", 1, 100.0)
+]
+
+
+def test_load_cuts_the_journal_back_to_the_saved_records(tmp_path):
+    """Trades journalled after the save (e.g. before a crash) are dropped from the history and the file"""
+    path = tmp_path / "test.trades.jsonl"
+    saved = journalled_ledger(path, SAVED_TRADES)
+    records, size = saved.journal_records, saved.journal_bytes
+    saved.record(3, 1, "bought", "Crash", 1, 1.0)
+    saved.flush()
+
+    ledger = TradeLedger.load(str(path), records)
+    assert (ledger.journal_records, ledger.journal_bytes) == (records, size)
+    assert os.path.getsize(path) == size
+    assert ledger.entry(3, 1) is None
+    assert ledger.entry(1, 1)["trades"]["bought"]["Acme"] == {"amount": 20, "price": 6.0, "total": 120.0}
+
+
+def test_load_drops_a_torn_final_line(tmp_path):
+    """A half-written last line ends the journal"""
+    path = tmp_path / "test.trades.jsonl"
+    saved = journalled_ledger(path, SAVED_TRADES)
+    with open(path, "ab") as f:
+        f.write(b'{"day": 3, "cyc')
+
+    ledger = TradeLedger.load(str(path))
+    assert len(ledger) == 3
+    assert os.path.getsize(path) == saved.journal_bytes
+
+
+def test_open_journal_reads_lazily_and_cuts_to_the_saved_size(tmp_path):
+    """The journal is cut to the saved size at once, but only read when the trades are first needed"""
+    path = tmp_path / "test.trades.jsonl"
+    saved = journalled_ledger(path, SAVED_TRADES)
+    records, size = saved.journal_records, saved.journal_bytes
+    saved.record(3, 1, "bought", "Crash", 1, 1.0)
+    saved.flush()
+
+    ledger = TradeLedger.open_journal(str(path), records, size)
+    assert os.path.getsize(path) == size
+    assert ledger.entries == [] and ledger._unread == records
+
+    assert len(ledger) == 3
+    assert ledger._unread == 0
+    assert [trade[:4] for trade in ledger.query(company="Acme")] == [(1, 2, "sold", "Acme"),
+                                                                     (1, 1, "bought", "Acme")]
+
+
+def test_open_journal_without_a_saved_size_loads_at_once(tmp_path):
+    """Saves from before the size was stored read the journal straight away"""
+    path = tmp_path / "test.trades.jsonl"
+    journalled_ledger(path, SAVED_TRADES)
+
+    ledger = TradeLedger.open_journal(str(path), 2)
+    assert ledger._unread == 0
+    assert len(ledger.entries) == 1
+    assert ledger.journal_records == 2
+
+
+def test_trades_recorded_before_the_lazy_read_follow_the_journal(tmp_path):
+    """Trades recorded before the journal is read merge after the journal's, and are journalled once"""
+    path = tmp_path / "test.trades.jsonl"
+    saved = journalled_ledger(path, SAVED_TRADES)
+
+    ledger = TradeLedger.open_journal(str(path), saved.journal_records, saved.journal_bytes)
+    ledger.record(1, 1, "bought", "Acme", 20, 12.0)
+    ledger.record(4, 1, "sold", "Bolt", 1, 110.0)
+
+    assert ledger.entry(1, 1)["trades"]["bought"]["Acme"] == {"amount": 40, "price": 9.0, "total": 360.0}
+    assert [(entry["day"], entry["cycle"]) for entry in ledger] == [(1, 1), (1, 2), (2, 3), (4, 1)]
+
+    ledger.flush()
+    reloaded = TradeLedger.load(str(path), ledger.journal_records)
+    assert ledger.journal_records == len(SAVED_TRADES) + 2
+    assert list(reloaded) == list(ledger)